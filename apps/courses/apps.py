@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.courses'
+
+    def ready(self):
+        from apps.courses.search import create_search_index
+        post_migrate.connect(create_search_index, sender=self)
@@ -0,0 +1,191 @@
+"""
+Parallel transcription of long audio.
+
+The audio is cut into chunks at the quietest moment near every chunk length, each chunk is padded with a
+little overlap on both sides and transcribed in a process pool. Every chunk owns the audio between its
+cuts, so segments heard twice in an overlap are kept only by the chunk their midpoint falls in.
+
+This module must not import Django: it is imported again by the spawned pool processes.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import whisper
+
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+
+# Cuts are placed at the quietest frame within this many seconds before each chunk length
+SILENCE_SEARCH_SECONDS = 20
+SILENCE_FRAME_SECONDS = 0.05
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+# Model of a pool process, loaded once by the pool initializer
+_worker_model = None
+
+
+def format_segment(segment, offset=0.0):
+    return {
+        "text": segment.get("text", "").strip(),
+        "start": round(segment.get("start", 0.0) + offset, 2),
+        "end": round(segment.get("end", 0.0) + offset, 2)
+    }
+
+
+def find_chunk_boundaries(audio, chunk_seconds, search_seconds=SILENCE_SEARCH_SECONDS):
+    """
+    Returns the sample offsets the audio is cut at, starting with 0 and ending with its length.
+    A cut is made about every chunk_seconds, at the quietest frame of the search window before that point.
+    """
+    total = len(audio)
+    chunk = int(chunk_seconds * SAMPLE_RATE)
+    search = int(min(search_seconds, chunk_seconds / 2) * SAMPLE_RATE)
+    frame = max(1, int(SILENCE_FRAME_SECONDS * SAMPLE_RATE))
+
+    boundaries = [0]
+    while total - boundaries[-1] > chunk:
+        target = boundaries[-1] + chunk
+        window_start = target - search
+        frame_count = (target - window_start) // frame
+
+        if frame_count == 0:
+            boundaries.append(target)
+            continue
+
+        window = audio[window_start:window_start + frame_count * frame]
+        energy = np.square(window.reshape(frame_count, frame)).mean(axis=1)
+        boundaries.append(window_start + int(np.argmin(energy)) * frame + frame // 2)
+
+    boundaries.append(total)
+    return boundaries
+
+
+def split_audio(audio, chunk_seconds, overlap_seconds):
+    """
+    Returns the chunks of the audio as (audio, offset, own_start, own_end) tuples, times in seconds.
+    A chunk's audio extends overlap_seconds past its own range on both sides.
+    """
+    boundaries = find_chunk_boundaries(audio, chunk_seconds)
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+
+    chunks = []
+    for own_start, own_end in zip(boundaries, boundaries[1:]):
+        start = max(0, own_start - overlap)
+        end = min(len(audio), own_end + overlap)
+        chunks.append((audio[start:end], start / SAMPLE_RATE, own_start / SAMPLE_RATE, own_end / SAMPLE_RATE))
+
+    return chunks
+
+
+def transcribe_chunk(model, chunk):
+    """Transcribes one chunk and returns the segments it owns, with times relative to the whole audio."""
+    audio, offset, own_start, own_end = chunk
+    result = model.transcribe(audio)
+
+    segments = []
+    for segment in result.get("segments", []):
+        midpoint = offset + (segment.get("start", 0.0) + segment.get("end", 0.0)) / 2
+        if own_start <= midpoint < own_end:
+            segments.append(format_segment(segment, offset))
+
+    return segments
+
+
+def stitch_segments(chunk_segments):
+    """Joins the segments of every chunk into one list ordered by time, dropping repeats across a cut."""
+    segments = sorted(
+        (segment for segments in chunk_segments for segment in segments),
+        key=lambda segment: (segment["start"], segment["end"])
+    )
+
+    stitched = []
+    for segment in segments:
+        if not segment["text"]:
+            continue
+
+        previous = stitched[-1] if stitched else None
+        if previous and previous["text"] == segment["text"] and segment["start"] < previous["end"]:
+            previous["end"] = max(previous["end"], segment["end"])
+            continue
+
+        stitched.append(dict(segment))
+
+    return stitched
+
+
+def transcribe_audio_in_chunks(audio, model_name, chunk_seconds, overlap_seconds, workers, model=None,
+                              on_chunk=None):
+    """
+    Transcribes 16 kHz mono audio chunk by chunk in a pool of worker processes, or in this process with the
+    given model when there is a single worker. on_chunk is called in order after every chunk with the number
+    of chunks done, the number of chunks and the segments stitched so far.
+    """
+    chunks = split_audio(audio, chunk_seconds, overlap_seconds)
+
+    if workers > 1:
+        results = get_pool(model_name, workers).map(_transcribe_chunk_in_worker, chunks)
+    else:
+        results = (transcribe_chunk(model, chunk) for chunk in chunks)
+
+    chunk_segments = []
+    for segments in results:
+        chunk_segments.append(segments)
+
+        if on_chunk is not None:
+            on_chunk(len(chunk_segments), len(chunks), stitch_segments(chunk_segments))
+
+    return stitch_segments(chunk_segments)
+
+
+def get_pool(model_name, workers):
+    """
+    Returns the process pool for a model and worker count. The pool is kept between calls, so its processes
+    keep their loaded model; asking for another model or worker count replaces it. Every pool process holds a
+    copy of the model, in addition to the models loaded in this process.
+    """
+    global _pool, _pool_key
+
+    with _pool_lock:
+        if _pool is None or _pool_key != (model_name, workers):
+            if _pool is not None:
+                _pool.shutdown()
+
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_name, threads),
+            )
+            _pool_key = (model_name, workers)
+
+        return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_key
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+        _pool_key = None
+
+
+def _init_worker(model_name, threads):
+    global _worker_model
+
+    # Share the cores between the pool processes instead of every process using all of them
+    import torch
+    torch.set_num_threads(threads)
+
+    _worker_model = whisper.load_model(model_name)
+
+
+def _transcribe_chunk_in_worker(chunk):
+    return transcribe_chunk(_worker_model, chunk)
@@ -2,7 +2,7 @@ import re
 
 from django import forms
 from django.core.exceptions import ValidationError
-from django.forms import inlineformset_factory, TextInput
+from django.forms import BaseInlineFormSet, inlineformset_factory, TextInput
 
 from apps.courses.models import Course, Section, Content, Quiz
 
@@ -105,10 +105,70 @@ class QuizForm(forms.ModelForm):
         }
 
 
+class SubmittedObjectField(forms.ModelChoiceField):
+    """Primary key field of an EditorInlineFormSet form, looked up among the rows its formset loaded at once."""
+
+    def __init__(self, queryset, formset, **kwargs):
+        super().__init__(queryset, **kwargs)
+        self.formset = formset
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+
+        try:
+            pk = self.queryset.model._meta.pk.to_python(value)
+        except ValidationError:
+            pk = None
+
+        instance = self.formset.submitted_objects().get(pk)
+        if instance is None:
+            raise ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": value},
+            )
+
+        return instance
+
+
+class EditorInlineFormSet(BaseInlineFormSet):
+    """
+    Loads the rows named by the ids of every submitted form with one query, instead of the query per form
+    the primary key field of a model formset makes when it is cleaned.
+    """
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+
+        pk_field = form.fields[self._pk_field.name]
+        form.fields[self._pk_field.name] = SubmittedObjectField(
+            pk_field.queryset, self, initial=pk_field.initial, required=False, widget=pk_field.widget
+        )
+
+    def submitted_objects(self):
+        if getattr(self, "_submitted_objects", None) is None:
+            pks = []
+
+            for i in range(self.total_form_count()):
+                try:
+                    pk = self._pk_field.to_python(self.data.get(f"{self.add_prefix(i)}-{self._pk_field.name}"))
+                except ValidationError:
+                    continue
+
+                if pk is not None:
+                    pks.append(pk)
+
+            self._submitted_objects = self._pk_field.model._default_manager.in_bulk(pks) if pks else {}
+
+        return self._submitted_objects
+
+
 SectionFormSet = inlineformset_factory(
     Course,
     Section,
     form=SectionForm,
+    formset=EditorInlineFormSet,
     extra=0,
     can_delete=True,
 )
@@ -117,6 +177,7 @@ TextContentFormSet = inlineformset_factory(
     Section,
     Content,
     form=TextContentForm,
+    formset=EditorInlineFormSet,
     extra=0,
     can_delete=True,
 )
@@ -125,6 +186,7 @@ ImageContentFormSet = inlineformset_factory(
     Section,
     Content,
     form=ImageContentForm,
+    formset=EditorInlineFormSet,
     extra=0,
     can_delete=True,
 )
@@ -133,6 +195,7 @@ VideoContentFormSet = inlineformset_factory(
     Section,
     Content,
     form=VideoContentForm,
+    formset=EditorInlineFormSet,
     extra=0,
     can_delete=True,
 )
@@ -141,6 +204,7 @@ QuizFormSet = inlineformset_factory(
     Section,
     Quiz,
     form=QuizForm,
+    formset=EditorInlineFormSet,
     extra=0,
     can_delete=True,
 )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.courses.tasks import backfill_notify_at
+
+
+class Command(BaseCommand):
+    help = "Store the notification time of reminders scheduled before it was stored. Only needs to run once."
+
+    def handle(self, *args, **kwargs):
+        updated = backfill_notify_at()
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} reminders."))
@@ -0,0 +1,80 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+HEAVY_MODULES = ["whisper", "torch", "numba", "llvmlite", "numpy", "yt_dlp"]
+
+# Run in a fresh interpreter: sets Django up and loads the URLconf, which imports every view module like the
+# first request of a web worker does. Modules named on the command line are imported afterwards.
+STARTUP_SCRIPT = """
+import json, sys, time
+
+started = time.perf_counter()
+
+import django
+django.setup()
+
+from django.urls import get_resolver
+get_resolver().url_patterns
+
+for module in sys.argv[2:]:
+    __import__(module)
+
+seconds = time.perf_counter() - started
+
+rss_kb = None
+with open("/proc/self/status") as status:
+    for line in status:
+        if line.startswith("VmRSS:"):
+            rss_kb = int(line.split()[1])
+
+if rss_kb is None:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+heavy_modules = [module for module in json.loads(sys.argv[1]) if module in sys.modules]
+print(json.dumps({"seconds": seconds, "rss_kb": rss_kb, "heavy_modules": heavy_modules}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the startup time and memory of a web process, as it is now and with the transcription stack "
+        "imported at startup as views.py used to."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=3, help="Fresh processes started per measurement.")
+
+    def handle(self, *args, **options):
+        measurements = [
+            ("Eager (transcription stack imported at startup)", ["whisper", "yt_dlp"]),
+            ("Lazy (current)", []),
+        ]
+
+        for label, extra_modules in measurements:
+            runs = [self.measure(extra_modules) for _ in range(options["repeat"])]
+
+            seconds = statistics.median(run["seconds"] for run in runs)
+            rss_mb = statistics.median(run["rss_kb"] for run in runs) / 1024
+            heavy_modules = ", ".join(runs[0]["heavy_modules"]) or "none"
+
+            self.stdout.write(f"{label}: {seconds:.2f}s, {rss_mb:.0f} MB RSS, heavy modules loaded: {heavy_modules}")
+
+    def measure(self, extra_modules):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", settings.SETTINGS_MODULE)}
+
+        result = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT, json.dumps(HEAVY_MODULES), *extra_modules],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1])
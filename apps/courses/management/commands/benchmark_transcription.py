@@ -0,0 +1,65 @@
+import tempfile
+import time
+
+import numpy as np
+import whisper
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.courses.chunked_transcription import SAMPLE_RATE, get_pool, shutdown_pool, transcribe_audio_in_chunks
+from apps.courses.transcription import download_audio, get_whisper_model, is_youtube_url
+
+
+class Command(BaseCommand):
+    help = "Compare the wall-clock time of serial and parallel chunked transcription of one audio file or video."
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Path of an audio file or a YouTube video URL.")
+        parser.add_argument("--model", default=settings.WHISPER_MODEL_NAME)
+        parser.add_argument("--workers", type=int, default=settings.TRANSCRIPTION_WORKERS)
+        parser.add_argument("--chunk-seconds", type=int, default=settings.TRANSCRIPTION_CHUNK_SECONDS)
+        parser.add_argument("--overlap-seconds", type=float, default=settings.TRANSCRIPTION_CHUNK_OVERLAP_SECONDS)
+
+    def handle(self, *args, **options):
+        audio = self.load_audio(options["source"])
+        self.stdout.write(f"Audio length: {len(audio) / SAMPLE_RATE:.1f}s")
+
+        # Models are loaded before timing, so only transcription is compared. A single worker transcribes the
+        # chunks in this process with its model instead of starting a pool.
+        model = get_whisper_model(options["model"])
+        if options["workers"] > 1:
+            pool = get_pool(options["model"], options["workers"])
+            list(pool.map(np.square, [np.zeros(SAMPLE_RATE, dtype=np.float32)] * options["workers"]))
+
+        try:
+            started = time.perf_counter()
+            serial_segments = model.transcribe(audio)["segments"]
+            serial_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            parallel_segments = transcribe_audio_in_chunks(
+                audio,
+                options["model"],
+                chunk_seconds=options["chunk_seconds"],
+                overlap_seconds=options["overlap_seconds"],
+                workers=options["workers"],
+                model=model,
+            )
+            parallel_time = time.perf_counter() - started
+        finally:
+            shutdown_pool()
+
+        self.stdout.write(f"Serial: {serial_time:.1f}s, {len(serial_segments)} segments")
+        self.stdout.write(
+            f"Parallel ({options['workers']} workers, {options['chunk_seconds']}s chunks): "
+            f"{parallel_time:.1f}s, {len(parallel_segments)} segments"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {serial_time / parallel_time:.2f}x"))
+
+    def load_audio(self, source):
+        if not is_youtube_url(source):
+            return whisper.load_audio(source)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.stdout.write("Downloading audio...")
+            return whisper.load_audio(download_audio(source, temp_dir))
@@ -1,13 +1,10 @@
-import os
-import tempfile
-
-import whisper
-import yt_dlp
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 from django.utils.text import slugify
 
 from apps.courses.models import Course, Section, Content, Quiz
+from apps.courses.search import index_course, index_course_transcripts
+from apps.courses.transcription import transcribe_video_url
 
 User = get_user_model()
 
@@ -109,6 +106,9 @@ class Command(BaseCommand):
         Quiz.objects.create(section=s3, question="If you divide 20 by 4, what is the result?", correct_answer="5",
                             order=1)
 
+        index_course(course)
+        index_course_transcripts(course)
+
     def create_shapes_and_patterns_course(self, user):
         course = Course.objects.create(
             title="Learning Shapes and Patterns",
@@ -162,45 +162,20 @@ class Command(BaseCommand):
                             question="Which of the following is a pattern? A) apple, banana, apple, banana B) red, red, blue, green",
                             correct_answer="A", order=1)
 
+        index_course(course)
+        index_course_transcripts(course)
+
     def transcribe_video_url(self, video_url):
         """Downloads and transcribes a YouTube video using Whisper."""
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                audio_path = os.path.join(temp_dir, "audio.wav")
-
-                ydl_opts = {
-                    'format': 'bestaudio/best',
-                    'outtmpl': os.path.join(temp_dir, 'audio.%(ext)s'),
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'wav',
-                        'preferredquality': '192',
-                    }],
-                    'quiet': True,
-                    'no_warnings': True,
+            return [
+                {
+                    "start_time": int(segment["start"]),
+                    "end_time": int(segment["end"]),
+                    "text": segment["text"]
                 }
-
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([video_url])
-
-                for file in os.listdir(temp_dir):
-                    if file.endswith(".wav"):
-                        audio_path = os.path.join(temp_dir, file)
-                        break
-                else:
-                    raise FileNotFoundError("Audio file not found after download.")
-
-                model = whisper.load_model("base")
-                result = model.transcribe(audio_path)
-
-                return [
-                    {
-                        "start_time": int(segment.get("start", 0.0)),
-                        "end_time": int(segment.get("end", 0.0)),
-                        "text": segment.get("text", "").strip()
-                    }
-                    for segment in result.get("segments", [])
-                ]
+                for segment in transcribe_video_url(video_url)
+            ]
 
         except Exception as e:
             self.stderr.write(self.style.ERROR(f"Transcription failed: {str(e)}"))
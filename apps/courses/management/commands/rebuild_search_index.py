@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.courses.search import is_search_index_available, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text course search index from scratch."
+
+    def handle(self, *args, **kwargs):
+        if not is_search_index_available():
+            self.stdout.write(self.style.WARNING("Full-text search is not available on this database."))
+            return
+
+        indexed = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} courses."))
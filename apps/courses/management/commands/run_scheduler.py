@@ -0,0 +1,50 @@
+import signal
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.courses.scheduler import SCHEDULER_HORIZON, SCHEDULER_SYNC_INTERVAL, ReminderScheduler
+from apps.courses.tasks import send_scheduled_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Send scheduled course reminders at their notification time, keeping upcoming reminders in memory. "
+        "Stops on SIGTERM or SIGINT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sync-interval", type=float, default=SCHEDULER_SYNC_INTERVAL.total_seconds(),
+            help="Seconds between checks for new or rescheduled reminders."
+        )
+        parser.add_argument(
+            "--horizon-hours", type=float, default=SCHEDULER_HORIZON.total_seconds() / 3600,
+            help="Hours ahead of which reminders are kept in memory."
+        )
+
+    def handle(self, *args, **options):
+        # Reminders that came due while no scheduler was running are sent first
+        sent = send_scheduled_notifications()
+        if sent:
+            self.stdout.write(self.style.SUCCESS(f"Sent {sent} overdue reminders."))
+
+        scheduler = ReminderScheduler(
+            sync_interval=timedelta(seconds=options["sync_interval"]),
+            horizon=timedelta(hours=options["horizon_hours"]),
+        )
+
+        def stop(signum, frame):
+            self.stdout.write("Stopping the reminder scheduler...")
+            scheduler.stop()
+
+        previous_handlers = {signum: signal.signal(signum, stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+
+        self.stdout.write("Reminder scheduler started.")
+        try:
+            scheduler.run()
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+        self.stdout.write(self.style.SUCCESS("Reminder scheduler stopped."))
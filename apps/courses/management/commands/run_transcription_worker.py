@@ -0,0 +1,48 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.courses.tasks import process_transcription_jobs, requeue_stale_transcription_jobs
+from apps.courses.transcription import warmup_whisper_models
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run queued video transcription jobs, polling the database for new ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run the queued jobs and exit.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to wait between polls.")
+        parser.add_argument("--no-warmup", action="store_true", help="Load Whisper models on first use only.")
+
+    def handle(self, *args, **options):
+        if not options["no_warmup"]:
+            loaded_models = warmup_whisper_models()
+            self.stdout.write(f"Loaded Whisper models: {', '.join(loaded_models) or 'none'}")
+
+        while True:
+            # A database outage is logged and the next poll tries again, so the worker keeps running
+            try:
+                self.process()
+            except Exception as e:
+                logger.exception("Processing transcription jobs failed")
+                if options["once"]:
+                    raise CommandError(f"Processing transcription jobs failed: {e}") from e
+
+                self.stderr.write(self.style.ERROR(f"Processing transcription jobs failed: {e}"))
+
+            if options["once"]:
+                return
+
+            time.sleep(options["interval"])
+
+    def process(self):
+        requeued = requeue_stale_transcription_jobs()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale transcription jobs."))
+
+        processed = process_transcription_jobs()
+        if processed:
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} transcription jobs."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.courses.transcription import transcription_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show how often cached video transcriptions were reused."
+
+    def handle(self, *args, **kwargs):
+        stats = transcription_cache_stats()
+
+        self.stdout.write(f"Cached transcriptions: {stats['entries']}")
+        self.stdout.write(f"Hits: {stats['hits']}")
+        self.stdout.write(f"Misses: {stats['misses']}")
+        self.stdout.write(f"Hit rate: {stats['hit_rate']:.1%}")
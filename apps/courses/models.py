@@ -1,10 +1,12 @@
 import os
+import uuid
 
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils import timezone
 from django.utils.text import slugify
 
+from apps.users.mixins import FieldTrackerMixin
 from apps.users.models import CustomUser
 
 User = get_user_model()
@@ -21,7 +23,7 @@ def content_upload_path(instance, filename):
     )
 
 
-class Course(models.Model):
+class Course(FieldTrackerMixin, models.Model):
     JUNIOR = "junior"
     INTERMEDIATE = "intermediate"
     ADVANCED = "advance"
@@ -51,21 +53,28 @@ class Course(models.Model):
     )
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=DRAFT)
     created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, related_name="courses", null=True)
+    version = models.UUIDField(default=uuid.uuid4, editable=False)
 
-    def save(self, *args, **kwargs):
-        if self.pk:
-            original_course = Course.objects.get(pk=self.pk)
-            if original_course.title != self.title:
-                self.slug = slugify(self.title)
+    tracked_fields = ("title",)
 
-        if not self.slug:
+    def save(self, *args, **kwargs):
+        if not self.slug or (self.pk and self.has_changed("title")):
             self.slug = slugify(self.title)
 
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "slug"}
+
         super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         return self.title
 
+    def bump_version(self) -> None:
+        """Changes the course version so cached render trees of the course are no longer used."""
+        self.version = uuid.uuid4()
+        Course.objects.filter(pk=self.pk).update(version=self.version)
+
 
 class Section(models.Model):
     course: 'Course' = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="sections")
@@ -101,12 +110,14 @@ class Content(models.Model):
 
     def delete(self, *args, **kwargs):
         """Delete associated files when deleting content."""
+        self.delete_image_file()
+        super().delete(*args, **kwargs)
+
+    def delete_image_file(self) -> None:
         if self.image:
             if os.path.isfile(self.image.path):
                 os.remove(self.image.path)
 
-        super().delete(*args, **kwargs)
-
 
 class Quiz(models.Model):
     section: 'Section' = models.ForeignKey(Section, on_delete=models.CASCADE, related_name="quizzes")
@@ -122,10 +133,42 @@ class Answer(models.Model):
     user: 'CustomUser' = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="answers")
     quiz: 'Quiz' = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="answers")
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'quiz'], name='unique_answer'),
+        ]
+
     def __str__(self) -> str:
         return f"{self.user} answered {self.quiz}"
 
 
+class CourseProgress(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='course_progress')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='progress_records')
+
+    answered_count = models.PositiveIntegerField(default=0)
+    total_quizzes = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'course'], name='unique_course_progress'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.course}: {self.answered_count}/{self.total_quizzes}"
+
+    @property
+    def is_complete(self) -> bool:
+        return self.total_quizzes > 0 and self.answered_count >= self.total_quizzes
+
+    @property
+    def percentage(self) -> int:
+        if not self.total_quizzes:
+            return 0
+        return min(100, self.answered_count * 100 // self.total_quizzes)
+
+
 class ScheduledCourse(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='scheduled_courses')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='scheduled_by_users')
@@ -133,11 +176,105 @@ class ScheduledCourse(models.Model):
     scheduled_time = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Change stamp the reminder scheduler syncs on to pick up new and rescheduled reminders
+    updated_at = models.DateTimeField(auto_now=True)
+
     notify_before_minutes = models.PositiveIntegerField(default=15)
     notification_sent = models.BooleanField(default=False)
 
+    # Stored copy of get_notification_time(), kept up to date by save() so due reminders can be queried
+    notify_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['notification_sent', 'notify_at'], name='scheduled_course_notify_idx'),
+            models.Index(fields=['updated_at'], name='scheduled_course_updated_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.course.title} at {self.scheduled_time}"
 
+    def save(self, *args, **kwargs):
+        self.notify_at = self.get_notification_time()
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"scheduled_time", "notify_before_minutes"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "notify_at", "updated_at"}
+
+        super().save(*args, **kwargs)
+
     def get_notification_time(self):
         return self.scheduled_time - timezone.timedelta(minutes=self.notify_before_minutes)
+
+
+class TranscriptionJob(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transcription_jobs')
+    video_url = models.URLField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    stage = models.CharField(max_length=20, blank=True, default="")
+    progress = models.PositiveSmallIntegerField(default=0)
+    transcription = models.JSONField(blank=True, null=True)
+    error_message = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='transcription_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Transcription of {self.video_url} ({self.status})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.DONE, self.FAILED)
+
+
+class CachedTranscription(models.Model):
+    video_id = models.CharField(max_length=20)
+    model_name = models.CharField(max_length=30)
+    transcription = models.JSONField()
+    hit_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['video_id', 'model_name'], name='unique_cached_transcription'),
+        ]
+
+    def __str__(self):
+        return f"Transcription of {self.video_id} ({self.model_name})"
+
+
+class TranscriptionCacheMiss(models.Model):
+    """Counts the lookups of a video and model that found no cached transcription."""
+    video_id = models.CharField(max_length=20)
+    model_name = models.CharField(max_length=30)
+    miss_count = models.PositiveIntegerField(default=0)
+
+    last_missed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['video_id', 'model_name'], name='unique_transcription_cache_miss'),
+        ]
+
+    def __str__(self):
+        return f"Cache misses of {self.video_id} ({self.model_name})"
@@ -0,0 +1,175 @@
+import contextlib
+import heapq
+import logging
+import threading
+from datetime import timedelta
+
+from django.core.mail import get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.courses.models import ScheduledCourse
+from apps.courses.tasks import NOTIFICATION_BATCH_SIZE, reminders_for_digest, send_reminder_batch
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_SYNC_INTERVAL = timedelta(seconds=30)
+
+# Only reminders due within this window are kept in memory; later ones are loaded as the window moves
+SCHEDULER_HORIZON = timedelta(hours=6)
+
+# A reminder saved just before a sync may be committed after it, so every sync looks back this far
+SCHEDULER_SYNC_OVERLAP = timedelta(seconds=5)
+
+# Reminders whose email failed are tried again after this delay
+SCHEDULER_RETRY_DELAY = timedelta(minutes=5)
+
+
+class ReminderScheduler:
+    """
+    Sends scheduled course reminders at their notification time from a long-running process.
+
+    Reminders due within the horizon are kept in a min-heap of (notify_at, id) and the scheduler sleeps until
+    the next one is due or the next sync. A sync loads reminders created or rescheduled since the previous one,
+    by their updated_at stamp, and reminders that came within the horizon. Entries of rescheduled reminders are
+    left in the heap and skipped when popped; a due reminder is reloaded before it is sent, so deleted, already
+    sent or moved reminders are not sent.
+
+    clock returns the current time and sleep(seconds) waits; both can be replaced, for example in tests.
+    """
+
+    def __init__(self, clock=timezone.now, sleep=None, sync_interval=SCHEDULER_SYNC_INTERVAL,
+                 horizon=SCHEDULER_HORIZON):
+        self.clock = clock
+        self.sync_interval = sync_interval
+        self.horizon = horizon
+
+        self._stop_event = threading.Event()
+        self.sleep = sleep or self._stop_event.wait
+
+        self._heap = []
+        self._scheduled = {}  # Reminder id -> notification time of its live heap entry
+        self._synced_at = None
+        self._loaded_until = None
+        self.next_sync_at = None
+
+    def stop(self):
+        """Makes run() return after the current step; safe to call from a signal handler."""
+        self._stop_event.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def pending(self):
+        """Returns the (notify_at, id) of the reminders waiting in memory, earliest first."""
+        return sorted((notify_at, pk) for pk, notify_at in self._scheduled.items())
+
+    def sync(self) -> int:
+        """Loads new, rescheduled and newly upcoming reminders into the heap. Returns the number added."""
+        now = self.clock()
+        # updated_at is stamped with the wall clock, so changes are tracked by it rather than by self.clock
+        synced_at = timezone.now()
+        loaded_until = now + self.horizon
+
+        upcoming = ScheduledCourse.objects.filter(
+            notification_sent=False,
+            notify_at__isnull=False,
+            notify_at__lte=loaded_until
+        )
+        if self._synced_at is not None:
+            upcoming = upcoming.filter(
+                Q(updated_at__gte=self._synced_at - SCHEDULER_SYNC_OVERLAP) | Q(notify_at__gt=self._loaded_until)
+            )
+
+        added = 0
+        for notify_at, pk in upcoming.values_list("notify_at", "id"):
+            if self._scheduled.get(pk) != notify_at:
+                self._push(notify_at, pk)
+                added += 1
+
+        self._synced_at = synced_at
+        self._loaded_until = loaded_until
+        self.next_sync_at = now + self.sync_interval
+        return added
+
+    def send_due(self) -> int:
+        """
+        Sends the reminders whose notification time has come. Returns the number sent.
+        A batch that fails is logged and its reminders are tried again after SCHEDULER_RETRY_DELAY.
+        """
+        now = self.clock()
+
+        due_ids = []
+        while self._heap and self._heap[0][0] <= now:
+            notify_at, pk = heapq.heappop(self._heap)
+            if self._scheduled.get(pk) == notify_at:
+                del self._scheduled[pk]
+                due_ids.append(pk)
+
+        if not due_ids:
+            return 0
+
+        sent_ids = set()
+        connection = get_connection(fail_silently=False)
+        try:
+            for start in range(0, len(due_ids), NOTIFICATION_BATCH_SIZE):
+                batch_ids = due_ids[start:start + NOTIFICATION_BATCH_SIZE]
+
+                try:
+                    due_users = ScheduledCourse.objects.filter(
+                        pk__in=batch_ids,
+                        notification_sent=False,
+                        notify_at__lte=now
+                    ).values("user_id")
+                    batch = list(reminders_for_digest(due_users, now))
+                    sent_ids.update(send_reminder_batch(connection, batch))
+
+                except Exception:
+                    # Reloading before sending skips reminders of the batch that were sent before the failure
+                    logger.exception("Sending %s scheduled reminders failed", len(batch_ids))
+                    for pk in batch_ids:
+                        self._push(now + SCHEDULER_RETRY_DELAY, pk)
+                    continue
+
+                # Reminders sent early in a digest are skipped when their own entry comes due
+                for sc in batch:
+                    if sc.id not in sent_ids and sc.notify_at <= now:
+                        self._push(now + SCHEDULER_RETRY_DELAY, sc.id)
+
+        finally:
+            with contextlib.suppress(Exception):
+                connection.close()
+
+        return len(sent_ids)
+
+    def next_wakeup(self):
+        """Returns when the scheduler has to run next: the next due reminder or the next sync."""
+        if self._heap:
+            return min(self._heap[0][0], self.next_sync_at)
+        return self.next_sync_at
+
+    def run(self, until=None):
+        """
+        Syncs and sends reminders until stopped, or until the clock reaches until.
+        A failed sync is logged and tried again after the sync interval, so a database outage does not stop it.
+        """
+        while not self.stopped and (until is None or self.clock() < until):
+            if self.next_sync_at is None or self.clock() >= self.next_sync_at:
+                try:
+                    self.sync()
+                except Exception:
+                    logger.exception("Syncing scheduled reminders failed")
+                    self.next_sync_at = self.clock() + self.sync_interval
+
+            self.send_due()
+
+            wake_at = self.next_wakeup()
+            if until is not None:
+                wake_at = min(wake_at, until)
+
+            self.sleep(max(0.0, (wake_at - self.clock()).total_seconds()))
+
+    def _push(self, notify_at, pk):
+        self._scheduled[pk] = notify_at
+        heapq.heappush(self._heap, (notify_at, pk))
@@ -0,0 +1,339 @@
+import re
+import sqlite3
+from functools import lru_cache
+
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from apps.courses.models import Course, Content
+
+SEARCH_INDEX_TABLE = "courses_search_index"
+SEARCH_RESULT_LIMIT = 200
+
+TRANSCRIPT_INDEX_TABLE = "courses_transcript_index"
+TRANSCRIPT_RESULT_LIMIT = 50
+
+# Column weights for ranking: title, description, sections, body, quizzes, transcripts
+SEARCH_COLUMN_WEIGHTS = (10.0, 5.0, 3.0, 1.0, 1.0, 0.5)
+
+# Control characters mark highlighted terms in snippets so user text can be escaped safely
+_HIGHLIGHT_START = "\x02"
+_HIGHLIGHT_END = "\x03"
+
+_SEARCH_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def create_search_index(using="default", **kwargs):
+    """Creates the full-text search table. Connected to post_migrate, so it is created with the database."""
+    db = connections[using]
+    if not _supports_fts5(db):
+        return
+
+    with db.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_INDEX_TABLE} USING fts5("
+            "title, description, sections, body, quizzes, transcripts, "
+            "tokenize='porter unicode61')"
+        )
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TRANSCRIPT_INDEX_TABLE} USING fts5("
+            "text, course_id UNINDEXED, section_id UNINDEXED, content_id UNINDEXED, "
+            "start_time UNINDEXED, end_time UNINDEXED, "
+            "tokenize='porter unicode61')"
+        )
+
+
+def is_search_index_available() -> bool:
+    return _supports_fts5(connection)
+
+
+def index_course(course):
+    """Replaces the indexed document of a course with its current title, description, sections and content."""
+    if not is_search_index_available():
+        return
+
+    section_titles = []
+    quiz_questions = []
+    for section in course.sections.order_by("order").prefetch_related("quizzes"):
+        section_titles.append(section.title)
+        quiz_questions.extend(quiz.question or "" for quiz in section.quizzes.all())
+
+    text_contents = []
+    transcripts = []
+    for content in Content.objects.filter(section__course=course).only(
+            "content_type", "text_content", "alt_text", "video_transcription"):
+        if content.content_type == Content.TEXT:
+            text_contents.append(content.text_content or "")
+        elif content.content_type == Content.IMAGE:
+            text_contents.append(content.alt_text or "")
+        elif content.content_type == Content.VIDEO:
+            transcripts.extend(segment.get("text", "") for segment in content.video_transcription or [])
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_INDEX_TABLE} WHERE rowid = %s", [course.pk])
+        cursor.execute(
+            f"INSERT INTO {SEARCH_INDEX_TABLE} "
+            "(rowid, title, description, sections, body, quizzes, transcripts) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            [
+                course.pk,
+                course.title,
+                course.description,
+                "\n".join(section_titles),
+                "\n".join(text_contents),
+                "\n".join(quiz_questions),
+                "\n".join(transcripts),
+            ]
+        )
+
+
+def remove_course_from_index(course_id):
+    if not is_search_index_available():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_INDEX_TABLE} WHERE rowid = %s", [course_id])
+        cursor.execute(f"DELETE FROM {TRANSCRIPT_INDEX_TABLE} WHERE course_id = %s", [course_id])
+
+
+def index_video_transcription(content):
+    """Replaces the indexed transcript segments of a video content. The content must have its section loaded."""
+    index_video_transcriptions([content])
+
+
+def index_video_transcriptions(contents):
+    """
+    Replaces the indexed transcript segments of several contents with one delete and one insert.
+    The contents must have their section loaded.
+    """
+    if not contents or not is_search_index_available():
+        return
+
+    rows = [row for content in contents for row in _transcript_rows(content)]
+
+    with connection.cursor() as cursor:
+        _delete_transcripts(cursor, [content.pk for content in contents])
+
+        if not rows:
+            return
+
+        cursor.executemany(
+            f"INSERT INTO {TRANSCRIPT_INDEX_TABLE} "
+            "(text, course_id, section_id, content_id, start_time, end_time) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            rows
+        )
+
+
+def index_course_transcripts(course):
+    index_video_transcriptions(list(
+        Content.objects.filter(section__course=course, content_type=Content.VIDEO).select_related("section")
+    ))
+
+
+def remove_video_transcription(content_id):
+    remove_video_transcriptions([content_id])
+
+
+def remove_video_transcriptions(content_ids):
+    if not content_ids or not is_search_index_available():
+        return
+
+    with connection.cursor() as cursor:
+        _delete_transcripts(cursor, list(content_ids))
+
+
+def rebuild_search_index() -> int:
+    """Drops and recreates the search index from every course. Returns the number of indexed courses."""
+    if not is_search_index_available():
+        return 0
+
+    indexed = 0
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_INDEX_TABLE}")
+            cursor.execute(f"DROP TABLE IF EXISTS {TRANSCRIPT_INDEX_TABLE}")
+        create_search_index(using=connection.alias)
+
+        for course in Course.objects.iterator():
+            index_course(course)
+            index_course_transcripts(course)
+            indexed += 1
+
+    return indexed
+
+
+def search_courses(query, courses=None, after=None, before=None, limit=SEARCH_RESULT_LIMIT):
+    """
+    Returns courses matching the query as a ranked list of {"course_id", "snippet"} dicts.
+    Only the courses of the given queryset are searched. With a course id as `after` or `before`, the results
+    ranked after or before that course are returned, so a search is paged by rank like a keyset.
+    Without a full-text index the title and description are matched instead, in id order and with no snippet.
+    """
+    terms = _SEARCH_TERM_PATTERN.findall(query or "")
+    if not terms:
+        return []
+
+    if courses is None:
+        courses = Course.objects.all()
+
+    if not is_search_index_available():
+        search_filter = Q()
+        for term in terms:
+            search_filter &= Q(title__icontains=term) | Q(description__icontains=term)
+
+        queryset = courses.filter(search_filter)
+        if before is not None:
+            course_ids = list(queryset.filter(id__lt=before).order_by("-id").values_list("id", flat=True)[:limit])
+            course_ids.reverse()
+        else:
+            if after is not None:
+                queryset = queryset.filter(id__gt=after)
+            course_ids = queryset.order_by("id").values_list("id", flat=True)[:limit]
+
+        return [{"course_id": course_id, "snippet": None} for course_id in course_ids]
+
+    match = " ".join(f'"{term}"*' for term in terms)
+    weights = ", ".join(str(weight) for weight in SEARCH_COLUMN_WEIGHTS)
+
+    # bm25 normalizes by the length of the whole course, so title matches are ranked first explicitly
+    rank_columns = (
+        f"instr(highlight({SEARCH_INDEX_TABLE}, 0, %s, %s), %s) = 0 AS title_miss, "
+        f"bm25({SEARCH_INDEX_TABLE}, {weights}) AS score"
+    )
+    rank_params = [_HIGHLIGHT_START, _HIGHLIGHT_END, _HIGHLIGHT_START]
+    courses_sql, courses_params = courses.order_by().values("pk").query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor_key = None
+        cursor_id = before if before is not None else after
+        if cursor_id is not None:
+            cursor.execute(
+                f"SELECT {rank_columns}, rowid FROM {SEARCH_INDEX_TABLE} "
+                f"WHERE {SEARCH_INDEX_TABLE} MATCH %s AND rowid = %s",
+                [*rank_params, match, cursor_id]
+            )
+            cursor_key = cursor.fetchone()
+
+        # Results before a course are read backwards from it and put back in rank order afterwards
+        backwards = cursor_key is not None and before is not None
+        direction = "DESC" if backwards else "ASC"
+        page_filter = ""
+        if cursor_key is not None:
+            page_filter = f"WHERE (title_miss, score, course_id) {'<' if backwards else '>'} (%s, %s, %s)"
+
+        cursor.execute(
+            f"SELECT course_id, snippet FROM ("
+            f"SELECT rowid AS course_id, {rank_columns}, "
+            f"snippet({SEARCH_INDEX_TABLE}, -1, %s, %s, '…', 16) AS snippet "
+            f"FROM {SEARCH_INDEX_TABLE} WHERE {SEARCH_INDEX_TABLE} MATCH %s AND rowid IN ({courses_sql})"
+            f") {page_filter} "
+            f"ORDER BY title_miss {direction}, score {direction}, course_id {direction} LIMIT %s",
+            [*rank_params, _HIGHLIGHT_START, _HIGHLIGHT_END, match, *courses_params, *(cursor_key or []), limit]
+        )
+        rows = cursor.fetchall()
+
+    if backwards:
+        rows.reverse()
+
+    return [{"course_id": course_id, "snippet": _highlight(snippet)} for course_id, snippet in rows]
+
+
+def search_transcripts(query, courses=None, limit=TRANSCRIPT_RESULT_LIMIT):
+    """
+    Returns transcript segments matching the query as a ranked list of
+    {"course_id", "section_id", "content_id", "start", "snippet"} dicts.
+    Only segments of videos that still belong to their indexed section in the courses of the given queryset are
+    returned. Without a full-text index no segments are searched.
+    """
+    terms = _SEARCH_TERM_PATTERN.findall(query or "")
+    if not terms or not is_search_index_available():
+        return []
+
+    if courses is None:
+        courses = Course.objects.all()
+
+    match = " ".join(f'"{term}"*' for term in terms)
+    videos_sql, videos_params = (
+        Content.objects
+        .filter(content_type=Content.VIDEO, section__course__in=courses.order_by().values("pk"))
+        .order_by()
+        .values("pk", "section_id")
+        .query.sql_with_params()
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT course_id, section_id, content_id, start_time, "
+            f"snippet({TRANSCRIPT_INDEX_TABLE}, 0, %s, %s, '…', 16) "
+            f"FROM {TRANSCRIPT_INDEX_TABLE} WHERE {TRANSCRIPT_INDEX_TABLE} MATCH %s "
+            f"AND (content_id, section_id) IN ({videos_sql}) "
+            f"ORDER BY rank LIMIT %s",
+            [_HIGHLIGHT_START, _HIGHLIGHT_END, match, *videos_params, limit]
+        )
+        rows = cursor.fetchall()
+
+    return [
+        {
+            "course_id": course_id,
+            "section_id": section_id,
+            "content_id": content_id,
+            "start": start,
+            "snippet": _highlight(snippet),
+        }
+        for course_id, section_id, content_id, start, snippet in rows
+    ]
+
+
+def _transcript_rows(content):
+    if content.content_type != Content.VIDEO:
+        return []
+
+    return [
+        (
+            segment["text"].strip(),
+            content.section.course_id,
+            content.section_id,
+            content.pk,
+            _segment_time(segment.get("start_time")),
+            _segment_time(segment.get("end_time")),
+        )
+        for segment in content.video_transcription or []
+        if isinstance(segment, dict) and (segment.get("text") or "").strip()
+    ]
+
+
+def _delete_transcripts(cursor, content_ids):
+    placeholders = ", ".join(["%s"] * len(content_ids))
+    cursor.execute(f"DELETE FROM {TRANSCRIPT_INDEX_TABLE} WHERE content_id IN ({placeholders})", content_ids)
+
+
+def _segment_time(value) -> float:
+    try:
+        return round(float(value), 2)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _highlight(snippet):
+    return mark_safe(
+        escape(snippet).replace(_HIGHLIGHT_START, "<mark>").replace(_HIGHLIGHT_END, "</mark>")
+    )
+
+
+def _supports_fts5(db) -> bool:
+    if db.vendor != "sqlite":
+        return False
+    return _sqlite_has_fts5()
+
+
+@lru_cache(maxsize=None)
+def _sqlite_has_fts5() -> bool:
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE fts5_probe USING fts5(value)")
+    except sqlite3.OperationalError:
+        return False
+    return True
@@ -1,27 +1,219 @@
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import get_connection
 from django.utils import timezone
 
-from apps.courses.models import ScheduledCourse
-from apps.users.utils import send_email
+from apps.courses.models import ScheduledCourse, TranscriptionJob
+from apps.courses.transcription import transcribe_video_url
+from apps.users.utils import build_email, send_emails_individually
+
+NOTIFICATION_BATCH_SIZE = 100
+
+# Running jobs older than this are assumed to belong to a worker that died and are queued again
+TRANSCRIPTION_JOB_TIMEOUT = timedelta(hours=1)
 
 
-def send_scheduled_notifications():
+def send_scheduled_notifications(batch_size=NOTIFICATION_BATCH_SIZE) -> int:
+    """
+    Sends the reminders that are due, selecting only due rows through the notify_at index.
+    Users with a due reminder are handled in batches of batch_size. Each batch is loaded in one query with every
+    reminder of those users falling due within the digest window, so a user gets one digest email for them.
+    Emails are sent over one reused mail server connection, and reminders are marked as sent as soon as their
+    email went out. Returns the number of reminders sent.
+    """
     now = timezone.now()
-    upcoming_courses = ScheduledCourse.objects.filter(notification_sent=False)
+    sent = 0
+
+    # The mail server connection is only opened once a reminder is due
+    connection = None
+    try:
+        last_user_id = 0
+        while True:
+            due_users = (
+                ScheduledCourse.objects
+                .filter(notification_sent=False, notify_at__lte=now, user_id__gt=last_user_id)
+                .order_by("user_id")
+                .values("user_id")
+                .distinct()[:batch_size]
+            )
+            batch = list(reminders_for_digest(due_users, now))
+            if not batch:
+                break
+
+            if connection is None:
+                connection = get_connection(fail_silently=False)
+
+            sent += len(send_reminder_batch(connection, batch))
+            last_user_id = batch[-1].user_id
+
+    finally:
+        if connection is not None:
+            connection.close()
+
+    return sent
+
+
+def reminders_for_digest(user_ids, now):
+    """
+    Returns the unsent reminders of the users falling due by the end of the digest window, with their user and
+    course, ordered by user and notification time. user_ids can be a list or a subquery.
+    """
+    return (
+        ScheduledCourse.objects
+        .filter(
+            notification_sent=False,
+            notify_at__lte=now + timedelta(minutes=settings.REMINDER_DIGEST_WINDOW_MINUTES),
+            user_id__in=user_ids
+        )
+        .select_related("user", "course")
+        .order_by("user_id", "notify_at", "id")
+    )
 
-    for sc in upcoming_courses:
-        notify_time = sc.get_notification_time()
 
-        if notify_time <= now:
-            try:
-                send_email(
-                    user=sc.user,
+def send_reminder_batch(connection, batch) -> list:
+    """
+    Sends the reminders of each user in the batch of ScheduledCourses, loaded with their user and course, over
+    the open mail connection: one reminder email for a single reminder, one digest email for several.
+    Returns the ids of the reminders sent. Each email's reminders are marked as sent right after it went out, so
+    a failure later in the batch never sends them again.
+    """
+    reminders = []
+    for user, user_batch in groupby(sorted(batch, key=lambda sc: sc.user_id), key=lambda sc: sc.user):
+        user_batch = list(user_batch)
+        try:
+            if len(user_batch) == 1:
+                email = build_email(
+                    user=user,
                     purpose="scheduled_course_reminder",
                     extra_context={
-                        "course_title": sc.course.title,
-                        "scheduled_time": sc.scheduled_time
+                        "course_title": user_batch[0].course.title,
+                        "scheduled_time": user_batch[0].scheduled_time
                     }
                 )
-                sc.notification_sent = True
-                sc.save(update_fields=["notification_sent"])
-            except Exception as e:
-                print(f"[ERROR] Failed to send email to user {sc.user.id}: {e}")
+            else:
+                email = build_email(
+                    user=user,
+                    purpose="scheduled_course_digest",
+                    extra_context={
+                        "courses": [
+                            {"course_title": sc.course.title, "scheduled_time": sc.scheduled_time}
+                            for sc in sorted(user_batch, key=lambda sc: sc.scheduled_time)
+                        ]
+                    }
+                )
+            reminders.append((user_batch, email))
+        except Exception as e:
+            print(f"[ERROR] Failed to send email to user {user.id}: {e}")
+
+    sent_ids = []
+
+    def record_result(index, error):
+        user_batch = reminders[index][0]
+        if error is not None:
+            print(f"[ERROR] Failed to send email to user {user_batch[0].user_id}: {error}")
+            return
+
+        ids = [sc.id for sc in user_batch]
+        ScheduledCourse.objects.filter(pk__in=ids).update(notification_sent=True)
+        sent_ids.extend(ids)
+
+    send_emails_individually(connection, [email for _, email in reminders], on_result=record_result)
+    return sent_ids
+
+
+def backfill_notify_at() -> int:
+    """
+    Stores notify_at for unsent reminders saved before the column existed, which are otherwise never found due.
+    ScheduledCourse.save sets it for every other reminder, so this only needs to run once. Returns the number of
+    reminders updated.
+    """
+    pending = list(ScheduledCourse.objects.filter(notification_sent=False, notify_at__isnull=True))
+    for sc in pending:
+        sc.notify_at = sc.get_notification_time()
+
+    ScheduledCourse.objects.bulk_update(pending, ["notify_at"], batch_size=NOTIFICATION_BATCH_SIZE)
+    return len(pending)
+
+
+def claim_transcription_job():
+    """
+    Marks the oldest queued transcription job as running and returns it, or None when the queue is empty.
+    A job is claimed with a conditional update, so concurrent workers never run the same job.
+    """
+    while True:
+        job_id = (
+            TranscriptionJob.objects
+            .filter(status=TranscriptionJob.QUEUED)
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+
+        claimed = TranscriptionJob.objects.filter(pk=job_id, status=TranscriptionJob.QUEUED).update(
+            status=TranscriptionJob.RUNNING,
+            started_at=timezone.now()
+        )
+        if claimed:
+            return TranscriptionJob.objects.get(pk=job_id)
+
+
+def run_transcription_job(job):
+    try:
+        # Jobs are only queued after transcribe_video missed the cache
+        job.transcription = transcribe_video_url(
+            job.video_url, on_progress=TranscriptionJobProgress(job), check_cache=False
+        )
+        job.status = TranscriptionJob.DONE
+        job.progress = 100
+    except Exception as e:
+        job.error_message = str(e)
+        job.status = TranscriptionJob.FAILED
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "progress", "transcription", "error_message", "finished_at"])
+
+
+class TranscriptionJobProgress:
+    """Stores the progress of a running job so it can be streamed to the editor. Unchanged progress is not saved."""
+
+    def __init__(self, job):
+        self.job = job
+        self.last_saved = None
+
+    def __call__(self, stage, percent, segments):
+        state = (stage, percent, len(segments) if segments is not None else None)
+        if state == self.last_saved:
+            return
+
+        fields = {"stage": stage, "progress": percent or 0}
+        if segments is not None:
+            fields["transcription"] = segments
+
+        TranscriptionJob.objects.filter(pk=self.job.pk).update(**fields)
+        self.last_saved = state
+
+
+def process_transcription_jobs(limit=None) -> int:
+    """Runs queued transcription jobs until the queue is empty or the limit is reached. Returns the number run."""
+    processed = 0
+
+    while limit is None or processed < limit:
+        job = claim_transcription_job()
+        if job is None:
+            break
+
+        run_transcription_job(job)
+        processed += 1
+
+    return processed
+
+
+def requeue_stale_transcription_jobs() -> int:
+    return TranscriptionJob.objects.filter(
+        status=TranscriptionJob.RUNNING,
+        started_at__lt=timezone.now() - TRANSCRIPTION_JOB_TIMEOUT
+    ).update(status=TranscriptionJob.QUEUED, started_at=None)
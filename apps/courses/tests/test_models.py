@@ -6,7 +6,7 @@ from django.test import TestCase
 from django.utils import timezone
 from django.utils.text import slugify
 
-from apps.courses.models import Course, Section, Content, Quiz, Answer, ScheduledCourse
+from apps.courses.models import Course, Section, Content, Quiz, Answer, ScheduledCourse, CourseProgress
 from apps.users.models import CustomUser
 
 
@@ -29,6 +29,25 @@ class CourseModelTests(TestCase):
     def test_course_slug_is_generated(self):
         self.assertEqual(self.course.slug, slugify("My First Course"))
 
+    def test_course_slug_follows_title_without_reading_the_row(self):
+        course = Course.objects.get(pk=self.course.pk)
+        course.title = "Renamed Course"
+
+        with self.assertNumQueries(1):
+            course.save()
+
+        self.assertEqual(Course.objects.get(pk=course.pk).slug, slugify("Renamed Course"))
+
+        course.description = "Changed description"
+        course.save()
+        self.assertEqual(course.slug, slugify("Renamed Course"))
+
+    def test_course_slug_is_saved_with_title_in_update_fields(self):
+        self.course.title = "Partly Saved Course"
+        self.course.save(update_fields=["title"])
+
+        self.assertEqual(Course.objects.get(pk=self.course.pk).slug, slugify("Partly Saved Course"))
+
     def test_course_str(self):
         self.assertEqual(str(self.course), "My First Course")
 
@@ -75,3 +94,17 @@ class CourseModelTests(TestCase):
         self.assertEqual(str(scheduled), f"{self.user.username} - {self.course.title} at {scheduled.scheduled_time}")
         expected_notify_time = scheduled.scheduled_time - timezone.timedelta(minutes=15)
         self.assertEqual(scheduled.get_notification_time(), expected_notify_time)
+
+    def test_course_progress_percentage(self):
+        progress = CourseProgress.objects.create(user=self.user, course=self.course, answered_count=1, total_quizzes=3)
+        self.assertEqual(progress.percentage, 33)
+        self.assertFalse(progress.is_complete)
+
+        progress.answered_count = 3
+        self.assertEqual(progress.percentage, 100)
+        self.assertTrue(progress.is_complete)
+
+    def test_course_progress_without_quizzes(self):
+        progress = CourseProgress.objects.create(user=self.user, course=self.course)
+        self.assertEqual(progress.percentage, 0)
+        self.assertFalse(progress.is_complete)
@@ -0,0 +1,204 @@
+import os
+import signal
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPConnectError
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.courses.models import Course, ScheduledCourse
+from apps.courses.scheduler import SCHEDULER_RETRY_DELAY, ReminderScheduler
+
+
+class FakeClock:
+    """A clock that only moves when the scheduler sleeps."""
+
+    def __init__(self, now):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += timedelta(seconds=seconds)
+
+
+class ReminderSchedulerTest(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(
+            title="Test Course",
+            description="Test description",
+            difficulty="junior",
+            estimated_completion_time=30
+        )
+        self.user = get_user_model().objects.create_user(
+            username="user", password="password123", email="user@example.com", role="normal"
+        )
+        self.clock = FakeClock(timezone.now())
+        self.scheduler = ReminderScheduler(
+            clock=self.clock,
+            sleep=self.clock.sleep,
+            sync_interval=timedelta(hours=1),
+            horizon=timedelta(hours=2)
+        )
+
+    def schedule(self, notify_in, user=None):
+        # Reminders are sent 15 minutes before the scheduled time by default
+        return ScheduledCourse.objects.create(
+            user=user or self.user,
+            course=self.course,
+            scheduled_time=self.clock.now + notify_in + timedelta(minutes=15)
+        )
+
+    def test_reminder_is_sent_at_its_notification_time(self):
+        sc = self.schedule(timedelta(minutes=10))
+
+        self.scheduler.run(until=self.clock.now + timedelta(minutes=9))
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.scheduler.run(until=self.clock.now + timedelta(minutes=2))
+        self.assertEqual([email.to for email in mail.outbox], [["user@example.com"]])
+
+        sc.refresh_from_db()
+        self.assertTrue(sc.notification_sent)
+        self.assertEqual(self.scheduler.pending(), [])
+
+    def test_scheduler_sleeps_until_the_next_reminder(self):
+        self.schedule(timedelta(minutes=10))
+
+        self.scheduler.run(until=self.clock.now + timedelta(minutes=30))
+
+        self.assertEqual(self.clock.sleeps, [600, 1200])
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_sync_picks_up_new_rescheduled_and_deleted_reminders(self):
+        moved = self.schedule(timedelta(minutes=10))
+        deleted = self.schedule(timedelta(minutes=10), user=get_user_model().objects.create_user(
+            username="other", password="password123", email="other@example.com", role="normal"
+        ))
+        self.scheduler.sync()
+
+        moved.scheduled_time += timedelta(minutes=30)
+        moved.save()
+        deleted_pk = deleted.pk
+        deleted.delete()
+        added = self.schedule(timedelta(minutes=5), user=get_user_model().objects.create_user(
+            username="new", password="password123", email="new@example.com", role="normal"
+        ))
+
+        self.assertEqual(self.scheduler.sync(), 2)
+        self.assertEqual(
+            [pk for _, pk in self.scheduler.pending()],
+            [added.pk, deleted_pk, moved.pk]
+        )
+
+        self.clock.now += timedelta(minutes=15)
+        self.assertEqual(self.scheduler.send_due(), 1)
+        self.assertEqual([email.to for email in mail.outbox], [["new@example.com"]])
+
+        self.clock.now += timedelta(minutes=30)
+        self.assertEqual(self.scheduler.send_due(), 1)
+        self.assertEqual(mail.outbox[-1].to, ["user@example.com"])
+
+    @override_settings(REMINDER_DIGEST_WINDOW_MINUTES=60)
+    def test_due_reminder_is_sent_with_the_users_upcoming_reminders(self):
+        due = self.schedule(timedelta(minutes=5))
+        upcoming = self.schedule(timedelta(minutes=30))
+        self.scheduler.sync()
+
+        self.scheduler.run(until=self.clock.now + timedelta(hours=1))
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Upcoming Scheduled Courses Reminder: 2 courses")
+        self.assertEqual(
+            ScheduledCourse.objects.filter(pk__in=[due.pk, upcoming.pk], notification_sent=True).count(), 2
+        )
+
+    def test_reminders_beyond_the_horizon_are_loaded_as_it_moves(self):
+        self.schedule(timedelta(hours=3))
+
+        self.scheduler.sync()
+        self.assertEqual(self.scheduler.pending(), [])
+
+        self.clock.now += timedelta(hours=1, minutes=30)
+        self.assertEqual(self.scheduler.sync(), 1)
+
+    def test_failed_reminder_is_retried(self):
+        sc = self.schedule(timedelta(minutes=1))
+        self.scheduler.sync()
+        self.clock.now += timedelta(minutes=2)
+
+        with patch("apps.courses.tasks.send_emails_individually", return_value=[RuntimeError("down")]), \
+                patch("builtins.print"):
+            self.assertEqual(self.scheduler.send_due(), 0)
+
+        self.assertEqual([pk for _, pk in self.scheduler.pending()], [sc.pk])
+
+        self.clock.now += timedelta(minutes=10)
+        self.assertEqual(self.scheduler.send_due(), 1)
+
+    def test_reminders_of_a_failed_batch_are_kept_and_retried(self):
+        sc = self.schedule(timedelta(minutes=1))
+        self.scheduler.sync()
+        self.clock.now += timedelta(minutes=2)
+
+        with patch("apps.courses.tasks.send_emails_individually", side_effect=SMTPConnectError(421, b"down")), \
+                self.assertLogs("apps.courses.scheduler", "ERROR"):
+            self.assertEqual(self.scheduler.send_due(), 0)
+
+        self.assertEqual(self.scheduler.pending(), [(self.clock.now + SCHEDULER_RETRY_DELAY, sc.pk)])
+
+        self.clock.now += SCHEDULER_RETRY_DELAY
+        self.assertEqual(self.scheduler.send_due(), 1)
+
+    def test_run_keeps_going_after_a_failed_sync(self):
+        self.schedule(timedelta(minutes=10))
+        sync = self.scheduler.sync
+        failures = [DatabaseError("database is locked")]
+
+        def flaky_sync():
+            if failures:
+                raise failures.pop()
+            return sync()
+
+        self.scheduler.sync = flaky_sync
+        with self.assertLogs("apps.courses.scheduler", "ERROR"):
+            self.scheduler.run(until=self.clock.now + timedelta(hours=2))
+
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_stop_ends_the_run(self):
+        self.schedule(timedelta(minutes=10))
+
+        def sleep(seconds):
+            self.clock.sleep(seconds)
+            self.scheduler.stop()
+
+        self.scheduler.sleep = sleep
+        self.scheduler.run()
+
+        self.assertEqual(self.clock.sleeps, [600])
+        self.assertTrue(self.scheduler.stopped)
+
+    def test_command_stops_gracefully_on_sigterm(self):
+        def run(scheduler, until=None):
+            os.kill(os.getpid(), signal.SIGTERM)
+            self.assertTrue(scheduler.stopped)
+
+        out = StringIO()
+        previous_handler = signal.getsignal(signal.SIGTERM)
+
+        with patch.object(ReminderScheduler, "run", run):
+            call_command("run_scheduler", stdout=out)
+
+        self.assertIn("Stopping the reminder scheduler...", out.getvalue())
+        self.assertIn("Reminder scheduler stopped.", out.getvalue())
+        self.assertEqual(signal.getsignal(signal.SIGTERM), previous_handler)
@@ -0,0 +1,317 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.courses.models import Course, Section, Content, Quiz
+from apps.courses.search import (TRANSCRIPT_INDEX_TABLE, index_course, remove_course_from_index, search_courses,
+                                 index_video_transcription, search_transcripts)
+
+User = get_user_model()
+
+
+class CourseSearchIndexTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(
+            title="Fractions",
+            description="Parts of a whole.",
+            difficulty=Course.JUNIOR,
+            estimated_completion_time=30,
+            status=Course.PUBLISHED
+        )
+        section = Section.objects.create(course=self.course, title="Equivalent Ratios", order=0)
+        Content.objects.create(section=section, content_type=Content.TEXT, text_content="Simplify <b>halves</b>.")
+        Content.objects.create(
+            section=section,
+            content_type=Content.VIDEO,
+            video_url="https://www.youtube.com/embed/abc",
+            video_transcription=[{"text": "Find a common denominator", "start_time": 3.0, "end_time": 6.0}]
+        )
+        Quiz.objects.create(section=section, question="What is half of eight?", correct_answer="4")
+
+    def test_search_matches_every_indexed_field(self):
+        index_course(self.course)
+
+        for query in ["fractions", "whole", "ratio", "halves", "eight", "denominators"]:
+            results = search_courses(query)
+            self.assertEqual([result["course_id"] for result in results], [self.course.id], query)
+
+    def test_search_ranks_title_matches_first(self):
+        other_course = Course.objects.create(
+            title="Decimals",
+            description="Decimals can be written as fractions.",
+            difficulty=Course.JUNIOR,
+            estimated_completion_time=30
+        )
+        index_course(other_course)
+        index_course(self.course)
+
+        # Unrelated courses keep the term rare enough for a meaningful ranking
+        for title in ["Addition", "Subtraction", "Counting"]:
+            index_course(Course.objects.create(
+                title=title, description=title, difficulty=Course.JUNIOR, estimated_completion_time=30
+            ))
+
+        results = search_courses("fractions")
+        self.assertEqual([result["course_id"] for result in results], [self.course.id, other_course.id])
+
+    def test_search_filters_courses_before_the_limit(self):
+        draft = Course.objects.create(
+            title="Fractions Draft", description="Fractions.", difficulty=Course.JUNIOR, estimated_completion_time=30
+        )
+        index_course(draft)
+        index_course(self.course)
+
+        published = Course.objects.filter(status=Course.PUBLISHED)
+        self.assertEqual([result["course_id"] for result in search_courses("fractions", limit=1)], [draft.id])
+        self.assertEqual(
+            [result["course_id"] for result in search_courses("fractions", courses=published, limit=1)],
+            [self.course.id]
+        )
+
+    def test_search_pages_by_rank(self):
+        courses = [self.course] + [
+            Course.objects.create(
+                title=f"Course {index}", description="Fractions.", difficulty=Course.JUNIOR,
+                estimated_completion_time=30
+            )
+            for index in range(3)
+        ]
+        for course in courses:
+            index_course(course)
+
+        ranked_ids = [result["course_id"] for result in search_courses("fractions")]
+        self.assertEqual(ranked_ids[0], self.course.id)
+        self.assertEqual(sorted(ranked_ids), [course.id for course in courses])
+
+        after = [result["course_id"] for result in search_courses("fractions", after=ranked_ids[1], limit=1)]
+        self.assertEqual(after, [ranked_ids[2]])
+
+        before = [result["course_id"] for result in search_courses("fractions", before=ranked_ids[3], limit=2)]
+        self.assertEqual(before, ranked_ids[1:3])
+
+    def test_search_snippet_escapes_content(self):
+        index_course(self.course)
+
+        snippet = search_courses("halves")[0]["snippet"]
+        self.assertIn("<mark>halves</mark>", snippet)
+        self.assertIn("&lt;b&gt;", snippet)
+
+    def test_search_ignores_query_syntax(self):
+        index_course(self.course)
+        self.assertEqual(search_courses('"fractions" -("*'), search_courses("fractions"))
+        self.assertEqual(search_courses("  "), [])
+
+    def test_remove_course_from_index(self):
+        index_course(self.course)
+        remove_course_from_index(self.course.id)
+        self.assertEqual(search_courses("fractions"), [])
+
+    def test_rebuild_search_index_command(self):
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+
+        self.assertIn("Indexed 1 courses.", out.getvalue())
+        self.assertEqual(len(search_courses("denominator")), 1)
+
+
+class TranscriptSearchIndexTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(
+            title="Fractions",
+            description="Parts of a whole.",
+            difficulty=Course.JUNIOR,
+            estimated_completion_time=30,
+            status=Course.PUBLISHED
+        )
+        self.section = Section.objects.create(course=self.course, title="Adding Fractions", order=0)
+        self.video = Content.objects.create(
+            section=self.section,
+            content_type=Content.VIDEO,
+            video_url="https://www.youtube.com/embed/abc",
+            video_transcription=[
+                {"text": "Welcome to the lesson.", "start_time": 0.0, "end_time": 3.0},
+                {"text": "First find the common denominator.", "start_time": 42.5, "end_time": 46.0},
+                {"text": "", "start_time": 46.0, "end_time": 47.0},
+            ]
+        )
+
+    def test_search_returns_segment_location(self):
+        index_video_transcription(self.video)
+
+        hits = search_transcripts("common denominators")
+        self.assertEqual(len(hits), 1)
+        self.assertEqual(
+            {key: hits[0][key] for key in ["course_id", "section_id", "content_id", "start"]},
+            {"course_id": self.course.id, "section_id": self.section.id, "content_id": self.video.id, "start": 42.5}
+        )
+        self.assertIn("<mark>denominator</mark>", hits[0]["snippet"])
+
+    def test_reindexing_replaces_segments(self):
+        index_video_transcription(self.video)
+
+        self.video.video_transcription = [{"text": "Now compare numerators.", "start_time": 5.0, "end_time": 8.0}]
+        index_video_transcription(self.video)
+
+        self.assertEqual(search_transcripts("denominator"), [])
+        self.assertEqual([hit["start"] for hit in search_transcripts("numerators")], [5.0])
+
+    def test_removing_course_removes_segments(self):
+        index_video_transcription(self.video)
+        remove_course_from_index(self.course.id)
+        self.assertEqual(search_transcripts("denominator"), [])
+
+    def test_search_filters_videos_before_the_limit(self):
+        draft = Course.objects.create(
+            title="Draft", description="Draft.", difficulty=Course.JUNIOR, estimated_completion_time=30
+        )
+        draft_video = Content.objects.create(
+            section=Section.objects.create(course=draft, title="Adding", order=0),
+            content_type=Content.VIDEO,
+            video_url="https://www.youtube.com/embed/abc",
+            video_transcription=[{"text": "Common denominator common denominator.", "start_time": 0.0}]
+        )
+        removed_video = Content.objects.create(
+            section=self.section,
+            content_type=Content.VIDEO,
+            video_url="https://www.youtube.com/embed/abc",
+            video_transcription=[{"text": "Common denominator again.", "start_time": 0.0}]
+        )
+        for video in [draft_video, removed_video, self.video]:
+            index_video_transcription(video)
+        Content.objects.filter(pk=removed_video.pk).delete()
+
+        published = Course.objects.filter(status=Course.PUBLISHED)
+        hits = search_transcripts("denominator", courses=published, limit=1)
+        self.assertEqual([hit["content_id"] for hit in hits], [self.video.id])
+
+    def test_rebuild_search_index_command_indexes_segments(self):
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual([hit["content_id"] for hit in search_transcripts("welcome")], [self.video.id])
+
+
+class CourseEditorSearchIndexTests(TestCase):
+    def setUp(self):
+        self.content_manager = User.objects.create_user(
+            email="manager@example.com", password="password", role="content_manager"
+        )
+        self.client.login(email="manager@example.com", password="password")
+
+    def test_saving_course_updates_index(self):
+        self.client.post(reverse('create_course'), {
+            'title': 'Geometry',
+            'description': 'Shapes and angles.',
+            'difficulty': Course.JUNIOR,
+            'estimated_completion_time': 45,
+            'action': 'publish',
+            'section-TOTAL_FORMS': '1',
+            'section-INITIAL_FORMS': '0',
+            'section-0-title': 'Triangles',
+            'section-0-order': '0',
+            'text_content-TOTAL_FORMS': '0',
+            'text_content-INITIAL_FORMS': '0',
+            'image_content-TOTAL_FORMS': '0',
+            'image_content-INITIAL_FORMS': '0',
+            'video_content-TOTAL_FORMS': '0',
+            'video_content-INITIAL_FORMS': '0',
+            'quiz-TOTAL_FORMS': '0',
+            'quiz-INITIAL_FORMS': '0',
+        })
+
+        course = Course.objects.get(title="Geometry")
+        self.assertEqual([result["course_id"] for result in search_courses("triangle")], [course.id])
+
+        self.client.post(reverse('edit_course', kwargs={'slug': course.slug}), {'action': 'delete_course'})
+        self.assertEqual(search_courses("triangle"), [])
+
+    def test_saving_video_updates_transcript_index(self):
+        course = Course.objects.create(
+            title="Geometry", description="Shapes and angles.", difficulty=Course.JUNIOR,
+            estimated_completion_time=45, created_by=self.content_manager
+        )
+        data = {
+            'title': 'Geometry',
+            'description': 'Shapes and angles.',
+            'difficulty': Course.JUNIOR,
+            'estimated_completion_time': 45,
+            'action': 'save_draft',
+            'section-TOTAL_FORMS': '1',
+            'section-INITIAL_FORMS': '0',
+            'section-0-title': 'Triangles',
+            'section-0-order': '0',
+            'text_content-TOTAL_FORMS': '0',
+            'text_content-INITIAL_FORMS': '0',
+            'image_content-TOTAL_FORMS': '0',
+            'image_content-INITIAL_FORMS': '0',
+            'video_content-TOTAL_FORMS': '1',
+            'video_content-INITIAL_FORMS': '0',
+            'video_content-0-content_type': Content.VIDEO,
+            'video_content-0-video_url': 'https://www.youtube.com/embed/abc',
+            'video_content-0-video_transcription': json.dumps(
+                [{"text": "Angles of a triangle add up to 180 degrees.", "start_time": 12.0, "end_time": 15.0}]
+            ),
+            'video_content-0-order': '0',
+            'video_content-0-section_order': '0',
+            'quiz-TOTAL_FORMS': '0',
+            'quiz-INITIAL_FORMS': '0',
+        }
+        self.client.post(reverse('edit_course', kwargs={'slug': course.slug}), data)
+
+        video = Content.objects.get(section__course=course, content_type=Content.VIDEO)
+        self.assertEqual([(hit["content_id"], hit["start"]) for hit in search_transcripts("angles")], [(video.id, 12.0)])
+
+        data.update({
+            'section-INITIAL_FORMS': '1',
+            'section-0-id': video.section_id,
+            'video_content-INITIAL_FORMS': '1',
+            'video_content-0-id': video.id,
+            'video_content-0-DELETE': 'on',
+        })
+        self.client.post(reverse('edit_course', kwargs={'slug': course.slug}), data)
+
+        self.assertFalse(Content.objects.filter(pk=video.pk).exists())
+        self.assertEqual(search_transcripts("angles"), [])
+
+    def test_deleting_section_removes_its_transcripts(self):
+        course = Course.objects.create(
+            title="Geometry", description="Shapes and angles.", difficulty=Course.JUNIOR,
+            estimated_completion_time=45, created_by=self.content_manager
+        )
+        section = Section.objects.create(course=course, title="Triangles", order=0)
+        index_video_transcription(Content.objects.create(
+            section=section,
+            content_type=Content.VIDEO,
+            video_url="https://www.youtube.com/embed/abc",
+            video_transcription=[{"text": "Angles of a triangle.", "start_time": 12.0, "end_time": 15.0}]
+        ))
+
+        self.client.post(reverse('edit_course', kwargs={'slug': course.slug}), {
+            'title': 'Geometry',
+            'description': 'Shapes and angles.',
+            'difficulty': Course.JUNIOR,
+            'estimated_completion_time': 45,
+            'action': 'save_draft',
+            'section-TOTAL_FORMS': '1',
+            'section-INITIAL_FORMS': '1',
+            'section-0-id': section.id,
+            'section-0-title': 'Triangles',
+            'section-0-order': '0',
+            'section-0-DELETE': 'on',
+            'text_content-TOTAL_FORMS': '0',
+            'text_content-INITIAL_FORMS': '0',
+            'image_content-TOTAL_FORMS': '0',
+            'image_content-INITIAL_FORMS': '0',
+            'video_content-TOTAL_FORMS': '0',
+            'video_content-INITIAL_FORMS': '0',
+            'quiz-TOTAL_FORMS': '0',
+            'quiz-INITIAL_FORMS': '0',
+        })
+
+        self.assertFalse(Section.objects.filter(pk=section.pk).exists())
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {TRANSCRIPT_INDEX_TABLE}")
+            self.assertEqual(cursor.fetchone()[0], 0)
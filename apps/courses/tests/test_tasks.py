@@ -1,9 +1,18 @@
+from io import StringIO
+from smtplib import SMTPConnectError, SMTPRecipientsRefused
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.sites.models import Site
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
 from django.utils import timezone
 
-from apps.courses.models import ScheduledCourse, Course
-from apps.courses.tasks import send_scheduled_notifications
+from apps.courses.models import ScheduledCourse, Course, TranscriptionJob
+from apps.courses.tasks import (send_scheduled_notifications, claim_transcription_job, process_transcription_jobs,
+                                requeue_stale_transcription_jobs, TRANSCRIPTION_JOB_TIMEOUT)
 
 
 class SendScheduledNotificationsTest(TestCase):
@@ -34,13 +43,318 @@ class SendScheduledNotificationsTest(TestCase):
         self.assertTrue(self.scheduled_course.notification_sent)
 
     def test_send_scheduled_notifications_skips_future_notifications(self):
+        # Beyond the digest window, so it is not sent along with the due reminder
         future_scheduled_course = ScheduledCourse.objects.create(
             user=self.user,
             course=self.course,
-            scheduled_time=timezone.now() + timezone.timedelta(hours=1),
+            scheduled_time=timezone.now() + timezone.timedelta(hours=3),
             notification_sent=False
         )
 
         send_scheduled_notifications()
         future_scheduled_course.refresh_from_db()
         self.assertFalse(future_scheduled_course.notification_sent)
+
+
+class ScheduledNotificationBatchTest(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(
+            title="Test Course",
+            description="Test description",
+            difficulty="junior",
+            estimated_completion_time=30
+        )
+        self.users = [
+            get_user_model().objects.create_user(
+                username=f'user{index}', password='password123', email=f'user{index}@example.com', role='normal'
+            )
+            for index in range(5)
+        ]
+
+        CountingEmailBackend.opened = 0
+        CountingEmailBackend.refused = set()
+        CountingEmailBackend.max_opens = None
+
+    def schedule(self, user, scheduled_time, **kwargs):
+        return ScheduledCourse.objects.create(user=user, course=self.course, scheduled_time=scheduled_time, **kwargs)
+
+    def test_notify_at_follows_schedule_changes(self):
+        scheduled_time = timezone.now() + timezone.timedelta(days=2)
+        sc = self.schedule(self.users[0], scheduled_time)
+        self.assertEqual(sc.notify_at, scheduled_time - timezone.timedelta(minutes=15))
+
+        sc.notify_before_minutes = 60
+        sc.save(update_fields=["notify_before_minutes"])
+        sc.refresh_from_db()
+        self.assertEqual(sc.notify_at, scheduled_time - timezone.timedelta(minutes=60))
+
+    @override_settings(EMAIL_BACKEND="apps.courses.tests.test_tasks.CountingEmailBackend")
+    def test_only_due_reminders_are_sent_in_batches_over_one_connection(self):
+        due = [self.schedule(user, timezone.now() + timezone.timedelta(minutes=5)) for user in self.users[:3]]
+        later = self.schedule(self.users[3], timezone.now() + timezone.timedelta(days=7))
+
+        # Per batch: select with user and course, mark each email as sent, then the empty query
+        with self.assertNumQueries((1 + 2) + (1 + 1) + 1):
+            send_scheduled_notifications(batch_size=2)
+
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), [sc.user.email for sc in due])
+        self.assertEqual(
+            set(ScheduledCourse.objects.filter(notification_sent=True).values_list("pk", flat=True)),
+            {sc.pk for sc in due}
+        )
+        later.refresh_from_db()
+        self.assertFalse(later.notification_sent)
+
+    @override_settings(EMAIL_BACKEND="apps.courses.tests.test_tasks.CountingEmailBackend")
+    def test_failed_reminder_is_retried_next_run(self):
+        failing = self.schedule(self.users[0], timezone.now())
+        sent = self.schedule(self.users[1], timezone.now())
+        CountingEmailBackend.refused = {self.users[0].email}
+
+        with patch('builtins.print'):
+            send_scheduled_notifications()
+
+        failing.refresh_from_db()
+        sent.refresh_from_db()
+        self.assertFalse(failing.notification_sent)
+        self.assertTrue(sent.notification_sent)
+        self.assertEqual([email.to for email in mail.outbox], [[self.users[1].email]])
+        self.assertEqual(CountingEmailBackend.opened, 2)
+
+    @override_settings(EMAIL_BACKEND="apps.courses.tests.test_tasks.CountingEmailBackend")
+    def test_reminders_sent_before_the_mail_server_drops_stay_sent(self):
+        reminders = [self.schedule(user, timezone.now()) for user in self.users[:3]]
+        CountingEmailBackend.refused = {self.users[1].email}
+        CountingEmailBackend.max_opens = 1
+
+        with patch('builtins.print'):
+            self.assertEqual(send_scheduled_notifications(), 1)
+
+        self.assertEqual(
+            list(ScheduledCourse.objects.filter(notification_sent=True).values_list("pk", flat=True)),
+            [reminders[0].pk]
+        )
+        self.assertEqual([email.to for email in mail.outbox], [[self.users[0].email]])
+
+    @override_settings(EMAIL_BACKEND="apps.courses.tests.test_tasks.CountingEmailBackend")
+    def test_no_connection_is_opened_when_nothing_is_due(self):
+        self.schedule(self.users[0], timezone.now() + timezone.timedelta(days=7))
+
+        self.assertEqual(send_scheduled_notifications(), 0)
+        self.assertEqual(CountingEmailBackend.opened, 0)
+
+    def test_reminders_without_notify_at_are_backfilled_by_command(self):
+        sc = self.schedule(self.users[0], timezone.now())
+        ScheduledCourse.objects.filter(pk=sc.pk).update(notify_at=None)
+        out = StringIO()
+
+        call_command("backfill_notify_at", stdout=out)
+        send_scheduled_notifications()
+
+        sc.refresh_from_db()
+        self.assertIn("Updated 1 reminders.", out.getvalue())
+        self.assertTrue(sc.notification_sent)
+        self.assertEqual(sc.notify_at, sc.get_notification_time())
+
+    @override_settings(
+        EMAIL_BACKEND="apps.courses.tests.test_tasks.CountingEmailBackend",
+        REMINDER_DIGEST_WINDOW_MINUTES=60
+    )
+    def test_reminders_within_the_digest_window_are_sent_as_one_email(self):
+        now = timezone.now()
+        courses = [
+            Course.objects.create(
+                title=f"Course {index}", description="", difficulty="junior", estimated_completion_time=30
+            )
+            for index in range(5)
+        ]
+        digest = [
+            ScheduledCourse.objects.create(
+                user=self.users[0], course=course, scheduled_time=now + timezone.timedelta(minutes=15 + 10 * index)
+            )
+            for index, course in enumerate(courses)
+        ]
+        outside_window = ScheduledCourse.objects.create(
+            user=self.users[0], course=self.course, scheduled_time=now + timezone.timedelta(hours=3)
+        )
+        single = self.schedule(self.users[1], now)
+
+        send_scheduled_notifications()
+
+        self.assertEqual(len(mail.outbox), 2)
+        digest_email = next(email for email in mail.outbox if email.to == [self.users[0].email])
+        self.assertEqual(digest_email.subject, "Upcoming Scheduled Courses Reminder: 5 courses")
+        for course in courses:
+            self.assertIn(course.title, digest_email.body)
+        self.assertLess(digest_email.body.index("Course 0"), digest_email.body.index("Course 4"))
+
+        self.assertEqual(
+            set(ScheduledCourse.objects.filter(notification_sent=True).values_list("pk", flat=True)),
+            {sc.pk for sc in digest} | {single.pk}
+        )
+        outside_window.refresh_from_db()
+        self.assertFalse(outside_window.notification_sent)
+
+    @override_settings(REMINDER_DIGEST_WINDOW_MINUTES=60)
+    def test_digest_batch_is_loaded_in_one_query(self):
+        for user in self.users:
+            self.schedule(user, timezone.now())
+            self.schedule(user, timezone.now() + timezone.timedelta(minutes=30))
+
+        # The emails then find the current site in the cache
+        Site.objects.get_current()
+
+        # One query loading every reminder of the batch of users, marking each digest sent, the empty query
+        with self.assertNumQueries(1 + len(self.users) + 1):
+            send_scheduled_notifications()
+
+        self.assertEqual(len(mail.outbox), len(self.users))
+
+
+class CountingEmailBackend(locmem.EmailBackend):
+    """
+    Counts opened connections and refuses emails to the refused addresses.
+    Once max_opens connections were opened the mail server cannot be reached.
+    """
+    opened = 0
+    refused = set()
+    max_opens = None
+
+    is_open = False
+
+    def open(self):
+        # Like the SMTP backend, opening an open connection does nothing
+        if self.is_open:
+            return False
+        if self.max_opens is not None and CountingEmailBackend.opened >= self.max_opens:
+            raise SMTPConnectError(421, b"Service not available")
+
+        CountingEmailBackend.opened += 1
+        self.is_open = True
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & self.refused:
+                raise SMTPRecipientsRefused({address: (550, b"Refused") for address in message.to})
+        return super().send_messages(messages)
+
+
+class TranscriptionJobTasksTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='manager',
+            password='password123',
+            email='manager@example.com',
+            role='content_manager'
+        )
+
+    def create_job(self, **kwargs):
+        return TranscriptionJob.objects.create(
+            requested_by=self.user, video_url='https://www.youtube.com/watch?v=abcdefghijk', **kwargs
+        )
+
+    def test_claim_takes_oldest_queued_job_once(self):
+        first_job = self.create_job()
+        second_job = self.create_job()
+        self.create_job(status=TranscriptionJob.DONE)
+
+        self.assertEqual(claim_transcription_job(), first_job)
+        self.assertEqual(claim_transcription_job(), second_job)
+        self.assertIsNone(claim_transcription_job())
+
+        first_job.refresh_from_db()
+        self.assertEqual(first_job.status, TranscriptionJob.RUNNING)
+        self.assertIsNotNone(first_job.started_at)
+
+    @patch('apps.courses.tasks.transcribe_video_url')
+    def test_process_stores_result_or_error(self, mock_transcribe):
+        done_job = self.create_job()
+        failed_job = self.create_job()
+        mock_transcribe.side_effect = [[{'text': 'Hello', 'start': 0.0, 'end': 1.0}], RuntimeError('Download failed')]
+
+        self.assertEqual(process_transcription_jobs(), 2)
+
+        done_job.refresh_from_db()
+        failed_job.refresh_from_db()
+        self.assertEqual(done_job.status, TranscriptionJob.DONE)
+        self.assertEqual(done_job.transcription, [{'text': 'Hello', 'start': 0.0, 'end': 1.0}])
+        self.assertEqual((failed_job.status, failed_job.error_message), (TranscriptionJob.FAILED, 'Download failed'))
+        self.assertTrue(done_job.is_finished and failed_job.is_finished)
+        self.assertFalse(mock_transcribe.call_args.kwargs["check_cache"])
+
+    @patch('apps.courses.tasks.transcribe_video_url')
+    def test_job_progress_is_stored_while_running(self, mock_transcribe):
+        job = self.create_job()
+        stored_progress = []
+
+        def transcribe(video_url, on_progress, **kwargs):
+            for report in [("downloading", 40, None), ("downloading", 40, None), ("transcribing", 50, [{"text": "Hi"}])]:
+                on_progress(*report)
+                stored_progress.append(
+                    TranscriptionJob.objects.values_list("stage", "progress", "transcription").get(pk=job.pk)
+                )
+            return [{"text": "Hi"}, {"text": "there"}]
+
+        mock_transcribe.side_effect = transcribe
+        process_transcription_jobs()
+
+        self.assertEqual(stored_progress, [
+            ("downloading", 40, None),
+            ("downloading", 40, None),
+            ("transcribing", 50, [{"text": "Hi"}]),
+        ])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress, len(job.transcription)), (TranscriptionJob.DONE, 100, 2))
+
+    def test_requeue_stale_running_jobs(self):
+        stale_job = self.create_job(
+            status=TranscriptionJob.RUNNING,
+            started_at=timezone.now() - TRANSCRIPTION_JOB_TIMEOUT - timezone.timedelta(minutes=1)
+        )
+        active_job = self.create_job(status=TranscriptionJob.RUNNING, started_at=timezone.now())
+
+        self.assertEqual(requeue_stale_transcription_jobs(), 1)
+
+        stale_job.refresh_from_db()
+        active_job.refresh_from_db()
+        self.assertEqual(stale_job.status, TranscriptionJob.QUEUED)
+        self.assertEqual(active_job.status, TranscriptionJob.RUNNING)
+
+    @patch('apps.courses.tasks.transcribe_video_url', return_value=[])
+    def test_worker_command_runs_queued_jobs_once(self, mock_transcribe):
+        job = self.create_job()
+        out = StringIO()
+
+        call_command('run_transcription_worker', '--once', '--no-warmup', stdout=out)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, TranscriptionJob.DONE)
+        self.assertIn("Processed 1 transcription jobs.", out.getvalue())
+
+    def test_worker_command_keeps_running_after_a_failed_poll(self):
+        class Stop(Exception):
+            pass
+
+        err = StringIO()
+        command = "apps.courses.management.commands.run_transcription_worker"
+        results = [RuntimeError("database is locked"), 0]
+        with patch(f"{command}.process_transcription_jobs", side_effect=results) as process, \
+                patch(f"{command}.time.sleep", side_effect=[None, Stop]), \
+                self.assertLogs(command, "ERROR"):
+            with self.assertRaises(Stop):
+                call_command("run_transcription_worker", "--no-warmup", stdout=StringIO(), stderr=err)
+
+        self.assertEqual(process.call_count, 2)
+        self.assertIn("database is locked", err.getvalue())
+
+    def test_worker_command_once_reports_a_failed_poll(self):
+        with patch("apps.courses.management.commands.run_transcription_worker.requeue_stale_transcription_jobs",
+                   side_effect=RuntimeError("database is locked")), \
+                self.assertLogs("apps.courses.management.commands.run_transcription_worker", "ERROR"):
+            with self.assertRaises(CommandError):
+                call_command("run_transcription_worker", "--once", "--no-warmup", stdout=StringIO())
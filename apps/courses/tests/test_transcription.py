@@ -0,0 +1,245 @@
+from io import StringIO
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.courses.chunked_transcription import (SAMPLE_RATE, find_chunk_boundaries, split_audio, stitch_segments,
+                                                transcribe_chunk)
+from apps.courses.management.commands.benchmark_startup import Command as BenchmarkStartupCommand
+from apps.courses.management.commands.benchmark_transcription import Command as BenchmarkTranscriptionCommand
+from apps.courses.models import CachedTranscription, TranscriptionCacheMiss
+from apps.courses.transcription import (WhisperModelRegistry, is_youtube_url, warmup_whisper_models, whisper_models,
+                                        youtube_video_id, transcribe_video_url, transcription_cache_stats,
+                                        transcribe_audio, get_cached_transcription)
+
+
+@patch('whisper.load_model', side_effect=lambda name: MagicMock(name=name))
+class WhisperModelRegistryTests(SimpleTestCase):
+    def test_model_is_loaded_once(self, mock_load_model):
+        registry = WhisperModelRegistry(max_models=2)
+
+        self.assertIs(registry.get("base"), registry.get("base"))
+        mock_load_model.assert_called_once_with("base")
+
+    def test_least_recently_used_model_is_unloaded(self, mock_load_model):
+        registry = WhisperModelRegistry(max_models=2)
+
+        registry.get("tiny")
+        registry.get("base")
+        registry.get("tiny")
+        registry.get("small")
+
+        self.assertEqual(registry.loaded_models(), ["tiny", "small"])
+
+        registry.get("base")
+        self.assertEqual(mock_load_model.call_count, 4)
+
+    @override_settings(WHISPER_WARMUP_MODELS=["tiny"])
+    def test_warmup_loads_configured_models(self, mock_load_model):
+        self.addCleanup(whisper_models.clear)
+
+        self.assertEqual(warmup_whisper_models(), ["tiny"])
+        self.assertEqual(warmup_whisper_models([]), ["tiny"])
+        mock_load_model.assert_called_once_with("tiny")
+
+
+class YoutubeUrlTests(SimpleTestCase):
+    def test_is_youtube_url(self):
+        self.assertTrue(is_youtube_url("https://www.youtube.com/watch?v=abcdefghijk"))
+        self.assertTrue(is_youtube_url("https://youtu.be/abcdefghijk"))
+        self.assertFalse(is_youtube_url("https://example.com/video"))
+        self.assertFalse(is_youtube_url(None))
+
+    def test_youtube_video_id(self):
+        for url in [
+            "https://www.youtube.com/embed/VScM8Z8Jls0?si=P0Z3UyDb6a4eIVXG",
+            "https://www.youtube.com/watch?v=VScM8Z8Jls0",
+            "https://youtube.com/watch?feature=shared&v=VScM8Z8Jls0",
+            "https://youtu.be/VScM8Z8Jls0?t=42",
+            "https://www.youtube.com/shorts/VScM8Z8Jls0",
+        ]:
+            self.assertEqual(youtube_video_id(url), "VScM8Z8Jls0", url)
+
+        self.assertIsNone(youtube_video_id("https://www.youtube.com/watch?v=short"))
+        self.assertIsNone(youtube_video_id(None))
+
+
+@override_settings(WHISPER_MODEL_NAME="base")
+@patch('whisper.load_audio', return_value=np.zeros(SAMPLE_RATE, dtype=np.float32))
+@patch('apps.courses.transcription.download_audio', return_value="audio.wav")
+@patch('apps.courses.transcription.get_whisper_model')
+class TranscriptionCacheTests(TestCase):
+    def setUp(self):
+        self.segments = {"segments": [{"text": " Hello ", "start": 0.0, "end": 1.234}]}
+
+    def test_video_is_transcribed_once_for_every_url_form(self, mock_get_model, mock_download, mock_load_audio):
+        mock_get_model.return_value.transcribe.return_value = self.segments
+
+        first = transcribe_video_url("https://www.youtube.com/embed/VScM8Z8Jls0?si=abc")
+        second = transcribe_video_url("https://www.youtube.com/watch?v=VScM8Z8Jls0")
+
+        self.assertEqual(first, [{"text": "Hello", "start": 0.0, "end": 1.23}])
+        self.assertEqual(second, first)
+        mock_download.assert_called_once()
+        self.assertEqual(transcription_cache_stats(), {"entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5})
+
+    def test_every_lookup_is_counted(self, mock_get_model, mock_download, mock_load_audio):
+        self.assertIsNone(get_cached_transcription("https://youtu.be/VScM8Z8Jls0"))
+        self.assertIsNone(get_cached_transcription("https://youtu.be/VScM8Z8Jls0"))
+        CachedTranscription.objects.create(video_id="VScM8Z8Jls0", model_name="base", transcription=[])
+        self.assertEqual(get_cached_transcription("https://youtu.be/VScM8Z8Jls0"), [])
+
+        self.assertEqual(TranscriptionCacheMiss.objects.get().miss_count, 2)
+        self.assertEqual(transcription_cache_stats(), {"entries": 1, "hits": 1, "misses": 2, "hit_rate": 1 / 3})
+
+    def test_transcription_without_cache_check_does_not_look_up(self, mock_get_model, mock_download,
+                                                                mock_load_audio):
+        mock_get_model.return_value.transcribe.return_value = self.segments
+        CachedTranscription.objects.create(video_id="VScM8Z8Jls0", model_name="base", transcription=[])
+
+        transcription = transcribe_video_url("https://youtu.be/VScM8Z8Jls0", check_cache=False)
+
+        self.assertEqual(transcription, [{"text": "Hello", "start": 0.0, "end": 1.23}])
+        self.assertEqual(transcription_cache_stats()["hits"] + transcription_cache_stats()["misses"], 0)
+
+    def test_cache_is_kept_per_model(self, mock_get_model, mock_download, mock_load_audio):
+        mock_get_model.return_value.transcribe.return_value = self.segments
+
+        transcribe_video_url("https://youtu.be/VScM8Z8Jls0")
+        transcribe_video_url("https://youtu.be/VScM8Z8Jls0", model_name="small")
+
+        self.assertEqual(mock_download.call_count, 2)
+        self.assertEqual(
+            sorted(CachedTranscription.objects.values_list("model_name", flat=True)), ["base", "small"]
+        )
+
+    def test_failed_transcription_is_not_cached(self, mock_get_model, mock_download, mock_load_audio):
+        mock_get_model.return_value.transcribe.side_effect = RuntimeError("Out of memory")
+
+        with self.assertRaises(RuntimeError):
+            transcribe_video_url("https://youtu.be/VScM8Z8Jls0")
+
+        self.assertFalse(CachedTranscription.objects.exists())
+
+    def test_stats_command(self, mock_get_model, mock_download, mock_load_audio):
+        CachedTranscription.objects.create(video_id="VScM8Z8Jls0", model_name="base", transcription=[], hit_count=3)
+        TranscriptionCacheMiss.objects.create(video_id="VScM8Z8Jls0", model_name="base", miss_count=1)
+        out = StringIO()
+
+        call_command("transcription_cache_stats", stdout=out)
+
+        self.assertIn("Hits: 3", out.getvalue())
+        self.assertIn("Hit rate: 75.0%", out.getvalue())
+
+
+class ChunkedTranscriptionTests(SimpleTestCase):
+    def make_audio(self, seconds, silences=()):
+        audio = np.full(int(seconds * SAMPLE_RATE), 0.5, dtype=np.float32)
+        for silence in silences:
+            audio[int(silence * SAMPLE_RATE):int((silence + 0.5) * SAMPLE_RATE)] = 0.0
+        return audio
+
+    def test_audio_is_cut_at_silences(self):
+        audio = self.make_audio(250, silences=[92, 185])
+
+        boundaries = [boundary / SAMPLE_RATE for boundary in find_chunk_boundaries(audio, chunk_seconds=100)]
+
+        self.assertEqual(len(boundaries), 4)
+        self.assertTrue(92 <= boundaries[1] < 92.5)
+        self.assertTrue(185 <= boundaries[2] < 185.5)
+        self.assertEqual(boundaries[3], 250)
+
+    def test_short_audio_is_one_chunk(self):
+        chunks = split_audio(self.make_audio(30), chunk_seconds=100, overlap_seconds=2)
+        self.assertEqual([chunk[1:] for chunk in chunks], [(0.0, 0.0, 30.0)])
+
+    def test_chunks_overlap_their_neighbours(self):
+        audio = self.make_audio(250, silences=[92, 185])
+
+        chunks = split_audio(audio, chunk_seconds=100, overlap_seconds=2)
+
+        self.assertEqual(len(chunks), 3)
+        chunk_audio, offset, own_start, own_end = chunks[1]
+        self.assertAlmostEqual(offset, own_start - 2)
+        self.assertAlmostEqual(len(chunk_audio) / SAMPLE_RATE, own_end - own_start + 4)
+
+    def test_chunk_keeps_owned_segments_at_absolute_times(self):
+        model = MagicMock()
+        model.transcribe.return_value = {"segments": [
+            {"text": "overlap before", "start": 0.0, "end": 1.5},
+            {"text": " owned ", "start": 3.0, "end": 8.0},
+            {"text": "overlap after", "start": 11.0, "end": 13.0},
+        ]}
+
+        segments = transcribe_chunk(model, (None, 100.0, 102.0, 110.0))
+
+        self.assertEqual(segments, [{"text": "owned", "start": 103.0, "end": 108.0}])
+
+    def test_stitch_orders_and_drops_repeats(self):
+        stitched = stitch_segments([
+            [{"text": "three", "start": 20.0, "end": 25.0}],
+            [{"text": "one", "start": 0.0, "end": 5.0}, {"text": "two", "start": 5.0, "end": 10.0}],
+            [{"text": "two", "start": 9.0, "end": 11.0}, {"text": "", "start": 11.0, "end": 12.0}],
+        ])
+
+        self.assertEqual([(segment["text"], segment["end"]) for segment in stitched],
+                         [("one", 5.0), ("two", 11.0), ("three", 25.0)])
+
+    @override_settings(TRANSCRIPTION_CHUNK_SECONDS=60, TRANSCRIPTION_CHUNK_OVERLAP_SECONDS=1)
+    @patch('apps.courses.chunked_transcription.transcribe_audio_in_chunks', return_value=[])
+    @patch('apps.courses.transcription.get_whisper_model')
+    def test_long_audio_is_transcribed_in_chunks(self, mock_get_model, mock_chunks):
+        mock_get_model.return_value.transcribe.return_value = {"segments": []}
+
+        transcribe_audio(self.make_audio(30), "base", workers=4)
+        mock_chunks.assert_not_called()
+
+        audio = self.make_audio(90)
+        transcribe_audio(audio, "base", workers=4)
+        self.assertEqual(mock_chunks.call_args.args, (audio, "base"))
+        self.assertEqual(mock_chunks.call_args.kwargs["workers"], 4)
+        self.assertIsNone(mock_chunks.call_args.kwargs["model"])
+
+        # A single worker transcribes the chunks in this process, so their progress can still be reported
+        transcribe_audio(audio, "base", workers=1)
+        self.assertEqual(mock_chunks.call_args.kwargs["model"], mock_get_model.return_value)
+
+    @override_settings(TRANSCRIPTION_CHUNK_SECONDS=60, TRANSCRIPTION_CHUNK_OVERLAP_SECONDS=1)
+    @patch('apps.courses.transcription.get_whisper_model')
+    def test_progress_reports_segments_of_finished_chunks(self, mock_get_model):
+        mock_get_model.return_value.transcribe.side_effect = [
+            {"segments": [{"text": "first", "start": 10.0, "end": 12.0}]},
+            {"segments": [{"text": "second", "start": 20.0, "end": 22.0}]},
+        ]
+        reports = []
+
+        segments = transcribe_audio(
+            self.make_audio(100, silences=[55]), "base", workers=1,
+            on_progress=lambda stage, percent, segments: reports.append((stage, percent, segments))
+        )
+
+        self.assertEqual([segment["text"] for segment in segments], ["first", "second"])
+        self.assertEqual([(stage, percent) for stage, percent, _ in reports],
+                         [("loading_model", None), ("transcribing", 0), ("transcribing", 50), ("transcribing", 100)])
+        self.assertEqual([segment["text"] for segment in reports[2][2]], ["first"])
+
+    @patch('apps.courses.management.commands.benchmark_transcription.get_pool')
+    @patch('apps.courses.management.commands.benchmark_transcription.get_whisper_model')
+    def test_benchmark_with_one_worker_transcribes_in_this_process(self, mock_get_model, mock_get_pool):
+        mock_get_model.return_value.transcribe.return_value = {"segments": []}
+        out = StringIO()
+
+        with patch.object(BenchmarkTranscriptionCommand, "load_audio", return_value=self.make_audio(100)):
+            call_command("benchmark_transcription", "audio.wav", workers=1, chunk_seconds=60, stdout=out)
+
+        mock_get_pool.assert_not_called()
+        self.assertEqual(mock_get_model.return_value.transcribe.call_count, 3)
+        self.assertIn("Parallel (1 workers, 60s chunks)", out.getvalue())
+
+
+class StartupImportTests(SimpleTestCase):
+    def test_web_startup_does_not_import_transcription_stack(self):
+        startup = BenchmarkStartupCommand().measure([])
+        self.assertEqual(startup["heavy_modules"], [])
@@ -1,23 +1,29 @@
 import json
+import os
+import shutil
+import tempfile
 from datetime import timedelta
+from io import BytesIO
 
+from PIL import Image
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.timezone import now
 
-from apps.courses.forms import TextContentFormSet, ImageContentFormSet, VideoContentFormSet, QuizFormSet, SectionFormSet
-from apps.courses.models import Course, Section, Quiz, Content, ScheduledCourse
+from apps.courses.forms import TextContentFormSet
+from apps.courses.models import (Course, Section, Quiz, Content, ScheduledCourse, Answer, CourseProgress,
+                                 TranscriptionJob, CachedTranscription)
 from apps.courses.views import (
-    _save_content_and_quiz_formset,
+    _save_content_and_quiz_formsets,
     _clean_for_json,
     _form_has_non_empty_fields,
-    _serialize_section_formset,
-    _serialize_text_content_formset,
-    _serialize_image_content_formset,
-    _serialize_video_content_formset,
-    _serialize_quiz_formset,
+    _serialize_course_for_editor,
 )
+from apps.courses.utils import sync_course_progress
 
 User = get_user_model()
 
@@ -94,6 +100,114 @@ class NormalUserViewTests(TestCase):
             "reload": False
         })
 
+    def test_submit_quiz_answer_tracks_course_progress(self):
+        second_quiz = Quiz.objects.create(question="What is 3 + 3?", correct_answer="6", section=self.section, order=1)
+
+        response = self.client.post(reverse('submit_quiz_answer'), data={
+            'quiz_id': self.quiz.id,
+            'answer': '4'
+        }, content_type='application/json')
+        self.assertFalse(response.json()["reload"])
+
+        progress = CourseProgress.objects.get(user=self.user, course=self.course)
+        self.assertEqual((progress.answered_count, progress.total_quizzes), (1, 2))
+        self.assertIsNone(progress.completed_at)
+
+        # Answering the same quiz again does not advance progress
+        self.client.post(reverse('submit_quiz_answer'), data={
+            'quiz_id': self.quiz.id,
+            'answer': '4'
+        }, content_type='application/json')
+        progress.refresh_from_db()
+        self.assertEqual(progress.answered_count, 1)
+
+        response = self.client.post(reverse('submit_quiz_answer'), data={
+            'quiz_id': second_quiz.id,
+            'answer': '6'
+        }, content_type='application/json')
+        self.assertTrue(response.json()["reload"])
+
+        progress.refresh_from_db()
+        self.assertIsNotNone(progress.completed_at)
+        self.assertTrue(self.user.completed_courses.filter(id=self.course.id).exists())
+
+    def test_submit_quiz_answer_counts_answers_from_before_progress_tracking(self):
+        second_quiz = Quiz.objects.create(question="What is 3 + 3?", correct_answer="6", section=self.section, order=1)
+        Answer.objects.create(user=self.user, quiz=second_quiz)
+
+        response = self.client.post(reverse('submit_quiz_answer'), data={
+            'quiz_id': self.quiz.id,
+            'answer': '4'
+        }, content_type='application/json')
+
+        self.assertTrue(response.json()["reload"])
+        progress = CourseProgress.objects.get(user=self.user, course=self.course)
+        self.assertEqual((progress.answered_count, progress.total_quizzes), (2, 2))
+
+    def test_submit_quiz_answers_grades_batch(self):
+        second_quiz = Quiz.objects.create(question="What is 3 + 3?", correct_answer="6", section=self.section, order=1)
+
+        response = self.client.post(reverse('submit_quiz_answers'), data={
+            'answers': [
+                {'quiz_id': self.quiz.id, 'answer': '4'},
+                {'quiz_id': second_quiz.id, 'answer': '7'},
+                {'quiz_id': 999999, 'answer': '1'},
+            ]
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertJSONEqual(response.content.decode('utf-8'), {
+            "success": True,
+            "reload": False,
+            "results": [
+                {
+                    "success": True,
+                    "is_correct": True,
+                    "message": "Correct!",
+                    "quiz_id": self.quiz.id,
+                    "correct_answer": "4",
+                    "reload": False
+                },
+                {
+                    "success": True,
+                    "is_correct": False,
+                    "message": "Incorrect answer.",
+                    "quiz_id": second_quiz.id,
+                    "reload": False
+                },
+                {"success": False, "message": "Invalid quiz.", "quiz_id": 999999},
+            ]
+        })
+        self.assertTrue(Answer.objects.filter(user=self.user, quiz=self.quiz).exists())
+        self.assertFalse(Answer.objects.filter(user=self.user, quiz=second_quiz).exists())
+
+    def test_submit_quiz_answers_completes_course_once(self):
+        second_quiz = Quiz.objects.create(question="What is 3 + 3?", correct_answer="6", section=self.section, order=1)
+        ScheduledCourse.objects.create(user=self.user, course=self.course, scheduled_time=now() + timedelta(hours=1))
+
+        response = self.client.post(reverse('submit_quiz_answers'), data={
+            'answers': [
+                {'quiz_id': self.quiz.id, 'answer': '4'},
+                {'quiz_id': second_quiz.id, 'answer': ' 6 '},
+                {'quiz_id': second_quiz.id, 'answer': '6'},
+            ]
+        }, content_type='application/json')
+
+        data = response.json()
+        self.assertTrue(data["reload"])
+        self.assertTrue(all(result["reload"] for result in data["results"]))
+        self.assertEqual(Answer.objects.filter(user=self.user).count(), 2)
+        self.assertTrue(self.user.completed_courses.filter(id=self.course.id).exists())
+        self.assertFalse(ScheduledCourse.objects.filter(user=self.user, course=self.course).exists())
+
+        progress = CourseProgress.objects.get(user=self.user, course=self.course)
+        self.assertEqual(progress.answered_count, 2)
+
+    def test_submit_quiz_answers_rejects_missing_answers(self):
+        response = self.client.post(reverse('submit_quiz_answers'), data={'answers': []},
+                                    content_type='application/json')
+        self.assertJSONEqual(response.content.decode('utf-8'), {"success": False, "message": "Missing answers."})
+
     def test_toggle_save_course(self):
         response = self.client.get(reverse('toggle_save_course', kwargs={'course_id': self.course.id}))
         self.assertEqual(response.status_code, 302)
@@ -117,7 +231,8 @@ class NormalUserViewTests(TestCase):
         ScheduledCourse.objects.create(
             user=self.user,
             course=self.course,
-            scheduled_time=scheduled_time - timedelta(days=1)
+            scheduled_time=scheduled_time - timedelta(days=1),
+            notification_sent=True
         )
         new_scheduled_time = now() + timedelta(hours=2)
         response = self.client.post(reverse('schedule_course', kwargs={'course_id': self.course.id}), data={
@@ -131,6 +246,8 @@ class NormalUserViewTests(TestCase):
         new_scheduled_time_truncated = new_scheduled_time.replace(second=0, microsecond=0)
         self.assertEqual(updated_scheduled_time_truncated, new_scheduled_time_truncated,
                          f"Expected {updated_scheduled_time_truncated} to be equal to {new_scheduled_time_truncated}")
+        self.assertEqual(updated_schedule.notify_at, updated_schedule.get_notification_time())
+        self.assertFalse(updated_schedule.notification_sent)
 
     def test_unschedule_course(self):
         scheduled_time = now() + timedelta(hours=1)
@@ -147,6 +264,89 @@ class NormalUserViewTests(TestCase):
         self.assertFalse(ScheduledCourse.objects.filter(id=scheduled_course.id).exists())
 
 
+class CourseViewQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            password='password123',
+            email='testuser@example.com',
+            role='normal',
+            is_verified=True
+        )
+        self.client.login(email='testuser@example.com', password='password123')
+
+    def _create_course(self, title, section_count, quizzes_per_section):
+        course = Course.objects.create(
+            title=title,
+            description="Test description",
+            difficulty=Course.JUNIOR,
+            estimated_completion_time=30,
+            status=Course.PUBLISHED
+        )
+
+        for section_order in range(section_count):
+            section = Section.objects.create(course=course, title=f"Section {section_order}", order=section_order)
+            Content.objects.create(section=section, content_type=Content.TEXT, text_content="Text", order=0)
+            Content.objects.create(
+                section=section,
+                content_type=Content.VIDEO,
+                video_url="https://www.youtube.com/embed/abc",
+                video_transcription=[{"start_time": 0, "end_time": 1, "text": "Hello"}],
+                order=1
+            )
+
+            for quiz_order in range(quizzes_per_section):
+                quiz = Quiz.objects.create(section=section, question="1 + 1?", correct_answer="2", order=quiz_order)
+                if quiz_order % 2 == 0:
+                    Answer.objects.create(user=self.user, quiz=quiz)
+
+        return course
+
+    def _count_course_view_queries(self, course):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('course', kwargs={'slug': course.slug}))
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_course_view_query_count_is_independent_of_course_size(self):
+        small_course = self._create_course("Small Course", section_count=1, quizzes_per_section=1)
+        large_course = self._create_course("Large Course", section_count=20, quizzes_per_section=5)
+
+        self.assertEqual(
+            self._count_course_view_queries(small_course),
+            self._count_course_view_queries(large_course)
+        )
+
+    def test_course_view_shows_answers_only_for_answered_quizzes(self):
+        course = self._create_course("Answered Course", section_count=1, quizzes_per_section=2)
+        response = self.client.get(reverse('course', kwargs={'slug': course.slug}))
+
+        quizzes = response.context["sections"][0]["quizzes"]
+        self.assertEqual([quiz["show_answer"] for quiz in quizzes], [True, False])
+        self.assertEqual([quiz["placeholder"] for quiz in quizzes], ["2", "_"])
+        self.assertEqual(len(response.context["video_transcriptions"]), 1)
+
+    def test_course_view_reuses_compiled_tree_from_cache(self):
+        course = self._create_course("Cached Course", section_count=3, quizzes_per_section=2)
+
+        first_count = self._count_course_view_queries(course)
+        second_count = self._count_course_view_queries(course)
+
+        self.assertLess(second_count, first_count)
+
+    def test_course_view_reflects_changes_after_version_bump(self):
+        course = self._create_course("Versioned Course", section_count=1, quizzes_per_section=1)
+        self.client.get(reverse('course', kwargs={'slug': course.slug}))
+
+        Section.objects.create(course=course, title="Late Section", order=1)
+        response = self.client.get(reverse('course', kwargs={'slug': course.slug}))
+        self.assertNotContains(response, "Late Section")
+
+        course.bump_version()
+        response = self.client.get(reverse('course', kwargs={'slug': course.slug}))
+        self.assertContains(response, "Late Section")
+
+
 class ContentManagerViewsTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -206,6 +406,109 @@ class ContentManagerViewsTest(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(self.course.status, Course.PUBLISHED)
 
+    def test_publish_course_post_bumps_version(self):
+        original_version = self.course.version
+        url = reverse('edit_course', kwargs={'slug': self.course.slug})
+        self.client.post(url, {
+            'title': 'Sample Course',
+            'description': 'Sample description.',
+            'difficulty': Course.JUNIOR,
+            'estimated_completion_time': 45,
+            'action': 'publish',
+            'section-TOTAL_FORMS': '0',
+            'section-INITIAL_FORMS': '0',
+            'text_content-TOTAL_FORMS': '0',
+            'text_content-INITIAL_FORMS': '0',
+            'image_content-TOTAL_FORMS': '0',
+            'image_content-INITIAL_FORMS': '0',
+            'video_content-TOTAL_FORMS': '0',
+            'video_content-INITIAL_FORMS': '0',
+            'quiz-TOTAL_FORMS': '0',
+            'quiz-INITIAL_FORMS': '0',
+        })
+
+        self.course.refresh_from_db()
+        self.assertNotEqual(self.course.version, original_version)
+
+    def test_saving_quizzes_syncs_course_progress(self):
+        learner = User.objects.create_user(email="learner@example.com", password="password", role="normal")
+        section = Section.objects.create(course=self.course, title="Section 1", order=0)
+        answered_quiz = Quiz.objects.create(section=section, question="1 + 1?", correct_answer="2", order=0)
+        removed_quiz = Quiz.objects.create(section=section, question="2 + 2?", correct_answer="4", order=1)
+        Answer.objects.create(user=learner, quiz=answered_quiz)
+        Answer.objects.create(user=learner, quiz=removed_quiz)
+        progress = CourseProgress.objects.create(
+            user=learner, course=self.course, answered_count=2, total_quizzes=2, completed_at=now()
+        )
+
+        url = reverse('edit_course', kwargs={'slug': self.course.slug})
+        self.client.post(url, {
+            'title': 'Sample Course',
+            'description': 'Sample description.',
+            'difficulty': Course.JUNIOR,
+            'estimated_completion_time': 45,
+            'action': 'save_draft',
+            'section-TOTAL_FORMS': '1',
+            'section-INITIAL_FORMS': '1',
+            'section-0-id': section.id,
+            'section-0-title': 'Section 1',
+            'section-0-order': '0',
+            'text_content-TOTAL_FORMS': '0',
+            'text_content-INITIAL_FORMS': '0',
+            'image_content-TOTAL_FORMS': '0',
+            'image_content-INITIAL_FORMS': '0',
+            'video_content-TOTAL_FORMS': '0',
+            'video_content-INITIAL_FORMS': '0',
+            'quiz-TOTAL_FORMS': '3',
+            'quiz-INITIAL_FORMS': '2',
+            'quiz-0-id': answered_quiz.id,
+            'quiz-0-question': '1 + 1?',
+            'quiz-0-correct_answer': '2',
+            'quiz-0-order': '0',
+            'quiz-0-section_order': '0',
+            'quiz-1-id': removed_quiz.id,
+            'quiz-1-question': '2 + 2?',
+            'quiz-1-correct_answer': '4',
+            'quiz-1-order': '1',
+            'quiz-1-section_order': '0',
+            'quiz-1-DELETE': 'on',
+            'quiz-2-question': '3 + 3?',
+            'quiz-2-correct_answer': '6',
+            'quiz-2-order': '1',
+            'quiz-2-section_order': '0',
+        })
+
+        progress.refresh_from_db()
+        self.assertEqual((progress.answered_count, progress.total_quizzes), (1, 2))
+        self.assertIsNone(progress.completed_at)
+
+    def test_sync_course_progress_completes_courses_without_unanswered_quizzes(self):
+        learners = [
+            User.objects.create_user(email=f"learner{index}@example.com", password="password", role="normal")
+            for index in range(2)
+        ]
+        section = Section.objects.create(course=self.course, title="Section 1", order=0)
+        answered_quiz = Quiz.objects.create(section=section, question="1 + 1?", correct_answer="2", order=0)
+        Quiz.objects.create(section=section, question="2 + 2?", correct_answer="4", order=1)
+        completed_at = now() - timedelta(days=1)
+        for learner in learners:
+            Answer.objects.create(user=learner, quiz=answered_quiz)
+        CourseProgress.objects.create(user=learners[0], course=self.course, answered_count=1, total_quizzes=2)
+        CourseProgress.objects.create(
+            user=learners[1], course=self.course, answered_count=1, total_quizzes=1, completed_at=completed_at
+        )
+
+        Quiz.objects.filter(order=1).delete()
+        sync_course_progress(self.course)
+
+        progress = {
+            record.user_id: record for record in CourseProgress.objects.filter(course=self.course)
+        }
+        self.assertEqual((progress[learners[0].pk].answered_count, progress[learners[0].pk].total_quizzes), (1, 1))
+        self.assertIsNotNone(progress[learners[0].pk].completed_at)
+        self.assertEqual(progress[learners[1].pk].completed_at, completed_at)
+        self.assertEqual(set(self.course.completed_by.all()), {learners[0]})
+
     def test_delete_course_post(self):
         url = reverse('edit_course', kwargs={'slug': self.course.slug})
         response = self.client.post(url, {
@@ -221,18 +524,282 @@ class ContentManagerViewsTest(TestCase):
         self.assertJSONEqual(response.content, {'status': 'error', 'message': 'Missing video URL'})
 
     def test_transcribe_video_invalid_url(self):
-        self.client.login(username='content_manager_user', password='password123')
         url = reverse('transcribe_video')
         response = self.client.post(url, {'video_url': 'invalid_url'})
-        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.status_code, 400)
 
         data = json.loads(response.content)
         self.assertEqual(data['status'], 'error')
         self.assertIn('message', data)
+        self.assertFalse(TranscriptionJob.objects.exists())
+
+    def test_transcribe_video_queues_job(self):
+        url = reverse('transcribe_video')
+        response = self.client.post(url, {'video_url': 'https://www.youtube.com/watch?v=abcdefghijk'})
+        self.assertEqual(response.status_code, 202)
+
+        job = TranscriptionJob.objects.get()
+        self.assertEqual((job.requested_by, job.status), (self.content_manager, TranscriptionJob.QUEUED))
+        self.assertJSONEqual(response.content, {
+            'status': 'queued',
+            'job_id': job.id,
+            'status_url': reverse('transcription_job_status', kwargs={'job_id': job.id}),
+            'events_url': reverse('transcription_job_events', kwargs={'job_id': job.id}),
+        })
+
+    def test_transcribe_video_returns_cached_transcription(self):
+        CachedTranscription.objects.create(
+            video_id='abcdefghijk', model_name='base', transcription=[{'text': 'Hello', 'start': 0.0, 'end': 1.5}]
+        )
+
+        response = self.client.post(reverse('transcribe_video'), {'video_url': 'https://youtu.be/abcdefghijk'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'done')
+        self.assertEqual(response.json()['transcription'], [{'text': 'Hello', 'start': 0.0, 'end': 1.5}])
+        self.assertFalse(TranscriptionJob.objects.exists())
+
+    def test_transcription_job_status(self):
+        job = TranscriptionJob.objects.create(
+            requested_by=self.content_manager,
+            video_url='https://www.youtube.com/watch?v=abcdefghijk',
+            status=TranscriptionJob.DONE,
+            transcription=[{'text': 'Hello', 'start': 0.0, 'end': 1.5}],
+        )
+        url = reverse('transcription_job_status', kwargs={'job_id': job.id})
+
+        response = self.client.get(url)
+        self.assertEqual(response.json()['status'], 'done')
+        self.assertEqual(response.json()['transcription'], job.transcription)
+
+        TranscriptionJob.objects.filter(pk=job.pk).update(status=TranscriptionJob.FAILED, error_message='Not found')
+        response = self.client.get(url)
+        self.assertEqual(response.json()['message'], 'Not found')
+        self.assertNotIn('transcription', response.json())
+
+    async def test_transcription_job_events_stream_progress_and_segments(self):
+        job = await TranscriptionJob.objects.acreate(
+            requested_by=self.content_manager,
+            video_url='https://www.youtube.com/watch?v=abcdefghijk',
+            status=TranscriptionJob.DONE,
+            stage='transcribing',
+            progress=100,
+            transcription=[{'text': 'Hello', 'start': 0.0, 'end': 1.5}],
+        )
+        await self.async_client.aforce_login(self.content_manager)
+
+        response = await self.async_client.get(reverse('transcription_job_events', kwargs={'job_id': job.id}))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        events = [
+            (event.split("\n")[0].removeprefix("event: "), json.loads(event.split("\n")[1].removeprefix("data: ")))
+            for event in body.strip().split("\n\n")
+        ]
+        self.assertEqual(events, [
+            ("progress", {"status": "done", "stage": "transcribing", "progress": 100}),
+            ("segments", {"offset": 0, "segments": [{'text': 'Hello', 'start': 0.0, 'end': 1.5}]}),
+            ("done", {"segment_count": 1}),
+        ])
+
+    async def test_transcription_job_events_of_other_user(self):
+        other_manager = await User.objects.acreate(username="other", email="other@example.com", role="content_manager")
+        job = await TranscriptionJob.objects.acreate(
+            requested_by=other_manager, video_url='https://www.youtube.com/watch?v=abcdefghijk'
+        )
+        await self.async_client.aforce_login(self.content_manager)
+
+        response = await self.async_client.get(reverse('transcription_job_events', kwargs={'job_id': job.id}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_transcription_job_status_of_other_user(self):
+        other_manager = User.objects.create_user(
+            username="other", email="other@example.com", password="password", role="content_manager"
+        )
+        job = TranscriptionJob.objects.create(
+            requested_by=other_manager, video_url='https://www.youtube.com/watch?v=abcdefghijk'
+        )
+
+        response = self.client.get(reverse('transcription_job_status', kwargs={'job_id': job.id}))
+        self.assertEqual(response.status_code, 404)
+
+
+class CourseEditorSaveTests(TestCase):
+    def setUp(self):
+        self.content_manager = User.objects.create_user(
+            email="manager@example.com", password="password", role="content_manager"
+        )
+        self.client.login(email="manager@example.com", password="password")
+
+    def _create_course(self, title, section_count):
+        course = Course.objects.create(
+            title=title,
+            description="Test description",
+            difficulty=Course.JUNIOR,
+            estimated_completion_time=30,
+            created_by=self.content_manager,
+        )
+
+        for order in range(section_count):
+            section = Section.objects.create(course=course, title=f"Section {order}", order=order)
+            Content.objects.create(section=section, content_type=Content.TEXT, text_content="Text", order=0)
+            Content.objects.create(
+                section=section, content_type=Content.VIDEO, video_url="https://youtu.be/abcdefghijk", order=1
+            )
+            Quiz.objects.create(section=section, question="1 + 1?", correct_answer="2", order=0)
+
+        return course
+
+    def _editor_data(self, course):
+        """Edits every row of the course: renames sections, rewrites texts and quizzes, deletes videos and adds one
+        section with a text, a video and a quiz."""
+        data = {
+            'title': course.title,
+            'description': course.description,
+            'difficulty': course.difficulty,
+            'estimated_completion_time': course.estimated_completion_time,
+            'action': 'save_draft',
+            'image_content-TOTAL_FORMS': '0',
+            'image_content-INITIAL_FORMS': '0',
+        }
+        forms = {"section": [], "text_content": [], "video_content": [], "quiz": []}
+
+        sections = list(course.sections.order_by("order"))
+        for section in sections:
+            forms["section"].append({'id': section.id, 'title': f"{section.title} edited", 'order': section.order})
+
+            for content in section.contents.order_by("order"):
+                if content.content_type == Content.TEXT:
+                    forms["text_content"].append({
+                        'id': content.id, 'content_type': Content.TEXT, 'text_content': "Edited",
+                        'order': 0, 'section_order': section.order,
+                    })
+                else:
+                    forms["video_content"].append({
+                        'id': content.id, 'content_type': Content.VIDEO, 'video_url': content.video_url,
+                        'order': 1, 'section_order': section.order, 'DELETE': 'on',
+                    })
+
+            for quiz in section.quizzes.all():
+                forms["quiz"].append({
+                    'id': quiz.id, 'question': "2 + 2?", 'correct_answer': "4", 'order': 0,
+                    'section_order': section.order,
+                })
+
+        new_order = len(sections)
+        forms["section"].append({'title': "New section", 'order': new_order})
+        forms["text_content"].append({
+            'content_type': Content.TEXT, 'text_content': "New text", 'order': 0, 'section_order': new_order,
+        })
+        forms["video_content"].append({
+            'content_type': Content.VIDEO, 'video_url': "https://youtu.be/abcdefghijk",
+            'video_transcription': json.dumps([{"start_time": 0, "end_time": 1, "text": "Hello"}]),
+            'order': 1, 'section_order': new_order,
+        })
+        forms["quiz"].append({'question': "3 + 3?", 'correct_answer': "6", 'order': 0, 'section_order': new_order})
+
+        for prefix, prefix_forms in forms.items():
+            data[f"{prefix}-TOTAL_FORMS"] = str(len(prefix_forms))
+            data[f"{prefix}-INITIAL_FORMS"] = str(sum('id' in form for form in prefix_forms))
+
+            for index, form in enumerate(prefix_forms):
+                data.update({f"{prefix}-{index}-{name}": value for name, value in form.items()})
+
+        return data
+
+    def _count_save_queries(self, course):
+        data = self._editor_data(course)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse('edit_course', kwargs={'slug': course.slug}), data)
+        self.assertEqual(response.status_code, 302)
+        return len(context.captured_queries)
+
+    def test_save_query_count_is_independent_of_course_size(self):
+        small_course = self._create_course("Small Course", section_count=1)
+        large_course = self._create_course("Large Course", section_count=15)
+
+        self.assertEqual(self._count_save_queries(small_course), self._count_save_queries(large_course))
+
+    def test_save_applies_updates_inserts_and_deletes(self):
+        course = self._create_course("Edited Course", section_count=2)
+        self._count_save_queries(course)
+
+        self.assertEqual(
+            list(course.sections.order_by("order").values_list("title", flat=True)),
+            ["Section 0 edited", "Section 1 edited", "New section"]
+        )
+        self.assertEqual(
+            sorted(Content.objects.filter(section__course=course).values_list("content_type", "text_content")),
+            [(Content.TEXT, "Edited"), (Content.TEXT, "Edited"), (Content.TEXT, "New text"), (Content.VIDEO, None)]
+        )
+        self.assertEqual(
+            sorted(Quiz.objects.filter(section__course=course).values_list("question", flat=True)),
+            ["2 + 2?", "2 + 2?", "3 + 3?"]
+        )
+
+        new_video = Content.objects.get(section__course=course, content_type=Content.VIDEO)
+        self.assertEqual(new_video.section.title, "New section")
+        self.assertEqual(new_video.video_transcription, [{"start_time": 0, "end_time": 1, "text": "Hello"}])
+
+    def test_save_stores_a_new_image_of_existing_content(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        course = self._create_course("Image Course", section_count=1)
+        data = self._editor_data(course)
+        image_content = Content.objects.create(
+            section=course.sections.get(), content_type=Content.IMAGE, image=_png_upload("old.png"), alt_text="Old",
+            order=2
+        )
+        data.update({
+            'image_content-TOTAL_FORMS': '1',
+            'image_content-INITIAL_FORMS': '1',
+            'image_content-0-id': image_content.id,
+            'image_content-0-content_type': Content.IMAGE,
+            'image_content-0-image': _png_upload("new.png"),
+            'image_content-0-alt_text': "Old",
+            'image_content-0-order': '2',
+            'image_content-0-section_order': '0',
+        })
+
+        self.client.post(reverse('edit_course', kwargs={'slug': course.slug}), data)
+
+        image_content.refresh_from_db()
+        self.assertEqual(os.path.basename(image_content.image.name), "new.png")
+        self.assertTrue(image_content.image.storage.exists(image_content.image.name))
+
+    def test_save_ignores_rows_of_other_courses(self):
+        course = self._create_course("Edited Course", section_count=1)
+        other_quiz = Quiz.objects.get(section__course=self._create_course("Other Course", section_count=1))
+
+        data = self._editor_data(course)
+        data.update({
+            'quiz-TOTAL_FORMS': '2',
+            'quiz-INITIAL_FORMS': '2',
+            'quiz-1-id': other_quiz.id,
+            'quiz-1-question': "Hijacked?",
+            'quiz-1-correct_answer': "Yes",
+            'quiz-1-order': '0',
+            'quiz-1-section_order': '0',
+        })
+        self.client.post(reverse('edit_course', kwargs={'slug': course.slug}), data)
+
+        other_quiz.refresh_from_db()
+        self.assertEqual(other_quiz.question, "1 + 1?")
+
+
+def _png_upload(name):
+    image = BytesIO()
+    Image.new('RGB', (10, 10)).save(image, 'PNG')
+    return SimpleUploadedFile(name, image.getvalue(), content_type="image/png")
 
 
 class SaveContentAndQuizFormsetTests(TestCase):
-    def test_save_content_and_quiz_formset_creates_new_instance(self):
+    def test_save_content_and_quiz_formsets_creates_new_instance(self):
         course = Course.objects.create(
             title="Dummy Course",
             description="This is a dummy course for testing purposes.",
@@ -253,7 +820,7 @@ class SaveContentAndQuizFormsetTests(TestCase):
         }
         formset = TextContentFormSet(data=formset_data, prefix="text-content")
         if formset.is_valid():
-            _save_content_and_quiz_formset(formset, section_lookup, content_type="text")
+            _save_content_and_quiz_formsets(Content, course, section_lookup, [(formset, "text")])
         self.assertTrue(Content.objects.filter(text_content="Sample Text", section=section).exists())
 
     def test_clean_for_json_filters_allowed_fields(self):
@@ -275,71 +842,71 @@ class SaveContentAndQuizFormsetTests(TestCase):
         form = TextContentFormSet(data={'name': '', 'age': ''})
         self.assertFalse(_form_has_non_empty_fields(form, ['name', 'age']))
 
-    def test_serialize_section_formset_returns_expected_data(self):
+    def test_serialize_course_for_editor_returns_expected_data(self):
         course = Course.objects.create(
             title="Dummy Course",
             description="This is a dummy course for testing purposes.",
             difficulty=Course.JUNIOR,
             estimated_completion_time=45
         )
-        section = Section.objects.create(course=course, title="Test Section", order=1)
-        formset = SectionFormSet(instance=course, queryset=Section.objects.filter(course=course))
-        serialized = _serialize_section_formset(formset)
-        self.assertEqual(serialized, [{
-            "id": section.id,
-            "title": "Test Section",
+        second_section = Section.objects.create(course=course, title="Second Section", order=2)
+        first_section = Section.objects.create(course=course, title="First Section", order=1)
+        text = Content.objects.create(section=second_section, content_type=Content.TEXT, text_content="Sample", order=1)
+        image = Content.objects.create(section=first_section, content_type=Content.IMAGE, order=1, image=None)
+        video = Content.objects.create(
+            section=first_section, content_type=Content.VIDEO, video_url="http://example.com", order=2
+        )
+        later_quiz = Quiz.objects.create(section=second_section, question="What is 3+3?", correct_answer="6", order=1)
+        earlier_quiz = Quiz.objects.create(section=first_section, question="What is 2+2?", correct_answer="4", order=1)
+
+        sections, text_contents, image_contents, video_contents, quizzes = _serialize_course_for_editor(course)
+
+        self.assertEqual(sections, [
+            {"id": second_section.id, "title": "Second Section", "order": 2},
+            {"id": first_section.id, "title": "First Section", "order": 1},
+        ])
+        self.assertEqual(text_contents, [{
+            "id": text.id,
+            "content_type": Content.TEXT,
+            "text_content": "Sample",
             "order": 1,
+            "section_order": 2,
         }])
-
-    def test_serialize_text_content_formset_handles_text_content(self):
-        course = Course.objects.create(
-            title="Dummy Course",
-            description="This is a dummy course for testing purposes.",
-            difficulty=Course.JUNIOR,
-            estimated_completion_time=45
-        )
-        section = Section.objects.create(course=course, title="Text Section", order=1)
-        Content.objects.create(section=section, content_type=Content.TEXT, text_content="Sample", order=1)
-        formset = TextContentFormSet(instance=section, queryset=Content.objects.filter(section=section))
-        serialized = _serialize_text_content_formset(formset)
-        self.assertEqual(serialized[0]['text_content'], "Sample")
-
-    def test_serialize_image_content_formset_handles_image_content(self):
-        course = Course.objects.create(
-            title="Dummy Course",
-            description="This is a dummy course for testing purposes.",
-            difficulty=Course.JUNIOR,
-            estimated_completion_time=45
-        )
-        section = Section.objects.create(course=course, title="Image Section", order=2)
-        Content.objects.create(section=section, content_type=Content.IMAGE, order=1, image=None)
-        formset = ImageContentFormSet(instance=section, queryset=Content.objects.filter(section=section))
-        serialized = _serialize_image_content_formset(formset)
-        self.assertIsNone(serialized[0]['image'])
-
-    def test_serialize_video_content_formset_handles_video_content(self):
-        course = Course.objects.create(
-            title="Dummy Course",
-            description="This is a dummy course for testing purposes.",
-            difficulty=Course.JUNIOR,
-            estimated_completion_time=45
-        )
-        section = Section.objects.create(course=course, title="Video Section", order=3)
-        Content.objects.create(section=section, content_type=Content.VIDEO, video_url="http://example.com", order=1)
-        formset = VideoContentFormSet(instance=section, queryset=Content.objects.filter(section=section))
-        serialized = _serialize_video_content_formset(formset)
-        self.assertEqual(serialized[0]['video_url'], "http://example.com")
-
-    def test_serialize_quiz_formset_handles_quiz_content(self):
-        course = Course.objects.create(
-            title="Dummy Course",
-            description="This is a dummy course for testing purposes.",
-            difficulty=Course.JUNIOR,
-            estimated_completion_time=45
-        )
-        section = Section.objects.create(course=course, title="Quiz Section", order=4)
-        Quiz.objects.create(section=section, question="What is 2+2?", correct_answer="4", order=1)
-        formset = QuizFormSet(instance=section, queryset=Quiz.objects.filter(section=section))
-        serialized = _serialize_quiz_formset(formset)
-        self.assertEqual(serialized[0]['question'], "What is 2+2?")
-        self.assertEqual(serialized[0]['correct_answer'], "4")
+        self.assertEqual(image_contents, [{
+            "id": image.id,
+            "content_type": Content.IMAGE,
+            "image": None,
+            "alt_text": None,
+            "order": 1,
+            "section_order": 1,
+        }])
+        self.assertEqual(video_contents, [{
+            "id": video.id,
+            "content_type": Content.VIDEO,
+            "video_url": "http://example.com",
+            "video_transcription": [],
+            "order": 2,
+            "section_order": 1,
+        }])
+        self.assertEqual([quiz["id"] for quiz in quizzes], [earlier_quiz.id, later_quiz.id])
+        self.assertEqual(quizzes[0]["correct_answer"], "4")
+        self.assertEqual(quizzes[1]["section_order"], 2)
+
+    def test_serialize_course_for_editor_query_count_is_independent_of_course_size(self):
+        def create_course(title, section_count):
+            course = Course.objects.create(
+                title=title, description="Description", difficulty=Course.JUNIOR, estimated_completion_time=45
+            )
+            for order in range(section_count):
+                section = Section.objects.create(course=course, title=f"Section {order}", order=order)
+                Content.objects.create(section=section, content_type=Content.TEXT, text_content="Text", order=0)
+                Quiz.objects.create(section=section, question="1 + 1?", correct_answer="2", order=0)
+            return course
+
+        small_course = create_course("Small Course", section_count=1)
+        large_course = create_course("Large Course", section_count=10)
+
+        with self.assertNumQueries(3):
+            _serialize_course_for_editor(small_course)
+        with self.assertNumQueries(3):
+            _serialize_course_for_editor(large_course)
@@ -0,0 +1,278 @@
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.courses.models import CachedTranscription, TranscriptionCacheMiss
+
+# whisper (with torch and numba), numpy and yt_dlp are imported by the functions that run a transcription,
+# so web processes and management commands that never transcribe do not load them
+
+YOUTUBE_URL_PATTERN = re.compile(r'^(https?\:\/\/)?(www\.)?(youtube\.com|youtu\.be)\/.+$')
+
+# Stages reported to the progress callback of a transcription
+DOWNLOADING = "downloading"
+EXTRACTING_AUDIO = "extracting_audio"
+LOADING_MODEL = "loading_model"
+TRANSCRIBING = "transcribing"
+
+# Matches the 11 character video id of watch, embed, shorts, live and short link URLs
+YOUTUBE_VIDEO_ID_PATTERN = re.compile(
+    r'(?:youtube\.com/(?:watch\?(?:[^#]*&)?v=|embed/|shorts/|live/|v/)|youtu\.be/)([\w-]{11})(?![\w-])'
+)
+
+
+class _QuietLogger:
+    """Keeps yt-dlp from writing progress and errors to the console; failures are raised instead."""
+
+    def debug(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg):
+        pass
+
+
+class WhisperModelRegistry:
+    """
+    Keeps loaded Whisper models for reuse within the process.
+    At most max_models are kept; loading another unloads the least recently used one.
+    """
+
+    def __init__(self, max_models=1):
+        self.max_models = max_models
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            model = self._models.get(name)
+
+            if model is None:
+                import whisper
+
+                model = whisper.load_model(name)
+                self._models[name] = model
+
+                while len(self._models) > max(1, self.max_models):
+                    self._models.popitem(last=False)
+
+            self._models.move_to_end(name)
+            return model
+
+    def loaded_models(self):
+        with self._lock:
+            return list(self._models)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
+whisper_models = WhisperModelRegistry(max_models=settings.WHISPER_MAX_LOADED_MODELS)
+
+
+def get_whisper_model(name=None):
+    return whisper_models.get(name or settings.WHISPER_MODEL_NAME)
+
+
+def warmup_whisper_models(names=None):
+    """Loads the given models, or the configured warmup models, so the first transcription does not wait for them."""
+    names = settings.WHISPER_WARMUP_MODELS if names is None else names
+
+    for name in names:
+        get_whisper_model(name)
+
+    return whisper_models.loaded_models()
+
+
+def is_youtube_url(video_url) -> bool:
+    return bool(video_url and YOUTUBE_URL_PATTERN.match(video_url))
+
+
+def youtube_video_id(video_url):
+    """Returns the id of a YouTube video URL, so every URL form of one video maps to the same id."""
+    match = YOUTUBE_VIDEO_ID_PATTERN.search(video_url or "")
+    return match.group(1) if match else None
+
+
+def transcribe_video_url(video_url, model_name=None, on_progress=None, check_cache=True):
+    """
+    Downloads the audio of a YouTube video and transcribes it with Whisper.
+    Returns a list of {"text", "start", "end"} segments, times in seconds.
+    Transcriptions are cached by video id and model, so a video is only transcribed once per model.
+    Callers that already missed the cache pass check_cache=False, so the lookup is not made and counted twice.
+
+    on_progress is called as on_progress(stage, percent, segments) while the video is processed,
+    with the segments transcribed so far once transcription has started.
+    """
+    model_name = model_name or settings.WHISPER_MODEL_NAME
+
+    if check_cache:
+        transcription = get_cached_transcription(video_url, model_name)
+        if transcription is not None:
+            return transcription
+
+    import whisper
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        audio = whisper.load_audio(download_audio(video_url, temp_dir, on_progress))
+
+    transcription = transcribe_audio(audio, model_name, on_progress=on_progress)
+
+    cache_transcription(video_url, transcription, model_name)
+    return transcription
+
+
+def transcribe_audio(audio, model_name=None, workers=None, on_progress=None):
+    """
+    Transcribes 16 kHz mono audio. Audio longer than one chunk is transcribed chunk by chunk, in parallel
+    when more than one worker is configured, and the segments of each chunk are reported as it finishes.
+    """
+    from apps.courses.chunked_transcription import SAMPLE_RATE, format_segment, transcribe_audio_in_chunks
+
+    model_name = model_name or settings.WHISPER_MODEL_NAME
+    workers = workers or settings.TRANSCRIPTION_WORKERS
+    on_progress = on_progress or _ignore_progress
+
+    on_progress(LOADING_MODEL, None, None)
+    model = get_whisper_model(model_name) if workers == 1 else None
+
+    if len(audio) > settings.TRANSCRIPTION_CHUNK_SECONDS * SAMPLE_RATE:
+        on_progress(TRANSCRIBING, 0, [])
+        return transcribe_audio_in_chunks(
+            audio,
+            model_name,
+            chunk_seconds=settings.TRANSCRIPTION_CHUNK_SECONDS,
+            overlap_seconds=settings.TRANSCRIPTION_CHUNK_OVERLAP_SECONDS,
+            workers=workers,
+            model=model,
+            on_chunk=lambda done, total, segments: on_progress(TRANSCRIBING, done * 100 // total, segments),
+        )
+
+    model = model or get_whisper_model(model_name)
+    on_progress(TRANSCRIBING, 0, [])
+    segments = [format_segment(segment) for segment in model.transcribe(audio).get("segments", [])]
+    on_progress(TRANSCRIBING, 100, segments)
+
+    return segments
+
+
+def get_cached_transcription(video_url, model_name=None):
+    """
+    Returns the cached transcription of a video, or None when it is not cached. Each lookup is counted as a hit
+    on the cached entry or as a miss of the video and model.
+    """
+    video_id = youtube_video_id(video_url)
+    if video_id is None:
+        return None
+
+    model_name = model_name or settings.WHISPER_MODEL_NAME
+
+    entry = CachedTranscription.objects.filter(video_id=video_id, model_name=model_name).first()
+    if entry is None:
+        _count_cache_miss(video_id, model_name)
+        return None
+
+    CachedTranscription.objects.filter(pk=entry.pk).update(
+        hit_count=F("hit_count") + 1,
+        last_used_at=timezone.now()
+    )
+    return entry.transcription
+
+
+def cache_transcription(video_url, transcription, model_name=None):
+    video_id = youtube_video_id(video_url)
+    if video_id is None:
+        return
+
+    CachedTranscription.objects.update_or_create(
+        video_id=video_id,
+        model_name=model_name or settings.WHISPER_MODEL_NAME,
+        defaults={"transcription": transcription}
+    )
+
+
+def transcription_cache_stats():
+    """Returns the number of cached transcriptions with the cache hits and misses so far."""
+    stats = CachedTranscription.objects.aggregate(
+        entries=Count("pk"),
+        hits=Coalesce(Sum("hit_count"), 0)
+    )
+    stats["misses"] = TranscriptionCacheMiss.objects.aggregate(misses=Coalesce(Sum("miss_count"), 0))["misses"]
+
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+
+    return stats
+
+
+def download_audio(video_url, directory, on_progress=None):
+    """Downloads the audio track of a video into the directory as a wav file and returns its path."""
+    import yt_dlp
+
+    on_progress = on_progress or _ignore_progress
+
+    def report_download(status):
+        if status.get("status") != "downloading":
+            return
+
+        total = status.get("total_bytes") or status.get("total_bytes_estimate")
+        percent = int(status.get("downloaded_bytes", 0) * 100 / total) if total else None
+        on_progress(DOWNLOADING, percent, None)
+
+    def report_postprocessing(status):
+        if status.get("status") == "started":
+            on_progress(EXTRACTING_AUDIO, None, None)
+
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'outtmpl': os.path.join(directory, 'audio.%(ext)s'),
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'wav',
+            'preferredquality': '192',
+        }],
+        'progress_hooks': [report_download],
+        'postprocessor_hooks': [report_postprocessing],
+        'quiet': True,
+        'no_warnings': True,
+        'logger': _QuietLogger(),
+    }
+
+    on_progress(DOWNLOADING, 0, None)
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        ydl.download([video_url])
+
+    for file in os.listdir(directory):
+        if file.endswith(".wav"):
+            return os.path.join(directory, file)
+
+    raise FileNotFoundError("Audio file not found after download.")
+
+
+def _ignore_progress(stage, percent, segments):
+    pass
+
+
+def _count_cache_miss(video_id, model_name):
+    """Adds a miss to the counter of a video and model, creating the counter on its first miss."""
+    misses = TranscriptionCacheMiss.objects.filter(video_id=video_id, model_name=model_name)
+    if misses.update(miss_count=F("miss_count") + 1, last_missed_at=timezone.now()):
+        return
+
+    try:
+        with transaction.atomic():
+            TranscriptionCacheMiss.objects.create(video_id=video_id, model_name=model_name, miss_count=1)
+    except IntegrityError:
+        misses.update(miss_count=F("miss_count") + 1, last_missed_at=timezone.now())
@@ -7,9 +7,12 @@ urlpatterns = [
     path('create-course/', views.create_or_edit_course, name='create_course'),
     path('edit-course/<slug:slug>/', views.create_or_edit_course, name='edit_course'),
     path('transcribe-video/', views.transcribe_video, name='transcribe_video'),
+    path('transcription-jobs/<int:job_id>/', views.transcription_job_status, name='transcription_job_status'),
+    path('transcription-jobs/<int:job_id>/events/', views.transcription_job_events, name='transcription_job_events'),
 
     # --- Normal Users ---
     path('submit-quiz-answer/', views.submit_quiz_answer, name='submit_quiz_answer'),
+    path('submit-quiz-answers/', views.submit_quiz_answers, name='submit_quiz_answers'),
     path('toggle-save-course/<int:course_id>/', views.toggle_save_course, name='toggle_save_course'),
     path('schedule-course/<int:course_id>/', views.schedule_course, name='schedule_course'),
     path('<slug:slug>/', views.course, name='course'),
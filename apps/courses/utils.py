@@ -0,0 +1,259 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, F, OuterRef, Prefetch, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils.timezone import now
+
+from apps.courses.models import Section, Content, Quiz, Answer, CourseProgress, ScheduledCourse
+
+# Characters kept visible in the placeholder of an unanswered quiz
+PLACEHOLDER_VISIBLE_CHARACTERS = {" ", "/", ",", ".", "\"", "'", ":"}
+
+
+def course_tree_cache_key(course) -> str:
+    return f"course_tree:{course.pk}:{course.version}"
+
+
+def compile_course_tree(course):
+    """
+    Builds the user-independent render tree of a course in a fixed number of queries.
+    Quizzes keep both their correct answer and masked placeholder so a user overlay can pick one.
+    """
+    sections_qs = (
+        Section.objects
+        .filter(course=course)
+        .order_by("order")
+        .prefetch_related(
+            Prefetch("contents", queryset=Content.objects.order_by("order")),
+            Prefetch("quizzes", queryset=Quiz.objects.order_by("order")),
+        )
+    )
+
+    sections = []
+    video_transcriptions = {}
+
+    for section in sections_qs:
+        contents = []
+
+        for content in section.contents.all():
+            serialized_content = _serialize_content(content)
+            if serialized_content is None:
+                continue
+
+            contents.append(serialized_content)
+
+            if content.content_type == Content.VIDEO and content.video_transcription:
+                video_transcriptions[content.id] = content.video_transcription
+
+        quizzes = [
+            {
+                "id": quiz.id,
+                "question": quiz.question,
+                "correct_answer": quiz.correct_answer,
+                "masked_answer": quiz_placeholder(quiz.correct_answer),
+                "order": quiz.order,
+            }
+            for quiz in section.quizzes.all()
+        ]
+
+        sections.append({
+            "id": section.id,
+            "title": section.title,
+            "order": section.order,
+            "contents": contents,
+            "quizzes": quizzes,
+        })
+
+    return {"sections": sections, "video_transcriptions": video_transcriptions}
+
+
+def get_compiled_course_tree(course):
+    """Returns the compiled render tree of a course, compiling and caching it under the course version."""
+    key = course_tree_cache_key(course)
+    tree = cache.get(key)
+
+    if tree is None:
+        tree = compile_course_tree(course)
+        cache.set(key, tree, settings.COURSE_TREE_CACHE_TIMEOUT)
+
+    return tree
+
+
+def load_course_tree(course, user=None):
+    """
+    Returns the serialized sections and a mapping of video content id to transcription for a course.
+    The cached compiled tree is overlaid with the user's answered quizzes, loaded in one query.
+    """
+    tree = get_compiled_course_tree(course)
+
+    answered_quiz_ids = set()
+    if user is not None and user.is_authenticated:
+        answered_quiz_ids = set(
+            Answer.objects.filter(user=user, quiz__section__course=course).values_list("quiz_id", flat=True)
+        )
+
+    sections = []
+    for section in tree["sections"]:
+        quizzes = [_overlay_quiz(quiz, quiz["id"] in answered_quiz_ids) for quiz in section["quizzes"]]
+        sections.append({
+            **section,
+            "quizzes": quizzes,
+            "unanswered_quiz_count": sum(not quiz["show_answer"] for quiz in quizzes),
+        })
+
+    return sections, tree["video_transcriptions"]
+
+
+def get_course_progress(user, course):
+    """
+    Returns the user's progress record for a course.
+    The record is created on first use from the course's quizzes and the user's existing answers.
+    """
+    progress, _ = CourseProgress.objects.get_or_create(
+        user=user,
+        course=course,
+        defaults={
+            "total_quizzes": Quiz.objects.filter(section__course=course).count(),
+            "answered_count": Answer.objects.filter(user=user, quiz__section__course=course).count(),
+        }
+    )
+    return progress
+
+
+def record_correct_answers(user, quizzes):
+    """
+    Stores correct answers in bulk and advances the user's progress once per course.
+    Returns the ids of the courses completed by these answers. Completed courses are marked as
+    completed and the user's upcoming schedules for them are removed.
+    Quizzes must have their section and course loaded.
+    """
+    quizzes = list({quiz.id: quiz for quiz in quizzes}.values())
+    courses = {quiz.section.course_id: quiz.section.course for quiz in quizzes}
+
+    with transaction.atomic():
+        progress_ids = [get_course_progress(user, course).pk for course in courses.values()]
+
+        answered_quiz_ids = set(
+            Answer.objects.filter(user=user, quiz__in=quizzes).values_list("quiz_id", flat=True)
+        )
+        new_answers = [Answer(user=user, quiz=quiz) for quiz in quizzes if quiz.id not in answered_quiz_ids]
+        Answer.objects.bulk_create(new_answers, ignore_conflicts=True)
+
+        new_answer_counts = Counter(answer.quiz.section.course_id for answer in new_answers)
+        for course_id, count in new_answer_counts.items():
+            CourseProgress.objects.filter(user=user, course_id=course_id).update(
+                answered_count=F("answered_count") + count
+            )
+
+        completed_course_ids = list(
+            CourseProgress.objects.filter(
+                pk__in=progress_ids,
+                completed_at__isnull=True,
+                total_quizzes__gt=0,
+                answered_count__gte=F("total_quizzes"),
+            ).values_list("course_id", flat=True)
+        )
+
+        if completed_course_ids:
+            CourseProgress.objects.filter(
+                pk__in=progress_ids,
+                course_id__in=completed_course_ids
+            ).update(completed_at=now())
+
+            user.completed_courses.add(*completed_course_ids)
+
+            ScheduledCourse.objects.filter(
+                user=user,
+                course_id__in=completed_course_ids,
+                scheduled_time__gt=now()
+            ).delete()
+
+    return set(completed_course_ids)
+
+
+def sync_course_progress(course):
+    """
+    Refreshes quiz totals, answered counts and completion of every progress record of a course after its quizzes
+    change. Users who complete the course this way are marked as having completed it.
+    """
+    total_quizzes = Quiz.objects.filter(section__course=course).count()
+    answered_count = Coalesce(Subquery(_answered_counts(course=course, user=OuterRef("user"))), 0)
+    completed_at = now()
+
+    progress_records = CourseProgress.objects.filter(course=course)
+    progress_records.update(
+        total_quizzes=total_quizzes,
+        answered_count=answered_count,
+        completed_at=Case(
+            When(
+                GreaterThanOrEqual(answered_count, total_quizzes),
+                then=Coalesce(F("completed_at"), Value(completed_at)),
+            ),
+            default=None,
+        ) if total_quizzes else None,
+    )
+
+    course.completed_by.add(*progress_records.filter(completed_at=completed_at).values_list("user_id", flat=True))
+
+
+def quiz_placeholder(correct_answer):
+    """Masks the correct answer, keeping only spacing and punctuation visible."""
+    return "".join(
+        c if c in PLACEHOLDER_VISIBLE_CHARACTERS else "_"
+        for c in correct_answer or ""
+    )
+
+
+def _answered_counts(course, user):
+    """Subquery counting the answers of a user to the quizzes of a course, for use with OuterRef arguments."""
+    return (
+        Answer.objects
+        .filter(user=user, quiz__section__course=course)
+        .order_by()
+        .values("user")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+
+
+def _overlay_quiz(quiz, show_answer):
+    return {
+        "id": quiz["id"],
+        "question": quiz["question"],
+        "placeholder": quiz["correct_answer"] if show_answer else quiz["masked_answer"],
+        "order": quiz["order"],
+        "show_answer": show_answer,
+    }
+
+
+def _serialize_content(content):
+    if content.content_type == Content.TEXT:
+        return {
+            "id": content.id,
+            "type": "text",
+            "text_content": content.text_content,
+            "order": content.order,
+        }
+
+    elif content.content_type == Content.IMAGE:
+        return {
+            "id": content.id,
+            "type": "image",
+            "image": content.image.url if content.image else "",
+            "alt_text": content.alt_text,
+            "order": content.order,
+        }
+
+    elif content.content_type == Content.VIDEO:
+        return {
+            "id": content.id,
+            "type": "video",
+            "video_url": content.video_url,
+            "order": content.order,
+        }
+
+    return None
@@ -1,46 +1,64 @@
+import asyncio
 import json
-import os
-import tempfile
 from datetime import datetime, timedelta
 
-import whisper
-import yt_dlp
 from django.contrib import messages
-from django.core.exceptions import ValidationError, ObjectDoesNotExist
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
 from django.db import transaction
-from django.http import JsonResponse
+from django.db.models import Exists, FileField, OuterRef, Subquery
+from django.db.models.fields.files import FieldFile
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.shortcuts import render
+from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.utils.timezone import make_aware, now
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 
 from apps.courses.forms import (CourseForm, VideoContentFormSet, ImageContentFormSet, TextContentFormSet,
                                 SectionFormSet, QuizFormSet)
-from apps.courses.models import Course, Content, Quiz, Section, Answer, ScheduledCourse
+from apps.courses.models import Course, Content, Quiz, Section, ScheduledCourse, TranscriptionJob
+from apps.courses.search import (index_course, remove_course_from_index, index_video_transcriptions,
+                                 remove_video_transcriptions)
+from apps.courses.transcription import get_cached_transcription, is_youtube_url
+from apps.courses.utils import load_course_tree, record_correct_answers, sync_course_progress
 from apps.users.utils import role_required, verify_normal_user
 
+MAX_BATCH_QUIZ_ANSWERS = 100
+
+# Fields the course editor writes, compared with the loaded rows to find the ones to update
+EDITOR_FIELDS = {
+    Section: ["title", "order"],
+    Content: ["section", "content_type", "text_content", "image", "alt_text", "video_url", "video_transcription",
+              "order"],
+    Quiz: ["section", "question", "correct_answer", "order"],
+}
+
+# Seconds between checks of a transcription job while its events are streamed
+TRANSCRIPTION_EVENTS_POLL_INTERVAL = 0.5
+
 
 # Create your views here.
 # --- Normal User ---
 @role_required(['normal'])
 @verify_normal_user
 def course(request, slug):
-    course_qs = get_object_or_404(Course, slug=slug)
     user = request.user
-    sections_qs = Section.objects.filter(course=course_qs).order_by('order')
-
-    is_saved = False
-    if request.user.is_authenticated:
-        is_saved = course_qs in request.user.saved_courses.all()
-
-    scheduled_course = ScheduledCourse.objects.filter(
-        user=request.user,
-        course=course_qs,
-        scheduled_time__gt=now()
-    ).order_by('scheduled_time').first()
-
-    is_completed = course_qs in user.completed_courses.all()
+    course_qs = get_object_or_404(
+        Course.objects.annotate(
+            is_saved=Exists(Course.objects.filter(pk=OuterRef("pk"), saved_by=user)),
+            is_completed=Exists(Course.objects.filter(pk=OuterRef("pk"), completed_by=user)),
+            next_scheduled_time=Subquery(
+                ScheduledCourse.objects.filter(
+                    user=user,
+                    course=OuterRef("pk"),
+                    scheduled_time__gt=now()
+                ).order_by("scheduled_time").values("scheduled_time")[:1]
+            ),
+        ),
+        slug=slug
+    )
 
     course = {
         "id": course_qs.id,
@@ -48,72 +66,12 @@ def course(request, slug):
         "description": course_qs.description,
         "difficulty": course_qs.difficulty,
         "estimated_completion_time": course_qs.estimated_completion_time,
-        "is_saved": is_saved,
-        "scheduled_time": scheduled_course.scheduled_time if scheduled_course else None,
-        "is_completed": is_completed,
+        "is_saved": course_qs.is_saved,
+        "scheduled_time": course_qs.next_scheduled_time,
+        "is_completed": course_qs.is_completed,
     }
 
-    sections = []
-    video_transcriptions = {}
-
-    for section in sections_qs:
-        contents = []
-        raw_contents = Content.objects.filter(section=section).order_by("order")
-
-        for content in raw_contents:
-            if content.content_type == "text":
-                contents.append({
-                    "id": content.id,
-                    "type": "text",
-                    "text_content": content.text_content,
-                    "order": content.order,
-                })
-            elif content.content_type == "image":
-                contents.append({
-                    "id": content.id,
-                    "type": "image",
-                    "image": content.image.url if content.image else "",
-                    "alt_text": content.alt_text,
-                    "order": content.order,
-                })
-            elif content.content_type == "video":
-                contents.append({
-                    "id": content.id,
-                    "type": "video",
-                    "video_url": content.video_url,
-                    "order": content.order,
-                })
-
-                if content.video_transcription:
-                    video_transcriptions[content.id] = content.video_transcription
-
-        quiz_data = []
-        quizzes = Quiz.objects.filter(section=section).order_by("order")
-        for quiz in quizzes:
-            try:
-                Answer.objects.get(user=request.user, quiz=quiz)
-                show_answer = True
-                placeholder = quiz.correct_answer
-            except Answer.DoesNotExist:
-                show_answer = False
-                placeholder = "".join(
-                    "_" if c not in [" ", "/", ",", ".", "\"", "'", ":"]
-                    else c for c in quiz.correct_answer or "")
-
-            quiz_data.append({
-                "id": quiz.id,
-                "question": quiz.question,
-                "placeholder": placeholder,
-                "order": quiz.order,
-                "show_answer": show_answer
-            })
-
-        sections.append({
-            "title": section.title,
-            "order": section.order,
-            "contents": contents,
-            "quizzes": quiz_data,
-        })
+    sections, video_transcriptions = load_course_tree(course_qs, user)
 
     return render(
         request,
@@ -144,48 +102,79 @@ def submit_quiz_answer(request):
         return JsonResponse({"success": False, "message": "Missing quiz ID."})
 
     try:
-        quiz = Quiz.objects.get(id=quiz_id)
+        quiz = Quiz.objects.select_related("section__course").get(id=quiz_id)
     except Quiz.DoesNotExist:
         return JsonResponse({"success": False, "message": "Invalid quiz."})
 
-    correct_answer = (quiz.correct_answer or "").strip()
-    is_correct = user_answer == correct_answer.lower()
-    reload_required = False
+    result = _grade_quiz_answer(quiz, user_answer)
 
-    if is_correct:
-        Answer.objects.get_or_create(user=user, quiz=quiz)
+    if result["is_correct"]:
+        result["reload"] = bool(record_correct_answers(user, [quiz]))
 
-        course_quizzes = Quiz.objects.filter(section__course=quiz.section.course)
-        answered_quizzes = Answer.objects.filter(user=user, quiz__in=course_quizzes)
+    return JsonResponse(result)
 
-        if answered_quizzes.count() == course_quizzes.count():
-            user.completed_courses.add(quiz.section.course)
-            reload_required = True
 
-            ScheduledCourse.objects.filter(
-                user=user,
-                course=quiz.section.course,
-                scheduled_time__gt=now()
-            ).delete()
+@require_POST
+@role_required(['normal'])
+@verify_normal_user
+def submit_quiz_answers(request):
+    try:
+        data = json.loads(request.body)
+        submitted_answers = data.get("answers")
+    except (json.JSONDecodeError, AttributeError):
+        return JsonResponse({"success": False, "message": "Invalid JSON format."})
 
-        return JsonResponse({
-            "success": True,
-            "is_correct": True,
-            "message": "Correct!",
-            "quiz_id": quiz.id,
-            "correct_answer": correct_answer,
-            "reload": reload_required
-        })
+    if not isinstance(submitted_answers, list) or not submitted_answers:
+        return JsonResponse({"success": False, "message": "Missing answers."})
 
-    else:
+    if len(submitted_answers) > MAX_BATCH_QUIZ_ANSWERS:
         return JsonResponse({
-            "success": True,
-            "is_correct": False,
-            "message": "Incorrect answer.",
-            "quiz_id": quiz.id,
-            "reload": False
+            "success": False,
+            "message": f"At most {MAX_BATCH_QUIZ_ANSWERS} answers can be submitted at once."
         })
 
+    user = request.user
+
+    submitted_answers = [
+        (_parse_quiz_id(item.get("quiz_id")), str(item.get("answer", "")).strip().lower())
+        if isinstance(item, dict) else (None, "")
+        for item in submitted_answers
+    ]
+    quizzes = Quiz.objects.select_related("section__course").in_bulk(
+        {quiz_id for quiz_id, _ in submitted_answers if quiz_id is not None}
+    )
+
+    results = []
+    correct_quizzes = []
+
+    for quiz_id, user_answer in submitted_answers:
+        if quiz_id is None:
+            results.append({"success": False, "message": "Missing quiz ID."})
+            continue
+
+        quiz = quizzes.get(quiz_id)
+        if quiz is None:
+            results.append({"success": False, "message": "Invalid quiz.", "quiz_id": quiz_id})
+            continue
+
+        result = _grade_quiz_answer(quiz, user_answer)
+        results.append(result)
+
+        if result["is_correct"]:
+            correct_quizzes.append(quiz)
+
+    completed_course_ids = record_correct_answers(user, correct_quizzes) if correct_quizzes else set()
+
+    for result in results:
+        if result.get("is_correct"):
+            result["reload"] = quizzes[result["quiz_id"]].section.course_id in completed_course_ids
+
+    return JsonResponse({
+        "success": True,
+        "results": results,
+        "reload": bool(completed_course_ids),
+    })
+
 
 @role_required(['normal'])
 @verify_normal_user
@@ -245,6 +234,7 @@ def schedule_course(request, course_id):
                 scheduled_time = parse_scheduled_time()
                 if scheduled_time:
                     existing_schedule.scheduled_time = scheduled_time
+                    existing_schedule.notification_sent = False
                     existing_schedule.save()
                     messages.success(request, "✅ Course successfully rescheduled!")
 
@@ -283,6 +273,7 @@ def create_or_edit_course(request, slug=None):
 
     if request.method == "POST":
         if request.POST.get('action') == 'delete_course':
+            remove_course_from_index(course.pk)
             course.delete()
             return redirect("content_manager_dashboard")
 
@@ -373,99 +364,36 @@ def create_or_edit_course(request, slug=None):
                     if action == "save_draft":
                         ScheduledCourse.objects.filter(course=course).delete()
 
-                    section_lookup = {}
-
-                    for form in section_formset.forms:
-                        section_id = form.cleaned_data.get("id")
-                        marked_for_deletion = form.cleaned_data.get("DELETE", False)
-
-                        if not section_id:
-                            if marked_for_deletion:
-                                continue
-
-                            section = Section()
-
-                        else:
-                            try:
-                                section = Section.objects.get(pk=section_id.pk)
-                            except Section.DoesNotExist:
-                                raise ValidationError(f"Section with ID {section_id} does not exist.")
-
-                            if marked_for_deletion:
-                                section.delete()
-                                continue
-
-                        section.course = course
-                        section.title = form.cleaned_data.get("title")
-                        section.order = form.cleaned_data.get("order")
-                        section.save()
-
-                        if section.order is not None:
-                            section_lookup[section.order] = section
+                    section_lookup = _save_section_formset(section_formset, course)
+
+                    _save_content_and_quiz_formsets(
+                        Content,
+                        course,
+                        section_lookup,
+                        [
+                            (text_content_formset, "text"),
+                            (image_content_formset, "image"),
+                            (video_content_formset, "video"),
+                        ]
+                    )
+                    _save_content_and_quiz_formsets(Quiz, course, section_lookup, [(quiz_formset, "quiz")])
 
-                    _save_content_and_quiz_formset(text_content_formset, section_lookup, content_type="text")
-                    _save_content_and_quiz_formset(image_content_formset, section_lookup, content_type="image")
-                    _save_content_and_quiz_formset(video_content_formset, section_lookup, content_type="video")
-                    _save_content_and_quiz_formset(quiz_formset, section_lookup, content_type="quiz")
+                    sync_course_progress(course)
+                    course.bump_version()
+                    index_course(course)
 
                     return redirect("content_manager_dashboard")
 
     else:
         course_form = CourseForm(instance=course) if course else CourseForm()
 
-        serialized_sections = _serialize_section_formset(
-            SectionFormSet(
-                instance=course, prefix=section_prefix
-            )
-        ) if course else []
-
-        section_qs = Section.objects.filter(course=course).order_by("order") if course else []
-
-        serialized_text_contents = []
-        serialized_image_contents = []
-        serialized_video_contents = []
-        serialized_quizzes = []
-
-        for section in section_qs:
-            text_formset = TextContentFormSet(
-                instance=section,
-                prefix=text_content_prefix,
-                queryset=Content.objects.filter(section=section, content_type=Content.TEXT))
-
-            for form in text_formset:
-                form.fields['section_order'].initial = section.order
-
-            serialized_text_contents.extend(_serialize_text_content_formset(text_formset))
-
-            image_formset = ImageContentFormSet(
-                instance=section,
-                prefix=image_content_prefix,
-                queryset=Content.objects.filter(section=section, content_type=Content.IMAGE))
-
-            for form in image_formset:
-                form.fields['section_order'].initial = section.order
-
-            serialized_image_contents.extend(_serialize_image_content_formset(image_formset))
-
-            video_formset = VideoContentFormSet(
-                instance=section,
-                prefix=video_content_prefix,
-                queryset=Content.objects.filter(section=section, content_type=Content.VIDEO))
-
-            for form in video_formset:
-                form.fields['section_order'].initial = section.order
-
-            serialized_video_contents.extend(_serialize_video_content_formset(video_formset))
-
-            quiz_formset_data = QuizFormSet(
-                instance=section,
-                prefix=quiz_prefix,
-                queryset=Quiz.objects.filter(section=section))
-
-            for form in quiz_formset_data:
-                form.fields['section_order'].initial = section.order
-
-            serialized_quizzes.extend(_serialize_quiz_formset(quiz_formset_data))
+        (
+            serialized_sections,
+            serialized_text_contents,
+            serialized_image_contents,
+            serialized_video_contents,
+            serialized_quizzes,
+        ) = _serialize_course_for_editor(course) if course else ([], [], [], [], [])
 
     serialized_sections = _serialize_json_safe(serialized_sections)
     serialized_text_contents = _serialize_json_safe(serialized_text_contents)
@@ -504,122 +432,340 @@ def create_or_edit_course(request, slug=None):
 @require_POST
 @role_required(['content_manager'])
 def transcribe_video(request):
-    # to suppress error messages for transcribe_video view testing
-    class MyLogger:
-        def debug(self, msg):
-            pass
-
-        def warning(self, msg):
-            pass
-
-        def error(self, msg):
-            pass
-
     video_url = request.POST.get('video_url')
 
     if not video_url:
         return JsonResponse({'status': 'error', 'message': 'Missing video URL'}, status=400)
 
-    try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            audio_path = os.path.join(temp_dir, "audio.wav")
-
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'outtmpl': os.path.join(temp_dir, 'audio.%(ext)s'),
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'wav',
-                    'preferredquality': '192',
-                }],
-                'quiet': True,
-                'no_warnings': True,
-                'logger': MyLogger(),
-            }
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([video_url])
-
-            for file in os.listdir(temp_dir):
-                if file.endswith(".wav"):
-                    audio_path = os.path.join(temp_dir, file)
-                    break
-
-            model = whisper.load_model("base")
-            result = model.transcribe(audio_path)
-
-            segments = result.get("segments", [])
-            transcription = [
-                {
-                    "text": segment.get("text", "").strip(),
-                    "start": round(segment.get("start", 0.0), 2),
-                    "end": round(segment.get("end", 0.0), 2)
-                }
-                for segment in segments
-            ]
+    if not is_youtube_url(video_url):
+        return JsonResponse({'status': 'error', 'message': 'Only YouTube URLs are allowed.'}, status=400)
 
-            return JsonResponse({
-                'status': 'success',
-                'transcription': transcription,
-                'video_url': video_url,
-            })
+    transcription = get_cached_transcription(video_url)
+    if transcription is not None:
+        return JsonResponse({
+            'status': TranscriptionJob.DONE,
+            'transcription': transcription,
+            'video_url': video_url,
+        })
 
-    except Exception as e:
-        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+    job = TranscriptionJob.objects.create(requested_by=request.user, video_url=video_url)
 
+    return JsonResponse({
+        'status': job.status,
+        'job_id': job.id,
+        'status_url': reverse('transcription_job_status', kwargs={'job_id': job.id}),
+        'events_url': reverse('transcription_job_events', kwargs={'job_id': job.id}),
+    }, status=202)
 
-# --- Private Functions ---
-def _save_content_and_quiz_formset(formset, section_lookup, content_type=None):
-    for form in formset:
-        cleaned_data = form.cleaned_data
-        instance_id = cleaned_data.get("id")
-        marked_for_deletion = cleaned_data.get("DELETE", False)
 
-        if not instance_id:
+@require_GET
+@role_required(['content_manager'])
+def transcription_job_status(request, job_id):
+    job = get_object_or_404(TranscriptionJob, pk=job_id, requested_by=request.user)
+
+    data = {'status': job.status, 'job_id': job.id, 'video_url': job.video_url}
+
+    if job.status == TranscriptionJob.DONE:
+        data['transcription'] = job.transcription
+    elif job.status == TranscriptionJob.FAILED:
+        data['message'] = job.error_message
+
+    return JsonResponse(data)
+
+
+@require_GET
+@role_required(['content_manager'])
+async def transcription_job_events(request, job_id):
+    user = await request.auser()
+
+    if not await TranscriptionJob.objects.filter(pk=job_id, requested_by=user).aexists():
+        raise Http404("Transcription job not found.")
+
+    return StreamingHttpResponse(
+        _stream_transcription_job_events(job_id),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --- Private Functions ---
+async def _stream_transcription_job_events(job_id):
+    """
+    Yields Server-Sent Events for a transcription job: a progress event whenever its stage or percentage
+    changes, the newly transcribed segments as they are stored, then a done or failed event.
+    """
+    last_progress = None
+    sent_segments = 0
+
+    while True:
+        job = await TranscriptionJob.objects.filter(pk=job_id).afirst()
+        if job is None:
+            return
+
+        progress = {"status": job.status, "stage": job.stage, "progress": job.progress}
+        if progress != last_progress:
+            yield _server_sent_event("progress", progress)
+            last_progress = progress
+
+        segments = job.transcription or []
+        if len(segments) > sent_segments:
+            yield _server_sent_event("segments", {"offset": sent_segments, "segments": segments[sent_segments:]})
+            sent_segments = len(segments)
+
+        if job.status == TranscriptionJob.DONE:
+            yield _server_sent_event("done", {"segment_count": sent_segments})
+            return
+
+        if job.status == TranscriptionJob.FAILED:
+            yield _server_sent_event("failed", {"message": job.error_message})
+            return
+
+        await asyncio.sleep(TRANSCRIPTION_EVENTS_POLL_INTERVAL)
+
+
+def _server_sent_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _save_section_formset(formset, course):
+    """
+    Saves the section forms as one diff against the sections of the course: at most one delete, one update
+    and one insert. Returns the saved sections by order, for the content and quiz forms to refer to.
+    """
+    existing = course.sections.in_bulk()
+    originals = {}
+    updated = {}
+    created = []
+    deleted_ids = set()
+    saved = []
+
+    for form in formset.forms:
+        section_id = form.cleaned_data.get("id")
+        marked_for_deletion = form.cleaned_data.get("DELETE", False)
+
+        if not section_id:
             if marked_for_deletion:
                 continue
 
-            instance = form._meta.model()
+            section = Section(course=course)
+            created.append(section)
 
         else:
-            try:
-                instance = form._meta.model.objects.get(pk=instance_id.pk)
-            except ObjectDoesNotExist:
-                continue
+            section = existing.get(section_id.pk)
+            if section is None:
+                raise ValidationError(f"Section with ID {section_id} does not exist.")
 
             if marked_for_deletion:
-                instance.delete()
+                deleted_ids.add(section.pk)
                 continue
 
-        section_order = form.cleaned_data.get('section_order')
-        if section_order is not None:
-            section = section_lookup.get(section_order)
+            originals.setdefault(section.pk, _editor_state(section, EDITOR_FIELDS[Section]))
+            updated[section.pk] = section
 
-            if section is None:
-                continue
+        section.title = form.cleaned_data.get("title")
+        section.order = form.cleaned_data.get("order")
+        saved.append(section)
+
+    # Deleting a section cascades to its videos without Content.delete, so their transcripts are removed here
+    if deleted_ids:
+        remove_video_transcriptions(list(
+            Content.objects.filter(section__in=deleted_ids, content_type=Content.VIDEO).values_list("pk", flat=True)
+        ))
+
+    _apply_editor_diff(Section, EDITOR_FIELDS[Section], originals, updated, created, deleted_ids)
+
+    return {
+        section.order: section
+        for section in saved
+        if section.pk not in deleted_ids and section.order is not None
+    }
+
+
+def _save_content_and_quiz_formsets(model, course, section_lookup, formsets):
+    """
+    Saves content or quiz forms as one diff against the rows of the course: at most one delete, one update
+    and one insert whatever the number of forms. formsets is a list of (formset, content_type) pairs.
+    Rows of other courses are ignored.
+    """
+    fields = EDITOR_FIELDS[model]
+    existing = model.objects.filter(section__course=course).select_related("section").in_bulk()
+    originals = {}
+    updated = {}
+    created = []
+    deleted_ids = set()
+    deleted_videos = []
+    transcripts = []
+    uploaded_fields = {}
+
+    for formset, content_type in formsets:
+        for form in formset:
+            cleaned_data = form.cleaned_data
+            instance_id = cleaned_data.get("id")
+            marked_for_deletion = cleaned_data.get("DELETE", False)
+
+            if not instance_id:
+                if marked_for_deletion:
+                    continue
+
+                instance = model()
+
+            else:
+                instance = existing.get(instance_id.pk)
+                if instance is None or instance.pk in deleted_ids:
+                    continue
+
+                if marked_for_deletion:
+                    deleted_ids.add(instance.pk)
+                    updated.pop(instance.pk, None)
+                    if content_type == "video":
+                        deleted_videos.append(instance.pk)
+                    continue
+
+            previous_transcript = (
+                (instance.section_id, instance.video_transcription) if content_type == "video" else None
+            )
+
+            section_order = cleaned_data.get('section_order')
+            if section_order is not None:
+                section = section_lookup.get(section_order)
+
+                if section is None:
+                    continue
+
+            if instance.pk is not None:
+                originals.setdefault(instance.pk, _editor_state(instance, fields))
+
+            if section_order is not None:
+                instance.section = section
+
+            if content_type == "text":
+                instance.content_type = Content.TEXT
+                instance.text_content = cleaned_data.get("text_content")
+
+            elif content_type == "image":
+                instance.content_type = Content.IMAGE
+                instance.image = cleaned_data.get("image")
+                instance.alt_text = cleaned_data.get("alt_text")
+
+            elif content_type == "video":
+                instance.content_type = Content.VIDEO
+                instance.video_url = cleaned_data.get("video_url")
+                instance.video_transcription = cleaned_data.get("video_transcription")
+
+            elif content_type == "quiz":
+                instance.question = cleaned_data.get("question")
+                instance.correct_answer = cleaned_data.get("correct_answer")
+
+            instance.order = cleaned_data.get('order')
+
+            if instance.pk is None:
+                created.append(instance)
+            else:
+                updated[instance.pk] = instance
+                uploaded_fields[instance.pk] = [
+                    name for name in form.changed_data if isinstance(cleaned_data.get(name), UploadedFile)
+                ]
+
+            if content_type == "video":
+                transcripts.append((instance, previous_transcript))
+
+    _apply_editor_diff(model, fields, originals, updated, created, deleted_ids, uploaded_fields)
+
+    for instance_id in deleted_ids:
+        if isinstance(existing[instance_id], Content):
+            existing[instance_id].delete_image_file()
+
+    remove_video_transcriptions(deleted_videos)
 
-            instance.section = section
+    # Only re-index transcripts that are new, changed or moved to another section
+    index_video_transcriptions([
+        instance for instance, previous_transcript in transcripts
+        if instance.pk not in deleted_ids and previous_transcript != (instance.section_id, instance.video_transcription)
+    ])
 
-        if content_type == "text":
-            instance.content_type = Content.TEXT
-            instance.text_content = cleaned_data.get("text_content")
 
-        elif content_type == "image":
-            instance.content_type = Content.IMAGE
-            instance.image = cleaned_data.get("image")
-            instance.alt_text = cleaned_data.get("alt_text")
+def _apply_editor_diff(model, fields, originals, updated, created, deleted_ids, uploaded_fields=None):
+    """
+    Writes the rows of one model the editor changed with a single filtered delete, bulk update and bulk insert.
+    uploaded_fields lists, by row id, the file fields the forms received a new upload for.
+    """
+    uploaded_fields = uploaded_fields or {}
+    changed = []
+    changed_fields = set()
 
-        elif content_type == "video":
-            instance.content_type = Content.VIDEO
-            instance.video_url = cleaned_data.get("video_url")
-            instance.video_transcription = cleaned_data.get("video_transcription")
+    for instance_id, instance in updated.items():
+        if instance_id in deleted_ids:
+            continue
 
-        elif content_type == "quiz":
-            instance.question = cleaned_data.get("question")
-            instance.correct_answer = cleaned_data.get("correct_answer")
+        names = [
+            name
+            for name, before, after in zip(fields, originals[instance_id], _editor_state(instance, fields))
+            if before != after or name in uploaded_fields.get(instance_id, ())
+        ]
+        if names:
+            changed.append(instance)
+            changed_fields.update(names)
 
-        instance.order = form.cleaned_data.get('order')
-        instance.save()
+    if deleted_ids:
+        model.objects.filter(pk__in=deleted_ids).delete()
+
+    if changed:
+        update_fields = [name for name in fields if name in changed_fields]
+
+        # bulk_update does not call Field.pre_save, which is what stores newly uploaded files
+        for name in update_fields:
+            field = model._meta.get_field(name)
+            if isinstance(field, FileField):
+                for instance in changed:
+                    field.pre_save(instance, add=False)
+
+        model.objects.bulk_update(changed, update_fields)
+
+    if created:
+        model.objects.bulk_create(created)
+
+
+def _editor_state(instance, fields):
+    """Returns the values of fields as compared by the editor diff. Files compare by name."""
+    state = []
+
+    for name in fields:
+        value = getattr(instance, instance._meta.get_field(name).attname)
+        if isinstance(value, FieldFile):
+            value = value.name
+        state.append(value)
+
+    return state
+
+
+def _parse_quiz_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _grade_quiz_answer(quiz, user_answer):
+    """Grades a normalized answer, returning the response payload of the quiz answer endpoints."""
+    correct_answer = (quiz.correct_answer or "").strip()
+
+    if user_answer == correct_answer.lower():
+        return {
+            "success": True,
+            "is_correct": True,
+            "message": "Correct!",
+            "quiz_id": quiz.id,
+            "correct_answer": correct_answer,
+            "reload": False
+        }
+
+    return {
+        "success": True,
+        "is_correct": False,
+        "message": "Incorrect answer.",
+        "quiz_id": quiz.id,
+        "reload": False
+    }
 
 
 def _serialize_json_safe(data):
@@ -653,71 +799,64 @@ def _form_has_non_empty_fields(form, whitelist):
     return any(data.get(field) not in [None, '', False] for field in whitelist)
 
 
-def _serialize_section_formset(section_formset):
-    return [
+def _serialize_course_for_editor(course):
+    """
+    Returns the existing sections, text, image and video contents and quizzes of a course as the editor's payloads,
+    loading the sections, the contents and the quizzes with one query each.
+    """
+    sections = list(course.sections.order_by("pk"))
+    section_orders = {section.pk: section.order for section in sections}
+
+    serialized_sections = [
         {
-            "id": form.instance.id,
-            "title": form.instance.title,
-            "order": form.instance.order,
+            "id": section.id,
+            "title": section.title,
+            "order": section.order,
         }
-        for form in section_formset.forms
-        if form.instance.pk
+        for section in sections
     ]
 
+    serialized_contents = {Content.TEXT: [], Content.IMAGE: [], Content.VIDEO: []}
 
-def _serialize_text_content_formset(text_content_formset):
-    return [
-        {
-            "id": form.instance.id,
-            "content_type": form.instance.content_type,
-            "text_content": form.instance.text_content,
-            "order": form.instance.order,
-            "section_order": form.fields["section_order"].initial,
+    for content in Content.objects.filter(section__course=course).order_by("section__order", "section_id", "pk"):
+        serialized = {
+            "id": content.id,
+            "content_type": content.content_type,
         }
-        for form in text_content_formset.forms
-        if form.instance.pk
-    ]
 
+        if content.content_type == Content.TEXT:
+            serialized["text_content"] = content.text_content
 
-def _serialize_image_content_formset(image_content_formset):
-    return [
-        {
-            "id": form.instance.id,
-            "content_type": form.instance.content_type,
-            "image": form.instance.image.url if form.instance.image else None,
-            "alt_text": form.instance.alt_text,
-            "order": form.instance.order,
-            "section_order": form.fields["section_order"].initial,
-        }
-        for form in image_content_formset.forms
-        if form.instance.pk
-    ]
+        elif content.content_type == Content.IMAGE:
+            serialized["image"] = content.image.url if content.image else None
+            serialized["alt_text"] = content.alt_text
 
+        elif content.content_type == Content.VIDEO:
+            serialized["video_url"] = content.video_url
+            serialized["video_transcription"] = content.video_transcription if content.video_transcription else []
 
-def _serialize_video_content_formset(video_content_formset):
-    return [
-        {
-            "id": form.instance.id,
-            "content_type": form.instance.content_type,
-            "video_url": form.instance.video_url,
-            "video_transcription": form.instance.video_transcription if form.instance.video_transcription else [],
-            "order": form.instance.order,
-            "section_order": form.fields["section_order"].initial,
-        }
-        for form in video_content_formset.forms
-        if form.instance.pk
-    ]
+        else:
+            continue
 
+        serialized["order"] = content.order
+        serialized["section_order"] = section_orders[content.section_id]
+        serialized_contents[content.content_type].append(serialized)
 
-def _serialize_quiz_formset(quiz_formset):
-    return [
+    serialized_quizzes = [
         {
-            "id": form.instance.id,
-            "question": form.instance.question,
-            "correct_answer": form.instance.correct_answer,
-            "order": form.instance.order,
-            "section_order": form.fields["section_order"].initial,
+            "id": quiz.id,
+            "question": quiz.question,
+            "correct_answer": quiz.correct_answer,
+            "order": quiz.order,
+            "section_order": section_orders[quiz.section_id],
         }
-        for form in quiz_formset.forms
-        if form.instance.pk
+        for quiz in Quiz.objects.filter(section__course=course).order_by("section__order", "section_id", "pk")
     ]
+
+    return (
+        serialized_sections,
+        serialized_contents[Content.TEXT],
+        serialized_contents[Content.IMAGE],
+        serialized_contents[Content.VIDEO],
+        serialized_quizzes,
+    )
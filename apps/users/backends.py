@@ -0,0 +1,63 @@
+import uuid
+
+from allauth.account.auth_backends import AuthenticationBackend
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_KEY = "auth_user:{user_id}:{version}"
+USER_VERSION_CACHE_KEY = "auth_user_version:{user_id}"
+
+
+def get_cached_user(user_id):
+    """
+    Returns the user with this id from the cache, loading and caching it on a miss, or None when there is no
+    such user. Users are cached under a version stamp that invalidate_cached_user() replaces.
+    """
+    version_key = USER_VERSION_CACHE_KEY.format(user_id=user_id)
+    version = cache.get(version_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(version_key, version, settings.USER_CACHE_TIMEOUT):
+            version = cache.get(version_key, version)
+
+    key = USER_CACHE_KEY.format(user_id=user_id, version=version)
+    user = cache.get(key)
+
+    if user is None:
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+
+    return user
+
+
+def invalidate_cached_user(user_id):
+    """Replaces the version stamp of a user, so the next request loads the user from the database again."""
+    cache.set(USER_VERSION_CACHE_KEY.format(user_id=user_id), uuid.uuid4().hex, settings.USER_CACHE_TIMEOUT)
+
+
+class CachedUserMixin:
+    """
+    Loads the signed in user of each request through get_cached_user() instead of the database, when
+    settings.USER_CACHE_ENABLED is set.
+    """
+
+    def get_user(self, user_id):
+        if not settings.USER_CACHE_ENABLED:
+            return super().get_user(user_id)
+
+        user = get_cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+class CachedModelBackend(CachedUserMixin, ModelBackend):
+    pass
+
+
+class CachedAuthenticationBackend(CachedUserMixin, AuthenticationBackend):
+    pass
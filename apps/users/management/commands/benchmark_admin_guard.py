@@ -0,0 +1,82 @@
+import time
+
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils.functional import SimpleLazyObject
+
+from apps.users.middleware import (
+    AdminGuardMiddleware,
+    AdminLogoutOnExitMiddleware,
+    AdminRestrictionMiddleware,
+    RestrictAdminMiddleware,
+)
+
+
+class _SignedInUser:
+    is_authenticated = True
+    is_superuser = False
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request overhead of the admin guard: the three separate middlewares it replaced "
+        "against the fused AdminGuardMiddleware."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100000, help="Requests run per measurement.")
+
+    def handle(self, *args, **options):
+        def view(request):
+            return HttpResponse()
+
+        chains = [
+            ("Separate middlewares", RestrictAdminMiddleware(AdminLogoutOnExitMiddleware(AdminRestrictionMiddleware(view)))),
+            ("AdminGuardMiddleware", AdminGuardMiddleware(view)),
+        ]
+        scenarios = [
+            ("anonymous page", "/courses/", False, "203.0.113.7"),
+            ("signed in page", "/dashboard/", True, "203.0.113.7"),
+            ("admin page from outside", "/admin/", False, "203.0.113.7"),
+            ("admin page from inside", "/admin/", True, "192.168.1.20"),
+        ]
+
+        # The bare view is timed too, so its cost can be taken off every chain
+        baseline = {scenario[0]: self.measure(view, *scenario[1:], options["requests"])[0] for scenario in scenarios}
+
+        for scenario in scenarios:
+            self.stdout.write(f"{scenario[0]}:")
+            for label, chain in chains:
+                seconds, user_loads = self.measure(chain, *scenario[1:], options["requests"])
+                overhead = (seconds - baseline[scenario[0]]) / options["requests"] * 1e6
+                self.stdout.write(
+                    f"  {label}: {overhead:.2f} µs per request, "
+                    f"{user_loads / options['requests']:.2f} user loads per request"
+                )
+
+    def measure(self, handler, path, signed_in, address, count):
+        factory = RequestFactory(REMOTE_ADDR=address)
+        user_loads = 0
+
+        def load_user():
+            nonlocal user_loads
+            user_loads += 1
+            return _SignedInUser() if signed_in else AnonymousUser()
+
+        requests = []
+        for _ in range(count):
+            request = factory.get(path)
+            request.session = SessionStore()
+            if signed_in:
+                request.session[SESSION_KEY] = "1"
+            request.user = SimpleLazyObject(load_user)
+            requests.append(request)
+
+        started = time.perf_counter()
+        for request in requests:
+            handler(request)
+        return time.perf_counter() - started, user_loads
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.tasks import outbox_stats
+
+
+class Command(BaseCommand):
+    help = "Show outbox delivery metrics for every email purpose."
+
+    def handle(self, *args, **kwargs):
+        stats = outbox_stats()
+        if not stats:
+            self.stdout.write("The outbox is empty.")
+            return
+
+        for row in stats:
+            average_delay = row["average_delay_seconds"]
+
+            self.stdout.write(f"{row['purpose']}:")
+            self.stdout.write(f"  Pending: {row['pending']}, sent: {row['sent']}, dead: {row['dead']}")
+            self.stdout.write(f"  Sent in the last hour: {row['sent_recently']} ({row['sent_per_minute']:.2f}/min)")
+            self.stdout.write(
+                f"  Average time to send: {f'{average_delay:.1f}s' if average_delay is not None else 'n/a'}"
+            )
+            self.stdout.write(f"  Most attempts: {row['max_attempts']}")
@@ -0,0 +1,47 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.tasks import OUTBOX_BATCH_SIZE, deliver_outbox_emails, requeue_stale_outbox_emails
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Send the emails queued in the outbox, polling the database for new ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Send the due emails and exit.")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to wait between polls.")
+        parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE, help="Emails claimed at a time.")
+
+    def handle(self, *args, **options):
+        while True:
+            # A mail server or database outage is logged and the next poll tries again, so the worker keeps running
+            try:
+                self.deliver(options["batch_size"])
+            except Exception as e:
+                logger.exception("Delivering outbox emails failed")
+                if options["once"]:
+                    raise CommandError(f"Delivering outbox emails failed: {e}") from e
+
+                self.stderr.write(self.style.ERROR(f"Delivering outbox emails failed: {e}"))
+
+            if options["once"]:
+                return
+
+            time.sleep(options["interval"])
+
+    def deliver(self, batch_size):
+        requeued = requeue_stale_outbox_emails()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale outbox emails."))
+
+        counts = deliver_outbox_emails(batch_size)
+        if counts["sent"]:
+            self.stdout.write(self.style.SUCCESS(f"Sent {counts['sent']} emails."))
+        if counts["retried"]:
+            self.stdout.write(self.style.WARNING(f"Scheduled {counts['retried']} failed emails for a retry."))
+        if counts["dead"]:
+            self.stdout.write(self.style.ERROR(f"Gave up on {counts['dead']} emails."))
@@ -0,0 +1,80 @@
+import copy
+
+from django.db.models.fields.files import FieldFile
+
+
+class FieldTrackerMixin:
+    """
+    Remembers the field values a model instance was loaded with, so it can tell which fields changed without
+    reading its row again. tracked_fields names the fields to remember; None remembers every concrete field.
+    Instances that were not loaded from the database report every field as changed.
+    """
+    tracked_fields = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_fields()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+
+        # Only the refreshed fields were loaded again; edits of the others are still unsaved. Django also loads a
+        # deferred field this way when it is first read.
+        self.snapshot_fields(fields)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.snapshot_fields()
+
+    def snapshot_fields(self, fields=None) -> None:
+        """
+        Remembers the current values of the loaded tracked fields as unchanged.
+        With fields, given by name or attname, only those are remembered again and the others keep their value.
+        """
+        deferred = self.get_deferred_fields()
+        tracked_fields = [
+            field for field in self._tracked_fields()
+            if field.attname not in deferred and (fields is None or field.name in fields or field.attname in fields)
+        ]
+        loaded_values = {field.attname: self._field_state(field) for field in tracked_fields}
+
+        if fields is not None:
+            loaded_values = {**getattr(self, "_loaded_values", {}), **loaded_values}
+
+        self._loaded_values = loaded_values
+
+    def changed_fields(self) -> list:
+        """Returns the names of the loaded tracked fields whose value differs from the remembered one."""
+        loaded_values = getattr(self, "_loaded_values", None)
+        deferred = self.get_deferred_fields()
+
+        return [
+            field.name
+            for field in self._tracked_fields()
+            if field.attname not in deferred and (
+                loaded_values is None
+                or field.attname not in loaded_values
+                or loaded_values[field.attname] != self._field_state(field)
+            )
+        ]
+
+    def has_changed(self, field_name) -> bool:
+        return field_name in self.changed_fields()
+
+    def _tracked_fields(self):
+        fields = self._meta.concrete_fields
+        if self.tracked_fields is None:
+            return fields
+        return [field for field in fields if field.name in self.tracked_fields]
+
+    def _field_state(self, field):
+        value = getattr(self, field.attname)
+
+        # Files compare by name, and mutable values are copied so changes made in place are seen
+        if isinstance(value, FieldFile):
+            return value.name
+        if isinstance(value, (dict, list)):
+            return copy.deepcopy(value)
+        return value
@@ -4,8 +4,11 @@ from typing import Any
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from django.forms import EmailField
 
+from apps.users.mixins import FieldTrackerMixin
+
 
 # Create your models here.
 def user_profile_picture_path(instance, filename):
@@ -35,7 +38,7 @@ class CustomUserManager(BaseUserManager):
         return self.create_user(email, password, **extra_fields)
 
 
-class CustomUser(AbstractUser):
+class CustomUser(FieldTrackerMixin, AbstractUser):
     class Meta:
         app_label = "users"
         swappable = "AUTH_USER_MODEL"
@@ -78,19 +81,65 @@ class CustomUser(AbstractUser):
         return self.role == self.SUPERUSER
 
     def save(self, *args, **kwargs) -> None:
-        if self.pk:
-            self.__class__.objects.filter(pk=self.pk).update(role=self.role)
-
         if not self.username:
             self.username = str(self.email).split("@")[0]
 
+        # A loaded user only writes the columns that changed; with none changed nothing is written
+        if not self._state.adding and kwargs.get("update_fields") is None and hasattr(self, "_loaded_values"):
+            kwargs["update_fields"] = self.changed_fields()
+
         super().save(*args, **kwargs)
 
 
 class EmailVerificationToken(models.Model):
+    """The verification token last emailed to a user, so repeated requests within the cooldown reuse it."""
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE)
-    token = models.CharField(max_length=50, unique=True)
+    token = models.CharField(max_length=100, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    last_sent_at = models.DateTimeField(null=True, blank=True)
+    send_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"Verification Token for {self.user.username}"
+
+
+class OutboxEmail(models.Model):
+    """
+    A rendered email waiting to be sent by the email worker. Requests write to the outbox instead of talking to
+    the mail server, and failed deliveries are retried with a growing delay until they are given up on.
+    """
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    DEAD = "dead"
+
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (DEAD, "Dead"),
+    ]
+
+    purpose = models.CharField(max_length=50)
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True, null=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    claim_token = models.CharField(max_length=32, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_email_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.purpose} email to {self.recipient} ({self.status})"
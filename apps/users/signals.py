@@ -1,6 +1,13 @@
+from functools import partial
+
 from allauth.socialaccount.signals import social_account_added, social_account_updated
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from apps.users.backends import invalidate_cached_user
+
 
 @receiver(social_account_added)
 @receiver(social_account_updated)
@@ -10,3 +17,13 @@ def set_verified_for_google(sender, request, sociallogin, **kwargs):
     if sociallogin.account.provider == "google":
         user.is_verified = True
         user.save()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user_on_change(sender, instance, **kwargs):
+    """
+    Drops the cached copy of a user whenever the user is saved or deleted. This waits for the commit, as a request
+    in another process could otherwise cache the old row again before the change is visible to it.
+    """
+    transaction.on_commit(partial(invalidate_cached_user, instance.pk))
@@ -0,0 +1,165 @@
+import contextlib
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Avg, Count, F, Max, Q
+from django.utils import timezone
+
+from apps.users.models import OutboxEmail
+from apps.users.utils import send_emails_individually
+
+OUTBOX_BATCH_SIZE = 50
+
+# Emails claimed longer ago than this are assumed to belong to a worker that died and are queued again
+OUTBOX_CLAIM_TIMEOUT = timedelta(minutes=10)
+
+# Window the sending rate of each purpose is measured over
+OUTBOX_THROUGHPUT_WINDOW = timedelta(hours=1)
+
+
+def claim_outbox_emails(batch_size=OUTBOX_BATCH_SIZE):
+    """
+    Marks up to batch_size due emails as sending and returns them, oldest due first.
+    Emails are claimed with a conditional update under a token of this call, so concurrent workers never
+    claim the same email.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+
+    due_ids = list(
+        OutboxEmail.objects
+        .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+        .order_by("next_attempt_at", "id")
+        .values_list("id", flat=True)[:batch_size]
+    )
+    if not due_ids:
+        return []
+
+    OutboxEmail.objects.filter(pk__in=due_ids, status=OutboxEmail.PENDING).update(
+        status=OutboxEmail.SENDING,
+        claim_token=token,
+        claimed_at=now
+    )
+    return list(
+        OutboxEmail.objects.filter(claim_token=token, status=OutboxEmail.SENDING).order_by("next_attempt_at", "id")
+    )
+
+
+def deliver_outbox_emails(batch_size=OUTBOX_BATCH_SIZE) -> dict:
+    """
+    Sends due outbox emails over one mail server connection until none are due. The connection is only opened
+    once an email is due, and every email is marked as sent as soon as it went out.
+    A failed email is retried after retry_delay(attempts), and marked dead once it failed
+    EMAIL_OUTBOX_MAX_ATTEMPTS times or its retry would fall past the EMAIL_OUTBOX_MAX_AGE of its purpose.
+    Returns the number of emails sent, retried and given up on.
+    """
+    counts = {"sent": 0, "retried": 0, "dead": 0}
+    connection = None
+
+    try:
+        while True:
+            batch = claim_outbox_emails(batch_size)
+            if not batch:
+                break
+
+            if connection is None:
+                connection = get_connection(fail_silently=False)
+
+            def record_result(index, error, batch=batch):
+                counts[_record_delivery(batch[index], error)] += 1
+
+            send_emails_individually(
+                connection, [_to_message(outbox_email) for outbox_email in batch], on_result=record_result
+            )
+
+    finally:
+        if connection is not None:
+            with contextlib.suppress(Exception):
+                connection.close()
+
+    return counts
+
+
+def retry_delay(attempts) -> timedelta:
+    """
+    Doubles the wait after every failed attempt, starting at EMAIL_OUTBOX_RETRY_DELAY, up to
+    EMAIL_OUTBOX_MAX_RETRY_DELAY.
+    """
+    seconds = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** max(0, attempts - 1)
+    return timedelta(seconds=min(seconds, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY))
+
+
+def requeue_stale_outbox_emails() -> int:
+    return OutboxEmail.objects.filter(
+        status=OutboxEmail.SENDING,
+        claimed_at__lt=timezone.now() - OUTBOX_CLAIM_TIMEOUT
+    ).update(status=OutboxEmail.PENDING, claimed_at=None, claim_token="")
+
+
+def outbox_stats(window=OUTBOX_THROUGHPUT_WINDOW):
+    """
+    Returns delivery metrics per email purpose: emails in each status, emails sent within the window with the
+    rate per minute, the average seconds from queueing to sending and the most attempts an email took.
+    """
+    since = timezone.now() - window
+    sent = Q(status=OutboxEmail.SENT)
+
+    rows = (
+        OutboxEmail.objects
+        .values("purpose")
+        .annotate(
+            pending=Count("pk", filter=Q(status__in=[OutboxEmail.PENDING, OutboxEmail.SENDING])),
+            sent=Count("pk", filter=sent),
+            dead=Count("pk", filter=Q(status=OutboxEmail.DEAD)),
+            sent_recently=Count("pk", filter=sent & Q(sent_at__gte=since)),
+            average_delay=Avg(F("sent_at") - F("created_at"), filter=sent),
+            max_attempts=Max("attempts"),
+        )
+        .order_by("purpose")
+    )
+
+    stats = []
+    for row in rows:
+        average_delay = row.pop("average_delay")
+        row["average_delay_seconds"] = average_delay.total_seconds() if average_delay is not None else None
+        row["sent_per_minute"] = row["sent_recently"] / (window.total_seconds() / 60)
+        stats.append(row)
+
+    return stats
+
+
+def _record_delivery(outbox_email, error) -> str:
+    """Stores the result of one delivery attempt and returns whether the email was "sent", "retried" or "dead"."""
+    now = timezone.now()
+    outbox_email.attempts += 1
+
+    if error is None:
+        outbox_email.status = OutboxEmail.SENT
+        outbox_email.last_error = ""
+        outbox_email.sent_at = now
+        outbox_email.save(update_fields=["status", "attempts", "last_error", "sent_at"])
+        return "sent"
+
+    outbox_email.last_error = str(error) or error.__class__.__name__
+    next_attempt_at = now + retry_delay(outbox_email.attempts)
+    max_age = settings.EMAIL_OUTBOX_MAX_AGE.get(outbox_email.purpose)
+
+    if (outbox_email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+            or (max_age is not None and next_attempt_at - outbox_email.created_at > timedelta(seconds=max_age))):
+        outbox_email.status = OutboxEmail.DEAD
+        result = "dead"
+    else:
+        outbox_email.status = OutboxEmail.PENDING
+        outbox_email.next_attempt_at = next_attempt_at
+        result = "retried"
+
+    outbox_email.save(update_fields=["status", "attempts", "last_error", "next_attempt_at"])
+    return result
+
+
+def _to_message(outbox_email):
+    message = EmailMessage(outbox_email.subject, outbox_email.body, outbox_email.from_email, [outbox_email.recipient])
+    message.content_subtype = "html"
+    return message
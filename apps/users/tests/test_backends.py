@@ -0,0 +1,84 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.courses.models import Course, Quiz, Section
+from apps.users.backends import CachedModelBackend, get_cached_user
+
+User = get_user_model()
+
+
+class CachedUserTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="user@example.com", password="testpass123", role="normal", is_verified=True
+        )
+
+    def test_user_is_loaded_once(self):
+        get_cached_user(self.user.pk)
+
+        with self.assertNumQueries(0):
+            user = get_cached_user(self.user.pk)
+
+        self.assertEqual(user, self.user)
+
+    def test_saving_the_user_invalidates_the_cached_copy_on_commit(self):
+        get_cached_user(self.user.pk)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.is_verified = False
+            self.user.save()
+
+            self.assertTrue(get_cached_user(self.user.pk).is_verified)
+
+        for callback in callbacks:
+            callback()
+
+        self.assertFalse(get_cached_user(self.user.pk).is_verified)
+
+    def test_deleted_and_inactive_users_are_not_returned(self):
+        inactive = User.objects.create_user(email="inactive@example.com", password="testpass123", is_active=False)
+        with self.settings(USER_CACHE_ENABLED=True):
+            self.assertIsNone(CachedModelBackend().get_user(inactive.pk))
+
+        user_id = self.user.pk
+        get_cached_user(user_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+
+        self.assertIsNone(get_cached_user(user_id))
+
+    @override_settings(USER_CACHE_ENABLED=False)
+    def test_user_is_loaded_from_the_database_without_a_shared_cache(self):
+        get_cached_user(self.user.pk)
+        User.objects.filter(pk=self.user.pk).update(is_verified=False)
+
+        with self.assertNumQueries(1):
+            self.assertFalse(CachedModelBackend().get_user(self.user.pk).is_verified)
+
+    @override_settings(USER_CACHE_ENABLED=True)
+    def test_hot_endpoint_does_not_load_the_user_from_the_database(self):
+        course = Course.objects.create(
+            title="Course", description="Description", difficulty="junior", estimated_completion_time=30
+        )
+        quiz = Quiz.objects.create(
+            section=Section.objects.create(course=course, title="Section", order=0),
+            question="1 + 1?",
+            correct_answer="2",
+            order=0
+        )
+        self.client.force_login(self.user)
+        url = reverse("submit_quiz_answer")
+        body = json.dumps({"quiz_id": quiz.id, "answer": "3"})
+
+        self.client.post(url, body, content_type="application/json")
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, body, content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in context.captured_queries if "users_customuser" in query["sql"]])
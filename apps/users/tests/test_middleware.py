@@ -0,0 +1,102 @@
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils.functional import SimpleLazyObject
+
+from apps.users.middleware import AdminGuardMiddleware
+
+User = get_user_model()
+
+
+class AdminGuardMiddlewareTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = AdminGuardMiddleware(lambda request: HttpResponse("OK"))
+        self.superuser = User.objects.create_superuser(email="admin@example.com", password="testpass123")
+        self.normal_user = User.objects.create_user(email="user@example.com", password="testpass123")
+        self.user_loads = 0
+
+    def make_request(self, path, user=None, address="127.0.0.1"):
+        request = self.factory.get(path, REMOTE_ADDR=address)
+        request.session = SessionStore()
+        if user is not None:
+            request.session[SESSION_KEY] = str(user.pk)
+
+        def load_user():
+            self.user_loads += 1
+            return user or AnonymousUser()
+
+        request.user = SimpleLazyObject(load_user)
+        return request
+
+    def test_admin_is_redirected_outside_internal_networks(self):
+        for address in ["203.0.113.7", "10.0.0.5", "192.169.0.1", "not-an-ip"]:
+            response = self.middleware(self.make_request("/admin/", self.superuser, address))
+            self.assertEqual(response.status_code, 302, address)
+            self.assertEqual(response.url, "/")
+
+        self.assertEqual(self.user_loads, 0)
+
+    def test_admin_is_served_within_internal_networks(self):
+        for address in ["127.0.0.1", "192.168.0.1", "192.168.255.254"]:
+            response = self.middleware(self.make_request("/admin/", self.superuser, address))
+            self.assertEqual(response.status_code, 200, address)
+
+    @override_settings(ADMIN_INTERNAL_NETWORKS=["10.1.0.0/16", "::1/128"])
+    def test_internal_networks_come_from_settings(self):
+        middleware = AdminGuardMiddleware(lambda request: HttpResponse("OK"))
+
+        self.assertEqual(middleware(self.make_request("/admin/", address="10.1.2.3")).status_code, 200)
+        self.assertEqual(middleware(self.make_request("/admin/", address="::1")).status_code, 200)
+        self.assertEqual(middleware(self.make_request("/admin/", address="127.0.0.1")).status_code, 302)
+
+    def test_admin_is_redirected_for_signed_in_non_superusers(self):
+        response = self.middleware(self.make_request("/admin/", self.normal_user))
+        self.assertEqual(response.status_code, 302)
+
+        response = self.middleware(self.make_request("/admin/login/"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_superuser_leaving_admin_is_signed_out(self):
+        request = self.make_request("/dashboard/", self.superuser)
+
+        response = self.middleware(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(SESSION_KEY, request.session)
+
+    def test_other_users_stay_signed_in(self):
+        request = self.make_request("/dashboard/", self.normal_user)
+
+        self.middleware(request)
+
+        self.assertIn(SESSION_KEY, request.session)
+
+    def test_user_is_not_loaded_for_anonymous_pages(self):
+        response = self.middleware(self.make_request("/courses/"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.user_loads, 0)
+
+    async def test_async_requests_are_guarded_the_same_way(self):
+        async def get_response(request):
+            return HttpResponse("OK")
+
+        middleware = AdminGuardMiddleware(get_response)
+
+        async def auser():
+            return self.normal_user
+
+        request = self.factory.get("/admin/", REMOTE_ADDR="127.0.0.1")
+        request.session = SessionStore()
+        request.auser = auser
+        response = await middleware(request)
+        self.assertEqual(response.status_code, 302)
+
+        request = self.factory.get("/courses/", REMOTE_ADDR="127.0.0.1")
+        request.session = SessionStore()
+        request.auser = auser
+        response = await middleware(request)
+        self.assertEqual(response.status_code, 200)
@@ -1,7 +1,10 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from apps.users.models import CustomUser, EmailVerificationToken
+from apps.users.utils import generate_verification_token
 
 
 class CustomUserModelTest(TestCase):
@@ -41,6 +44,53 @@ class CustomUserModelTest(TestCase):
         self.assertIsNone(user.profile_picture.name)
 
 
+    def test_save_writes_only_changed_columns(self):
+        user = CustomUser.objects.get(pk=CustomUser.objects.create_user(email="user@example.com", password="1").pk)
+        user.is_verified = True
+
+        with CaptureQueriesContext(connection) as context:
+            user.save()
+
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertIn('SET "is_verified"', context.captured_queries[0]["sql"])
+        self.assertNotIn('"role"', context.captured_queries[0]["sql"])
+        self.assertTrue(CustomUser.objects.get(pk=user.pk).is_verified)
+
+    def test_save_without_changes_writes_nothing(self):
+        user = CustomUser.objects.get(pk=CustomUser.objects.create_user(email="user@example.com", password="1").pk)
+
+        with self.assertNumQueries(0):
+            user.save()
+
+        user.role = CustomUser.CONTENT_MANAGER
+        user.save()
+        user.role = CustomUser.NORMAL_USER
+        user.save()
+        self.assertEqual(CustomUser.objects.get(pk=user.pk).role, CustomUser.NORMAL_USER)
+
+    def test_loading_a_deferred_field_keeps_unsaved_changes(self):
+        pk = CustomUser.objects.create_user(email="user@example.com", password="1").pk
+        user = CustomUser.objects.only("id", "email").get(pk=pk)
+
+        user.email = "changed@example.com"
+        self.assertEqual(user.role, CustomUser.NORMAL_USER)
+        user.save()
+
+        self.assertEqual(CustomUser.objects.get(pk=pk).email, "changed@example.com")
+
+    def test_refreshing_some_fields_keeps_unsaved_changes_of_the_others(self):
+        user = CustomUser.objects.get(pk=CustomUser.objects.create_user(email="user@example.com", password="1").pk)
+        CustomUser.objects.filter(pk=user.pk).update(role=CustomUser.CONTENT_MANAGER)
+
+        user.is_verified = True
+        user.refresh_from_db(fields=["role"])
+        user.save()
+
+        saved = CustomUser.objects.get(pk=user.pk)
+        self.assertTrue(saved.is_verified)
+        self.assertEqual(saved.role, CustomUser.CONTENT_MANAGER)
+
+
 class EmailVerificationTokenTest(TestCase):
 
     def test_create_token(self):
@@ -49,3 +99,11 @@ class EmailVerificationTokenTest(TestCase):
         self.assertEqual(token.token, "abc123")
         self.assertEqual(str(token), f"Verification Token for {user.username}")
         self.assertLessEqual(token.created_at, timezone.now())
+
+    def test_token_field_fits_generated_tokens(self):
+        user = CustomUser.objects.create_user(email="verify@example.com", password="123")
+        user.pk = 10 ** 18
+
+        token = generate_verification_token(user)
+
+        self.assertLessEqual(len(token), EmailVerificationToken._meta.get_field("token").max_length)
@@ -0,0 +1,220 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPConnectError, SMTPServerDisconnected
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.users.models import OutboxEmail
+from apps.users.tasks import (
+    claim_outbox_emails,
+    deliver_outbox_emails,
+    outbox_stats,
+    requeue_stale_outbox_emails,
+    retry_delay,
+)
+from apps.users.utils import queue_email
+
+User = get_user_model()
+
+
+class RefusingEmailBackend(locmem.EmailBackend):
+    """
+    Fails every email to the refused addresses and counts opened connections.
+    Once max_opens connections were opened the mail server cannot be reached.
+    """
+    refused = set()
+    opened = 0
+    max_opens = None
+
+    def open(self):
+        if self.max_opens is not None and RefusingEmailBackend.opened >= self.max_opens:
+            raise SMTPConnectError(421, b"Service not available")
+        RefusingEmailBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & self.refused:
+                raise SMTPServerDisconnected("Connection unexpectedly closed")
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND="apps.users.tests.test_tasks.RefusingEmailBackend",
+    EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+    EMAIL_OUTBOX_RETRY_DELAY=30,
+    EMAIL_OUTBOX_MAX_RETRY_DELAY=3600,
+)
+class OutboxDeliveryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="user@example.com", password="testpass123")
+        self.other_user = User.objects.create_user(email="other@example.com", password="testpass123")
+        RefusingEmailBackend.refused = set()
+        RefusingEmailBackend.opened = 0
+        RefusingEmailBackend.max_opens = None
+
+    def test_queue_email_stores_the_rendered_email_without_sending_it(self):
+        outbox_email = queue_email(self.user, "verification")
+
+        self.assertEqual(outbox_email.status, OutboxEmail.PENDING)
+        self.assertEqual(outbox_email.recipient, "user@example.com")
+        self.assertEqual(outbox_email.subject, "Verify Your Email")
+        self.assertIn("verify your email", outbox_email.body)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_due_emails_are_sent_and_marked_as_sent(self):
+        queue_email(self.user, "verification")
+        queue_email(self.other_user, "password_reset")
+
+        counts = deliver_outbox_emails()
+
+        self.assertEqual(counts, {"sent": 2, "retried": 0, "dead": 0})
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), ["other@example.com", "user@example.com"])
+        self.assertEqual(mail.outbox[0].content_subtype, "html")
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.SENT).exists())
+        self.assertFalse(OutboxEmail.objects.filter(sent_at__isnull=True).exists())
+
+    def test_failed_email_is_retried_with_exponential_backoff_then_dead_lettered(self):
+        failing = queue_email(self.user, "verification")
+        queue_email(self.other_user, "verification")
+        RefusingEmailBackend.refused = {"user@example.com"}
+
+        self.assertEqual(deliver_outbox_emails(), {"sent": 1, "retried": 1, "dead": 0})
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, OutboxEmail.PENDING)
+        self.assertEqual(failing.attempts, 1)
+        self.assertIn("Connection unexpectedly closed", failing.last_error)
+        first_retry = failing.next_attempt_at
+
+        # Not due yet, so nothing is claimed
+        self.assertEqual(deliver_outbox_emails(), {"sent": 0, "retried": 0, "dead": 0})
+
+        OutboxEmail.objects.filter(pk=failing.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_outbox_emails(), {"sent": 0, "retried": 1, "dead": 0})
+        failing.refresh_from_db()
+        self.assertEqual(failing.attempts, 2)
+        self.assertGreater(failing.next_attempt_at - timezone.now(), timedelta(seconds=50))
+        self.assertLess(first_retry - timezone.now(), timedelta(seconds=31))
+
+        OutboxEmail.objects.filter(pk=failing.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_outbox_emails(), {"sent": 0, "retried": 0, "dead": 1})
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, OutboxEmail.DEAD)
+        self.assertEqual(failing.attempts, 3)
+
+        self.assertEqual([email.to for email in mail.outbox], [["other@example.com"]])
+
+    def test_no_connection_is_opened_when_nothing_is_due(self):
+        self.assertEqual(deliver_outbox_emails(), {"sent": 0, "retried": 0, "dead": 0})
+        self.assertEqual(RefusingEmailBackend.opened, 0)
+
+    def test_emails_sent_before_the_mail_server_drops_stay_sent(self):
+        sent = queue_email(self.user, "verification")
+        failing = queue_email(self.other_user, "verification")
+        unattempted = queue_email(self.user, "password_reset")
+        RefusingEmailBackend.refused = {"other@example.com"}
+        RefusingEmailBackend.max_opens = 1
+
+        self.assertEqual(deliver_outbox_emails(), {"sent": 1, "retried": 2, "dead": 0})
+
+        self.assertEqual(OutboxEmail.objects.get(pk=sent.pk).status, OutboxEmail.SENT)
+        self.assertEqual(OutboxEmail.objects.get(pk=failing.pk).status, OutboxEmail.PENDING)
+        unattempted.refresh_from_db()
+        self.assertEqual(unattempted.status, OutboxEmail.PENDING)
+        self.assertIn("Service not available", unattempted.last_error)
+        self.assertEqual([email.to for email in mail.outbox], [["user@example.com"]])
+
+    @override_settings(EMAIL_OUTBOX_MAX_AGE={"verification": 300})
+    def test_expiring_emails_are_not_retried_past_their_max_age(self):
+        verification = queue_email(self.user, "verification")
+        password_reset = queue_email(self.user, "password_reset")
+        OutboxEmail.objects.update(created_at=timezone.now() - timedelta(seconds=290))
+        RefusingEmailBackend.refused = {"user@example.com"}
+
+        self.assertEqual(deliver_outbox_emails(), {"sent": 0, "retried": 1, "dead": 1})
+        self.assertEqual(OutboxEmail.objects.get(pk=verification.pk).status, OutboxEmail.DEAD)
+        self.assertEqual(OutboxEmail.objects.get(pk=password_reset.pk).status, OutboxEmail.PENDING)
+
+    def test_retry_delay_doubles_up_to_the_maximum(self):
+        self.assertEqual(
+            [retry_delay(attempts).total_seconds() for attempts in range(1, 10)],
+            [30, 60, 120, 240, 480, 960, 1920, 3600, 3600]
+        )
+
+    def test_claimed_emails_are_not_claimed_again(self):
+        queue_email(self.user, "verification")
+        queue_email(self.other_user, "verification")
+
+        first = claim_outbox_emails(batch_size=1)
+        second = claim_outbox_emails(batch_size=5)
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 1)
+        self.assertNotEqual(first[0].pk, second[0].pk)
+        self.assertEqual(claim_outbox_emails(), [])
+
+    def test_stale_claims_are_requeued(self):
+        outbox_email = queue_email(self.user, "verification")
+        claim_outbox_emails()
+        OutboxEmail.objects.filter(pk=outbox_email.pk).update(claimed_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_outbox_emails(), 1)
+        self.assertEqual(deliver_outbox_emails()["sent"], 1)
+
+    def test_stats_are_reported_per_purpose(self):
+        queue_email(self.user, "verification")
+        queue_email(self.other_user, "verification")
+        queue_email(self.user, "password_reset")
+        RefusingEmailBackend.refused = {"other@example.com"}
+        deliver_outbox_emails()
+
+        stats = {row["purpose"]: row for row in outbox_stats()}
+
+        self.assertEqual(
+            (stats["verification"]["sent"], stats["verification"]["pending"], stats["verification"]["dead"]), (1, 1, 0)
+        )
+        self.assertEqual(stats["verification"]["sent_recently"], 1)
+        self.assertEqual(stats["password_reset"]["sent"], 1)
+        self.assertGreaterEqual(stats["password_reset"]["average_delay_seconds"], 0)
+
+        out = StringIO()
+        call_command("email_outbox_stats", stdout=out)
+        self.assertIn("verification:", out.getvalue())
+        self.assertIn("Pending: 1, sent: 1, dead: 0", out.getvalue())
+
+    def test_worker_command_sends_due_emails_once(self):
+        queue_email(self.user, "verification")
+        out = StringIO()
+
+        call_command("run_email_worker", "--once", stdout=out)
+
+        self.assertIn("Sent 1 emails.", out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_worker_command_keeps_running_after_a_failed_poll(self):
+        class Stop(Exception):
+            pass
+
+        err = StringIO()
+        with patch("apps.users.management.commands.run_email_worker.deliver_outbox_emails",
+                   side_effect=[RuntimeError("database is locked"), {"sent": 0, "retried": 0, "dead": 0}]) as deliver, \
+                patch("apps.users.management.commands.run_email_worker.time.sleep", side_effect=[None, Stop]), \
+                self.assertLogs("apps.users.management.commands.run_email_worker", "ERROR"):
+            with self.assertRaises(Stop):
+                call_command("run_email_worker", stdout=StringIO(), stderr=err)
+
+        self.assertEqual(deliver.call_count, 2)
+        self.assertIn("database is locked", err.getvalue())
+
+    def test_worker_command_once_reports_a_failed_poll(self):
+        with patch("apps.users.management.commands.run_email_worker.deliver_outbox_emails",
+                   side_effect=RuntimeError("database is locked")), \
+                self.assertLogs("apps.users.management.commands.run_email_worker", "ERROR"):
+            with self.assertRaises(CommandError):
+                call_command("run_email_worker", "--once", stdout=StringIO())
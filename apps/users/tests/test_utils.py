@@ -1,14 +1,18 @@
 from datetime import datetime, timedelta
-from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase, RequestFactory
 from django.urls import reverse
+from django.utils import timezone
+
+from apps.users.models import EmailVerificationToken, OutboxEmail
 
 from apps.users.utils import (
     _redirect_user_dashboard,
+    build_email,
     generate_verification_token,
-    send_email,
+    queue_email,
+    queue_verification_email,
     verify_normal_user,
 )
 
@@ -46,28 +50,31 @@ class UtilsTests(TestCase):
         self.assertIsInstance(token, str)
         self.assertTrue(len(token) > 10)
 
-    @patch("apps.users.utils.EmailMessage.send")
-    def test_send_email_verification(self, mock_send):
-        send_email(self.normal_user, "verification")
-        mock_send.assert_called_once()
+    def test_queue_email_verification(self):
+        outbox_email = queue_email(self.normal_user, "verification")
+        self.assertEqual((outbox_email.recipient, outbox_email.subject), (self.normal_user.email, "Verify Your Email"))
 
-    @patch("apps.users.utils.EmailMessage.send")
-    def test_send_email_password_reset(self, mock_send):
-        send_email(self.normal_user, "password_reset")
-        mock_send.assert_called_once()
+    def test_queue_email_password_reset(self):
+        outbox_email = queue_email(self.normal_user, "password_reset")
+        self.assertEqual(outbox_email.subject, "Reset Your Password")
 
-    @patch("apps.users.utils.EmailMessage.send")
-    def test_send_email_scheduled_course_reminder(self, mock_send):
+    def test_queue_email_scheduled_course_reminder(self):
         extra_context = {
             "course_title": "Math Basics",
             "scheduled_time": datetime.now() + timedelta(days=1),
         }
-        send_email(self.normal_user, "scheduled_course_reminder", extra_context=extra_context)
-        mock_send.assert_called_once()
+        outbox_email = queue_email(self.normal_user, "scheduled_course_reminder", extra_context=extra_context)
+        self.assertEqual(outbox_email.subject, "Upcoming Scheduled Course Reminder: Math Basics")
+
+    def test_build_email_renders_without_sending(self):
+        email = build_email(self.normal_user, "verification")
+        self.assertEqual(email.to, [self.normal_user.email])
+        self.assertEqual(email.subject, "Verify Your Email")
+        self.assertEqual(email.content_subtype, "html")
 
-    def test_send_email_invalid_purpose(self):
+    def test_build_email_invalid_purpose(self):
         with self.assertRaises(ValueError):
-            send_email(self.normal_user, "invalid-purpose")
+            build_email(self.normal_user, "invalid-purpose")
 
     def test_verify_normal_user_decorator_redirects_unverified_user(self):
         request = self.factory.get("/some-protected-page")
@@ -81,6 +88,39 @@ class UtilsTests(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.url, reverse("verify_email_page"))
 
+    def test_verify_normal_user_decorator_queues_one_email_per_cooldown(self):
+        @verify_normal_user
+        def fake_view(req):
+            return "ACCESS GRANTED"
+
+        for _ in range(10):
+            request = self.factory.get("/some-protected-page")
+            request.user = self.normal_user
+            fake_view(request)
+
+        self.assertEqual(OutboxEmail.objects.filter(recipient=self.normal_user.email).count(), 1)
+
+        ledger = EmailVerificationToken.objects.get(user=self.normal_user)
+        self.assertEqual(ledger.send_count, 1)
+        self.assertIn(ledger.token, OutboxEmail.objects.get().body)
+
+        EmailVerificationToken.objects.filter(pk=ledger.pk).update(
+            last_sent_at=timezone.now() - timedelta(minutes=10)
+        )
+        request = self.factory.get("/some-protected-page")
+        request.user = self.normal_user
+        fake_view(request)
+
+        self.assertEqual(OutboxEmail.objects.filter(recipient=self.normal_user.email).count(), 2)
+
+    def test_queue_verification_email_force_ignores_cooldown(self):
+        self.assertTrue(queue_verification_email(self.normal_user))
+        self.assertFalse(queue_verification_email(self.normal_user))
+        self.assertTrue(queue_verification_email(self.normal_user, force=True))
+
+        self.assertEqual(EmailVerificationToken.objects.get(user=self.normal_user).send_count, 2)
+        self.assertEqual(OutboxEmail.objects.count(), 2)
+
     def test_verify_normal_user_decorator_skips_verified_user(self):
         self.normal_user.is_verified = True
         self.normal_user.save()
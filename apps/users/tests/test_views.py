@@ -1,11 +1,14 @@
+import asyncio
 from io import BytesIO
 from unittest.mock import patch
 
 from PIL import Image
+from asgiref.sync import sync_to_async
 from allauth.socialaccount.models import SocialApp
 from django.contrib.auth import get_user_model
 from django.contrib.messages import get_messages
 from django.contrib.sites.models import Site
+from django.core import mail
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.signing import TimestampSigner
 from django.test import TestCase, Client
@@ -14,12 +17,20 @@ from django.utils import timezone
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 
-from apps.courses.models import Course, ScheduledCourse
+from apps.courses.models import Course, Content, ScheduledCourse, Section
+from apps.courses.search import index_course, index_video_transcription
+from apps.users.models import EmailVerificationToken, OutboxEmail
+from apps.users.verification import EMAIL_VERIFIED, PASSWORD_RESET_VERIFIED, _waiters, notify_verified
 
 User = get_user_model()
 signer = TimestampSigner()
 
 
+async def _until_waiting(kind, user_id):
+    while not _waiters.get((kind, user_id)):
+        await asyncio.sleep(0.01)
+
+
 class AuthViewsTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -117,6 +128,12 @@ class AuthViewsTest(TestCase):
         user = User.objects.get(email="newuser@example.com")
         self.assertEqual(user.role, "normal")
         self.assertFalse(user.is_verified)
+        self.assertTrue(OutboxEmail.objects.filter(purpose="verification", recipient=user.email).exists())
+
+        # The dashboard redirects the unverified user without queueing another email within the cooldown
+        response = self.client.get(reverse("dashboard"))
+        self.assertRedirects(response, reverse("verify_email_page"))
+        self.assertEqual(OutboxEmail.objects.filter(recipient=user.email).count(), 1)
 
 
 class EmailVerificationViewsTest(TestCase):
@@ -144,14 +161,18 @@ class EmailVerificationViewsTest(TestCase):
     def test_verify_email_with_valid_token(self):
         user_id_encoded = urlsafe_base64_encode(force_bytes(self.user.pk))
         token = signer.sign(user_id_encoded)
+        EmailVerificationToken.objects.create(user=self.user, token=token, last_sent_at=timezone.now())
 
         url = reverse("verify_email", kwargs={"token": token})
-        response = self.client.get(url)
+        with patch("apps.users.views.notify_verified") as mock_notify_verified:
+            response = self.client.get(url)
         self.user.refresh_from_db()
 
         self.assertEqual(response.status_code, 200)
         self.assertTrue(self.user.is_verified)
         self.assertIn("window.close();", response.content.decode())
+        self.assertFalse(EmailVerificationToken.objects.filter(user=self.user).exists())
+        mock_notify_verified.assert_called_once_with(EMAIL_VERIFIED, self.user.pk)
 
     def test_verify_email_with_invalid_token(self):
         url = reverse("verify_email", kwargs={"token": "invalid-token"})
@@ -172,17 +193,44 @@ class EmailVerificationViewsTest(TestCase):
 
     def test_resend_verification_email_post(self):
         self.client.login(email="user@example.com", password="testpass123")
-        with patch("apps.users.views.send_email") as mock_send_email:
-            response = self.client.post(self.resend_url)
-            mock_send_email.assert_called_once()
-            self.assertEqual(response.status_code, 200)
-            self.assertEqual(response.json()["message"], "Verification email resent.")
+        response = self.client.post(self.resend_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["message"], "Verification email resent.")
+        self.assertEqual(
+            list(OutboxEmail.objects.values_list("purpose", "recipient")), [("verification", "user@example.com")]
+        )
+        self.assertEqual(len(mail.outbox), 0)
 
     def test_resend_verification_email_get(self):
         response = self.client.get(self.resend_url)
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json()["error"], "Invalid request.")
 
+    def test_wait_for_verification_status_answers_at_once_when_verified(self):
+        User.objects.filter(pk=self.user.pk).update(is_verified=True)
+
+        response = self.client.get(reverse("wait_for_verification_status"))
+
+        self.assertEqual(response.json(), {"status": "verified", "redirect_url": reverse("dashboard")})
+
+    def test_wait_for_verification_status_times_out_as_pending(self):
+        with self.settings(VERIFICATION_WAIT_TIMEOUT=0.1):
+            response = self.client.get(reverse("wait_for_verification_status"))
+
+        self.assertEqual(response.json(), {"status": "pending"})
+
+    async def test_wait_for_verification_status_is_woken_by_verification(self):
+        await self.async_client.aforce_login(self.user)
+
+        with patch("apps.users.views.VERIFICATION_WAIT_CHECK_INTERVAL", 60):
+            request = asyncio.ensure_future(self.async_client.get(reverse("wait_for_verification_status")))
+            await _until_waiting(EMAIL_VERIFIED, self.user.pk)
+
+            await sync_to_async(notify_verified, thread_sensitive=False)(EMAIL_VERIFIED, self.user.pk)
+            response = await asyncio.wait_for(request, timeout=5)
+
+        self.assertEqual(response.json()["status"], "verified")
+
 
 class PasswordResetViewsTest(TestCase):
     def setUp(self):
@@ -205,10 +253,11 @@ class PasswordResetViewsTest(TestCase):
         self.login_url = '/login/'
 
     def test_password_reset_request_post_valid_email(self):
-        with patch("apps.users.views.send_email") as mock_send_email:
-            response = self.client.post(self.reset_url, {"email": self.user.email})
-            self.assertRedirects(response, self.verify_page_url)
-            mock_send_email.assert_called_once()
+        response = self.client.post(self.reset_url, {"email": self.user.email})
+        self.assertRedirects(response, self.verify_page_url)
+        self.assertEqual(
+            list(OutboxEmail.objects.values_list("purpose", "recipient")), [("password_reset", self.user.email)]
+        )
 
     def test_password_reset_request_post_empty_email(self):
         response = self.client.post(self.reset_url, {"email": ""}, follow=True)
@@ -218,10 +267,9 @@ class PasswordResetViewsTest(TestCase):
 
     def test_password_reset_request_logged_in_non_google_user(self):
         self.client.login(email="user@example.com", password="testpass123")
-        with patch("apps.users.views.send_email") as mock_send_email:
-            response = self.client.get(self.reset_url)
-            self.assertRedirects(response, self.verify_page_url)
-            mock_send_email.assert_called_once()
+        response = self.client.get(self.reset_url)
+        self.assertRedirects(response, self.verify_page_url)
+        self.assertEqual(OutboxEmail.objects.filter(purpose="password_reset", recipient=self.user.email).count(), 1)
 
     def test_verify_password_reset_page_without_session(self):
         response = self.client.get(self.verify_page_url)
@@ -232,11 +280,13 @@ class PasswordResetViewsTest(TestCase):
         token = signer.sign(user_id_encoded)
         url = reverse("verify_password_reset", kwargs={"token": token})
 
-        response = self.client.get(url)
+        with patch("apps.users.views.notify_verified") as mock_notify_verified:
+            response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertIn("window.close();", response.content.decode())
         session_user_id = self.client.session.get("password_reset_verified_user")
         self.assertEqual(session_user_id, self.user.pk)
+        mock_notify_verified.assert_called_once_with(PASSWORD_RESET_VERIFIED, self.user.pk)
 
     def test_verify_password_reset_invalid_token(self):
         url = reverse("verify_password_reset", kwargs={"token": "invalid-token"})
@@ -274,16 +324,43 @@ class PasswordResetViewsTest(TestCase):
         self.assertEqual(response.json()["status"], "verified")
         self.assertIn("/password-reset/new-password/", response.json()["redirect_url"])
 
+    async def test_wait_for_password_reset_verification_is_woken_by_verification(self):
+        session = await self.async_client.asession()
+        await session.aset("password_reset_email", self.user.email)
+        await session.asave()
+
+        request = asyncio.ensure_future(self.async_client.get(reverse("wait_for_password_reset_verification")))
+        await _until_waiting(PASSWORD_RESET_VERIFIED, self.user.pk)
+
+        await sync_to_async(notify_verified, thread_sensitive=False)(PASSWORD_RESET_VERIFIED, self.user.pk)
+
+        response = await asyncio.wait_for(request, timeout=5)
+        self.assertEqual(response.json()["status"], "verified")
+        self.assertIn("/password-reset/new-password/", response.json()["redirect_url"])
+
+    def test_wait_for_password_reset_verification_without_request(self):
+        response = self.client.get(reverse("wait_for_password_reset_verification"))
+        self.assertEqual(response.json(), {"status": "expired", "redirect_url": reverse("password_reset")})
+
+    def test_wait_for_password_reset_verification_times_out_as_pending(self):
+        session = self.client.session
+        session["password_reset_email"] = self.user.email
+        session.save()
+
+        with self.settings(VERIFICATION_WAIT_TIMEOUT=0.1):
+            response = self.client.get(reverse("wait_for_password_reset_verification"))
+
+        self.assertEqual(response.json(), {"status": "pending"})
+
     def test_resend_password_reset_verification_post(self):
         session = self.client.session
         session["password_reset_email"] = self.user.email
         session.save()
 
-        with patch("apps.users.views.send_email") as mock_send_email:
-            response = self.client.post(self.resend_verification_url)
-            self.assertEqual(response.status_code, 200)
-            self.assertEqual(response.json()["message"], "Password reset verification email has been resent.")
-            mock_send_email.assert_called_once()
+        response = self.client.post(self.resend_verification_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["message"], "Password reset verification email has been resent.")
+        self.assertEqual(OutboxEmail.objects.filter(purpose="password_reset", recipient=self.user.email).count(), 1)
 
     def test_resend_password_reset_verification_get_invalid(self):
         response = self.client.get(self.resend_verification_url)
@@ -381,6 +458,131 @@ class DashboardViewsTests(TestCase):
         response = self.client.get(reverse("dashboard"), {"saved_only": "true"})
         self.assertContains(response, "Test Course")
 
+    def test_dashboard_paginates_with_cursor(self):
+        self.client.login(email='normal@example.com', password='testpass')
+        courses = [
+            Course.objects.create(
+                title=f"Paged Course {index}",
+                description="A paged course.",
+                difficulty=Course.JUNIOR,
+                estimated_completion_time=30,
+                status="published"
+            )
+            for index in range(3)
+        ]
+
+        with patch("apps.users.views.DASHBOARD_PAGE_SIZE", 2):
+            response = self.client.get(reverse("dashboard"))
+            self.assertEqual([course["title"] for course in response.context["courses"]],
+                             ["Paged Course 0", "Paged Course 1"])
+            self.assertIsNone(response.context["previous_page_query"])
+            self.assertIn(f"after={courses[1].id}", response.context["next_page_query"])
+            self.assertIn("saved_only=false", response.context["next_page_query"])
+
+            response = self.client.get(reverse("dashboard"), {"after": courses[1].id})
+            self.assertEqual([course["title"] for course in response.context["courses"]], ["Paged Course 2"])
+            self.assertIsNone(response.context["next_page_query"])
+            self.assertIn(f"before={courses[2].id}", response.context["previous_page_query"])
+
+            response = self.client.get(reverse("dashboard"), {"before": courses[2].id})
+            self.assertEqual([course["title"] for course in response.context["courses"]],
+                             ["Paged Course 0", "Paged Course 1"])
+
+    def test_dashboard_search_ranks_indexed_courses(self):
+        self.client.login(email='normal@example.com', password='testpass')
+        description_match = Course.objects.create(
+            title="Number Sense", description="Fractions and a common denominator.",
+            difficulty=Course.JUNIOR, estimated_completion_time=30, status="published"
+        )
+        title_match = Course.objects.create(
+            title="Fractions", description="Parts of a whole.",
+            difficulty=Course.JUNIOR, estimated_completion_time=30, status="published"
+        )
+        index_course(description_match)
+        index_course(title_match)
+
+        with patch("apps.users.views.DASHBOARD_PAGE_SIZE", 1):
+            response = self.client.get(reverse("dashboard"), {"q": "fraction"})
+            self.assertEqual([course["title"] for course in response.context["courses"]], ["Fractions"])
+            self.assertIn("q=fraction", response.context["next_page_query"])
+
+            response = self.client.get(reverse("dashboard"), {"q": "fraction", "after": title_match.id})
+            self.assertEqual([course["title"] for course in response.context["courses"]], ["Number Sense"])
+            self.assertIn("<mark>Fractions</mark>", response.context["courses"][0]["snippet"])
+            self.assertIsNone(response.context["next_page_query"])
+            self.assertIn(f"before={description_match.id}", response.context["previous_page_query"])
+
+            response = self.client.get(reverse("dashboard"), {"q": "fraction", "before": description_match.id})
+            self.assertEqual([course["title"] for course in response.context["courses"]], ["Fractions"])
+
+    def test_dashboard_search_skips_courses_outside_the_dashboard(self):
+        self.client.login(email='normal@example.com', password='testpass')
+        published = Course.objects.create(
+            title="Number Sense", description="Fractions and a common denominator.",
+            difficulty=Course.JUNIOR, estimated_completion_time=30, status="published"
+        )
+        index_course(published)
+        for index in range(3):
+            index_course(Course.objects.create(
+                title=f"Fractions Draft {index}", description="Fractions.",
+                difficulty=Course.JUNIOR, estimated_completion_time=30
+            ))
+
+        with patch("apps.users.views.DASHBOARD_PAGE_SIZE", 1):
+            response = self.client.get(reverse("dashboard"), {"q": "fraction"})
+
+        self.assertEqual([course["title"] for course in response.context["courses"]], ["Number Sense"])
+        self.assertIsNone(response.context["next_page_query"])
+
+    def test_dashboard_search_links_video_moments(self):
+        self.client.login(email='normal@example.com', password='testpass')
+        published = Course.objects.create(
+            title="Fractions", description="Parts of a whole.",
+            difficulty=Course.JUNIOR, estimated_completion_time=30, status="published"
+        )
+        draft = Course.objects.create(
+            title="Draft Fractions", description="Unpublished.",
+            difficulty=Course.JUNIOR, estimated_completion_time=30
+        )
+        transcription = [{"text": "Find the common denominator.", "start_time": 75.0, "end_time": 78.0}]
+        for course in [published, draft]:
+            section = Section.objects.create(course=course, title="Adding", order=0)
+            index_video_transcription(Content.objects.create(
+                section=section, content_type=Content.VIDEO, video_url="https://www.youtube.com/embed/abc",
+                video_transcription=transcription
+            ))
+
+        response = self.client.get(reverse("dashboard"), {"q": "denominator"})
+
+        moments = response.context["video_moments"]
+        self.assertEqual([moment["course_title"] for moment in moments], ["Fractions"])
+        self.assertEqual(moments[0]["timestamp"], "1:15")
+        self.assertContains(
+            response,
+            f'{reverse("course", args=[published.slug])}?video={moments[0]["content_id"]}&t=75.0'
+        )
+
+    def test_dashboard_marks_saved_and_completed_courses(self):
+        self.client.login(email='normal@example.com', password='testpass')
+        saved_course = Course.objects.create(
+            title="Saved Course", description="Saved.", difficulty=Course.JUNIOR,
+            estimated_completion_time=30, status="published"
+        )
+        completed_course = Course.objects.create(
+            title="Completed Course", description="Completed.", difficulty=Course.JUNIOR,
+            estimated_completion_time=30, status="published"
+        )
+        self.normal_user.saved_courses.add(saved_course)
+        self.normal_user.completed_courses.add(completed_course)
+
+        response = self.client.get(reverse("dashboard"))
+        flags = {course["title"]: (course["is_saved"], course["is_completed"])
+                 for course in response.context["courses"]}
+        self.assertEqual(flags, {"Saved Course": (True, False), "Completed Course": (False, True)})
+
+        response = self.client.get(reverse("dashboard"), {"saved_only": "true"})
+        self.assertEqual([course["title"] for course in response.context["courses"]], ["Saved Course"])
+
     def test_scheduled_courses_display(self):
         self.client.login(email='normal@example.com', password='testpass')
         course = Course.objects.create(
@@ -17,6 +17,7 @@ urlpatterns = [
     path('verify-email/', views.verify_email_page, name='verify_email_page'),
     path('verify-email/<str:token>/', views.verify_email, name='verify_email'),
     path('check-verification-status/', views.check_verification_status, name='check_verification_status'),
+    path('check-verification-status/wait/', views.wait_for_verification_status, name='wait_for_verification_status'),
     path('resend-verification-email/', views.resend_verification_email, name='resend_verification_email'),
 
     # --- Password Reset ---
@@ -26,6 +27,8 @@ urlpatterns = [
     path('password-reset/new-password/', views.password_reset_form, name='password_reset_form'),
     path('check-password-reset-verification/', views.check_password_reset_verification,
          name='check_password_reset_verification'),
+    path('check-password-reset-verification/wait/', views.wait_for_password_reset_verification,
+         name='wait_for_password_reset_verification'),
     path('resend-password-reset-verification/', views.resend_password_reset_verification,
          name='resend_password_reset_verification'),
 
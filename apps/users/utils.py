@@ -1,15 +1,23 @@
+import contextlib
+from datetime import timedelta
 from functools import wraps
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
 from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.mail import EmailMessage
 from django.core.signing import TimestampSigner
+from django.db.models import F, Q
 from django.shortcuts import redirect
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.encoding import force_bytes
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from django.utils.http import urlsafe_base64_encode
 
+from apps.users.models import EmailVerificationToken, OutboxEmail
+
 signer = TimestampSigner()
 
 
@@ -33,9 +41,56 @@ def generate_verification_token(user) -> str:
     return signed_token
 
 
-def send_email(user, purpose, extra_context=None):
-    """Sends a verification, password reset, or scheduled course reminder email with a token."""
+def queue_email(user, purpose, extra_context=None) -> OutboxEmail:
+    """
+    Renders an email with build_email and stores it in the outbox for the email worker to send.
+    The row is written in the caller's transaction, so the request never waits on the mail server.
+    """
+    email = build_email(user, purpose, extra_context)
+
+    return OutboxEmail.objects.create(
+        purpose=purpose,
+        recipient=email.to[0],
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+    )
+
+
+def queue_verification_email(user, force=False) -> bool:
+    """
+    Queues a verification email unless one was queued for the user within VERIFICATION_EMAIL_COOLDOWN seconds,
+    in which case the token already sent is still pending and nothing is queued. Returns whether an email was queued.
+    The cooldown is claimed with a conditional update, so concurrent requests queue at most one email.
+    force queues an email regardless of the cooldown, for an explicit resend.
+    """
+    now = timezone.now()
     token = generate_verification_token(user)
+
+    ledger, created = EmailVerificationToken.objects.get_or_create(
+        user=user,
+        defaults={"token": token, "last_sent_at": now, "send_count": 1}
+    )
+
+    if not created:
+        due = EmailVerificationToken.objects.filter(pk=ledger.pk)
+        if not force:
+            cooldown_start = now - timedelta(seconds=settings.VERIFICATION_EMAIL_COOLDOWN)
+            due = due.filter(Q(last_sent_at__isnull=True) | Q(last_sent_at__lte=cooldown_start))
+
+        if not due.update(token=token, last_sent_at=now, send_count=F("send_count") + 1):
+            return False
+
+    queue_email(user, "verification", extra_context={"token": token})
+    return True
+
+
+def build_email(user, purpose, extra_context=None) -> EmailMessage:
+    """
+    Renders a verification, password reset, or scheduled course reminder email without sending it.
+    A token given in extra_context is used instead of a new one.
+    """
+    token = (extra_context or {}).get("token") or generate_verification_token(user)
     current_site = get_current_site(None)
 
     if purpose == "verification":
@@ -75,12 +130,78 @@ def send_email(user, purpose, extra_context=None):
             scheduled_time.strftime("%Y-%m-%d %H:%M")
         )
 
+    elif purpose == "scheduled_course_digest":
+        if not extra_context or not extra_context.get("courses"):
+            raise ValueError("Missing extra_context data for scheduled course digest.")
+
+        courses = extra_context["courses"]
+
+        subject = f"Upcoming Scheduled Courses Reminder: {len(courses)} courses"
+        message = format_html(
+            "<p>Hi {},</p>"
+            "<p>This is a reminder that you have scheduled courses coming up:</p>"
+            "<ul>{}</ul>"
+            "<p>Don't miss them!</p>",
+            user.get_full_name() or user.username,
+            format_html_join(
+                "",
+                "<li><strong>{}</strong> at {}</li>",
+                (
+                    (course["course_title"], course["scheduled_time"].strftime("%Y-%m-%d %H:%M"))
+                    for course in courses
+                )
+            )
+        )
+
     else:
         raise ValueError("Invalid email purpose")
 
     email = EmailMessage(subject, message, settings.EMAIL_HOST_USER, [user.email])
     email.content_subtype = "html"
-    email.send(fail_silently=False)
+    return email
+
+
+def send_emails_individually(connection, emails, on_result=None):
+    """
+    Sends emails over one connection, one message at a time so a failed message does not stop the rest.
+    Returns the exception raised for each email, or None when it was sent.
+    on_result is called as on_result(index, error) right after each email, so callers can record every delivery
+    before the next one is attempted.
+    The connection is reopened after a failure, in case the mail server dropped it. When the mail server cannot be
+    reached the remaining emails fail with that error without being attempted.
+    """
+    errors = []
+    connection_error = _open_connection(connection)
+
+    for index, email in enumerate(emails):
+        error = connection_error
+
+        if error is None:
+            try:
+                if not connection.send_messages([email]):
+                    raise RuntimeError(f"Email to {', '.join(email.to)} was not sent.")
+
+            except Exception as e:
+                error = e
+
+                with contextlib.suppress(Exception):
+                    connection.close()
+                connection_error = _open_connection(connection)
+
+        errors.append(error)
+
+        if on_result is not None:
+            on_result(index, error)
+
+    return errors
+
+
+def _open_connection(connection):
+    try:
+        connection.open()
+    except Exception as e:
+        return e
+    return None
 
 
 # === DECORATORS ===
@@ -111,16 +232,31 @@ def role_required(allowed_roles):
     - Role not in allowed_roles → own dashboard
     """
 
+    def check_role(user):
+        if not user.is_authenticated:
+            return redirect("homepage")
+        if user.is_superuser:
+            return redirect("homepage")
+        if user.role not in allowed_roles:
+            return _redirect_user_dashboard(user)
+        return None
+
     def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_async_view(request, *args, **kwargs):
+                response = check_role(await request.auser())
+                if response is not None:
+                    return response
+                return await view_func(request, *args, **kwargs)
+
+            return markcoroutinefunction(_wrapped_async_view)
+
         @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
-            user = request.user
-            if not user.is_authenticated:
-                return redirect("homepage")
-            if user.is_superuser:
-                return redirect("homepage")
-            if user.role not in allowed_roles:
-                return _redirect_user_dashboard(user)
+            response = check_role(request.user)
+            if response is not None:
+                return response
             return view_func(request, *args, **kwargs)
 
         return _wrapped_view
@@ -131,7 +267,7 @@ def role_required(allowed_roles):
 def verify_normal_user(view_func):
     """
     Redirect unverified normal users to email verification page.
-    Sends email if not yet verified.
+    Queues a verification email if not yet verified, at most once per cooldown.
     Skips for other roles.
     """
 
@@ -139,7 +275,7 @@ def verify_normal_user(view_func):
     def _wrapped_view(request, *args, **kwargs):
         user = request.user
         if user.role == "normal" and not user.is_verified:
-            send_email(user, "verification")
+            queue_verification_email(user)
             return redirect("verify_email_page")
         return view_func(request, *args, **kwargs)
 
@@ -0,0 +1,83 @@
+"""
+Wakes requests waiting for an email or password reset verification as soon as it happens.
+
+Waiters are registered per process, so a verification handled by another process is picked up by the
+waiting request's own checks or when the client asks again after a timeout.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+EMAIL_VERIFIED = "email_verified"
+PASSWORD_RESET_VERIFIED = "password_reset_verified"
+
+_waiters = defaultdict(set)
+_waiters_lock = threading.Lock()
+
+
+class VerificationWaiter:
+    """
+    Registers for the verification of a user while the with block is open. Registering before checking the
+    current state means a verification in between is never missed.
+    """
+
+    def __init__(self, kind, user_id):
+        self.key = (kind, user_id)
+        self._event = asyncio.Event()
+        self._loop = None
+
+    def __enter__(self):
+        self._loop = asyncio.get_running_loop()
+        with _waiters_lock:
+            _waiters[self.key].add(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        with _waiters_lock:
+            waiters = _waiters.get(self.key)
+            if waiters is not None:
+                waiters.discard(self)
+                if not waiters:
+                    del _waiters[self.key]
+
+    async def wait(self, timeout) -> bool:
+        """Returns whether the verification happened within timeout seconds."""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def _wake(self):
+        self._loop.call_soon_threadsafe(self._event.set)
+
+
+def notify_verified(kind, user_id):
+    """Wakes the requests of this process waiting for the verification. Safe to call from sync views."""
+    with _waiters_lock:
+        waiters = list(_waiters.get((kind, user_id), ()))
+
+    for waiter in waiters:
+        waiter._wake()
+
+
+async def wait_for_verification(kind, user_id, timeout, check=None, check_interval=None) -> bool:
+    """
+    Waits up to timeout seconds for the verification of a user and returns whether it happened.
+    check is an async function returning the current state; it is called first and then every check_interval
+    seconds, to pick up verifications handled by other processes.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    with VerificationWaiter(kind, user_id) as waiter:
+        while True:
+            if check is not None and await check():
+                return True
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+
+            if await waiter.wait(min(remaining, check_interval or remaining)):
+                return True
@@ -1,5 +1,6 @@
 from http.client import HTTPResponse
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model, login, get_backends, logout
 from django.contrib.auth.decorators import login_required
@@ -8,23 +9,45 @@ from django.contrib.auth.views import LogoutView
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.core.signing import BadSignature, SignatureExpired, TimestampSigner
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.utils import timezone
 from django.utils.decorators import method_decorator
-from django.utils.http import urlsafe_base64_decode
+from django.utils.http import urlencode, urlsafe_base64_decode
 from django.utils.safestring import mark_safe
 from django.views.decorators.csrf import csrf_exempt
 
-from apps.courses.models import Course, ScheduledCourse
+from apps.courses.models import Course, Content, CourseProgress, ScheduledCourse
+from apps.courses.search import search_courses, search_transcripts
 from apps.users.forms import CustomSignupForm, ProfileUpdateForm
-from apps.users.utils import pre_login_redirect, send_email, verify_normal_user, role_required
+from apps.users.models import EmailVerificationToken
+from apps.users.verification import (
+    EMAIL_VERIFIED,
+    PASSWORD_RESET_VERIFIED,
+    notify_verified,
+    wait_for_verification,
+)
+from apps.users.utils import (
+    pre_login_redirect,
+    queue_email,
+    queue_verification_email,
+    role_required,
+    verify_normal_user,
+)
 
 # Create your views here.
 User = get_user_model()
 signer = TimestampSigner()
 
+DASHBOARD_PAGE_SIZE = 24
+DASHBOARD_VIDEO_MOMENT_LIMIT = 5
+
+# Held verification status requests recheck the database this often
+VERIFICATION_WAIT_CHECK_INTERVAL = 5
+
 
 # --- Main Page ---
 @pre_login_redirect
@@ -83,14 +106,16 @@ def user_signup(request):
         form = CustomSignupForm(request.POST)
 
         if form.is_valid():
-            user = form.save(commit=False)
-            user.is_verified = False
-            user.save()
+            with transaction.atomic():
+                user = form.save(commit=False)
+                user.is_verified = False
+                user.save()
+
+                queue_verification_email(user)
 
             backend = get_backends()[0]
             login(request, user, backend=backend.__class__.__module__ + "." + backend.__class__.__name__)
 
-            send_email(user, "verification")
             return redirect("verify_email_page")
 
     else:
@@ -123,6 +148,9 @@ def verify_email(request, token):
         user.is_verified = True
         user.save()
 
+        EmailVerificationToken.objects.filter(user=user).delete()
+        notify_verified(EMAIL_VERIFIED, user.pk)
+
         return HttpResponse(
             mark_safe("""
                 <script>
@@ -149,11 +177,32 @@ def check_verification_status(request):
     return HttpResponse(status=204)
 
 
+@login_required
+async def wait_for_verification_status(request):
+    """
+    Long-polling version of check_verification_status: answers as soon as the email is verified, or with a
+    pending status after settings.VERIFICATION_WAIT_TIMEOUT seconds so the client asks again.
+    """
+    user = await request.auser()
+
+    verified = await wait_for_verification(
+        EMAIL_VERIFIED,
+        user.pk,
+        timeout=settings.VERIFICATION_WAIT_TIMEOUT,
+        check=User.objects.filter(pk=user.pk, is_verified=True).aexists,
+        check_interval=VERIFICATION_WAIT_CHECK_INTERVAL,
+    )
+
+    if verified:
+        return JsonResponse({"status": "verified", "redirect_url": reverse("dashboard")})
+    return JsonResponse({"status": "pending"})
+
+
 @login_required
 @csrf_exempt
 def resend_verification_email(request):
     if request.method == "POST":
-        send_email(request.user, "verification")
+        queue_verification_email(request.user, force=True)
         return JsonResponse({"message": "Verification email resent."})
 
     return JsonResponse({"error": "Invalid request."}, status=400)
@@ -173,7 +222,7 @@ def password_reset_request(request):
         user = User.objects.filter(email=email).first()
 
         if user:
-            send_email(user, "password_reset")
+            queue_email(user, "password_reset")
             request.session["password_reset_email"] = email
             request.session.set_expiry(300)
 
@@ -193,7 +242,7 @@ def password_reset_request(request):
             return redirect("homepage")
 
         if user:
-            send_email(user, "password_reset")
+            queue_email(user, "password_reset")
             request.session["password_reset_email"] = email
             request.session.set_expiry(300)
 
@@ -223,6 +272,8 @@ def verify_password_reset(request, token):
         request.session["password_reset_verified_user"] = user.id
         request.session.set_expiry(300)
 
+        notify_verified(PASSWORD_RESET_VERIFIED, user.id)
+
         return HttpResponse(
             mark_safe("""
                     <script>
@@ -280,6 +331,28 @@ def check_password_reset_verification(request):
         return JsonResponse({"status": "pending"})
 
 
+async def wait_for_password_reset_verification(request):
+    """
+    Long-polling version of check_password_reset_verification. The verification link replaces the session,
+    so a verification is only seen in this request when it is announced; otherwise the client asks again after
+    settings.VERIFICATION_WAIT_TIMEOUT seconds with its new session. Without a reset request in the session, for
+    example once it expired, there is nothing to wait for and the client is sent back to request a new one.
+    """
+    if await request.session.aget("password_reset_verified_user"):
+        return JsonResponse({"status": "verified", "redirect_url": reverse("password_reset_form")})
+
+    email = await request.session.aget("password_reset_email")
+    user_id = await User.objects.filter(email=email).values_list("pk", flat=True).afirst() if email else None
+
+    if user_id is None:
+        return JsonResponse({"status": "expired", "redirect_url": reverse("password_reset")})
+
+    if await wait_for_verification(PASSWORD_RESET_VERIFIED, user_id, timeout=settings.VERIFICATION_WAIT_TIMEOUT):
+        return JsonResponse({"status": "verified", "redirect_url": reverse("password_reset_form")})
+
+    return JsonResponse({"status": "pending"})
+
+
 @csrf_exempt
 def resend_password_reset_verification(request):
     if request.method != "POST":
@@ -296,7 +369,7 @@ def resend_password_reset_verification(request):
         if not user.is_active:
             return JsonResponse({"error": "User account is not active."}, status=400)
 
-        send_email(user, "password_reset")
+        queue_email(user, "password_reset")
 
         return JsonResponse({"message": "Password reset verification email has been resent."})
 
@@ -310,31 +383,55 @@ def resend_password_reset_verification(request):
 def dashboard(request):
     query = request.GET.get('q', '')
     saved_only = request.GET.get('saved_only') == 'true'
-    courses_qs = Course.objects.filter(status='published')
+    user = request.user
+
+    courses_qs = Course.objects.filter(status='published').annotate(
+        is_saved=Exists(Course.objects.filter(pk=OuterRef('pk'), saved_by=user)),
+        is_completed=Exists(Course.objects.filter(pk=OuterRef('pk'), completed_by=user)),
+    )
+
+    if saved_only:
+        courses_qs = courses_qs.filter(saved_by=user)
+
+    video_moments = []
 
     if query:
-        courses_qs = courses_qs.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query)
+        video_moments = _find_video_moments(courses_qs, search_transcripts(query, courses=courses_qs))
+        page, previous_cursor, next_cursor = _search_paginate(
+            courses_qs,
+            query,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            page_size=DASHBOARD_PAGE_SIZE,
+        )
+    else:
+        page, previous_cursor, next_cursor = _keyset_paginate(
+            courses_qs,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            page_size=DASHBOARD_PAGE_SIZE,
         )
 
-    user_saved_courses = request.user.saved_courses.all()
-    user_completed_courses = request.user.completed_courses.all()
-
-    if saved_only:
-        courses_qs = courses_qs.filter(id__in=user_saved_courses.values_list('id', flat=True))
+    course_progress = {
+        progress.course_id: progress.percentage
+        for progress in CourseProgress.objects.filter(user=user, course__in=[course.id for course in page])
+    } if page else {}
 
     courses = []
-    for course in courses_qs:
+    for course in page:
         courses.append({
             "title": course.title,
             "description": course.description,
             "slug": course.slug,
             "difficulty": course.get_difficulty_display(),
-            "is_saved": course in user_saved_courses,
-            "is_completed": course in user_completed_courses,
+            "is_saved": course.is_saved,
+            "is_completed": course.is_completed,
+            "progress": course_progress.get(course.id, 0),
+            "snippet": getattr(course, "search_snippet", None),
         })
 
+    filters = {"q": query, "saved_only": "true" if saved_only else "false"}
+
     scheduled_courses = ScheduledCourse.objects.filter(
         user=request.user,
         scheduled_time__gte=timezone.now()
@@ -349,6 +446,9 @@ def dashboard(request):
             "query": query,
             "saved_only": saved_only,
             "scheduled_courses": scheduled_courses,
+            "video_moments": video_moments,
+            "previous_page_query": urlencode({**filters, "before": previous_cursor}) if previous_cursor else None,
+            "next_page_query": urlencode({**filters, "after": next_cursor}) if next_cursor else None,
         }
     )
 
@@ -407,9 +507,8 @@ def content_manager_dashboard(request):
     draft_courses = Course.objects.filter(status='draft', created_by=request.user)
 
     if query:
-        search_filter = Q(title__icontains=query) | Q(description__icontains=query)
-        published_courses = published_courses.filter(search_filter)
-        draft_courses = draft_courses.filter(search_filter)
+        published_courses = _rank_courses(published_courses, search_courses(query, courses=published_courses))
+        draft_courses = _rank_courses(draft_courses, search_courses(query, courses=draft_courses))
 
     return render(
         request,
@@ -421,3 +520,121 @@ def content_manager_dashboard(request):
             "query": query
         }
     )
+
+
+# --- Private Functions ---
+def _keyset_paginate(queryset, after=None, before=None, page_size=DASHBOARD_PAGE_SIZE):
+    """
+    Returns one page of a queryset ordered by id, with the cursors of the previous and next pages.
+    Pages are located with an id comparison instead of an offset, so deep pages stay cheap.
+    """
+    after = _parse_cursor(after)
+    before = _parse_cursor(before)
+
+    if before is not None:
+        rows = list(queryset.filter(id__lt=before).order_by('-id')[:page_size + 1])
+        has_more_before = len(rows) > page_size
+        page = rows[:page_size][::-1]
+        has_more_after = True
+
+    else:
+        if after is not None:
+            queryset = queryset.filter(id__gt=after)
+
+        rows = list(queryset.order_by('id')[:page_size + 1])
+        has_more_after = len(rows) > page_size
+        page = rows[:page_size]
+        has_more_before = after is not None
+
+    previous_cursor = page[0].id if page and has_more_before else None
+    next_cursor = page[-1].id if page and has_more_after else None
+
+    return page, previous_cursor, next_cursor
+
+
+def _search_paginate(queryset, query, after=None, before=None, page_size=DASHBOARD_PAGE_SIZE):
+    """Same as _keyset_paginate for the courses of a queryset matching a search, in rank order."""
+    after = _parse_cursor(after)
+    before = _parse_cursor(before)
+
+    if before is not None:
+        results = search_courses(query, courses=queryset, before=before, limit=page_size + 1)
+        has_more_before = len(results) > page_size
+        results = results[-page_size:]
+        has_more_after = True
+
+    else:
+        results = search_courses(query, courses=queryset, after=after, limit=page_size + 1)
+        has_more_after = len(results) > page_size
+        results = results[:page_size]
+        has_more_before = after is not None
+
+    page = _rank_courses(queryset, results)
+    previous_cursor = page[0].id if page and has_more_before else None
+    next_cursor = page[-1].id if page and has_more_after else None
+
+    return page, previous_cursor, next_cursor
+
+
+def _rank_courses(queryset, search_results):
+    """Returns the courses of a queryset found by a search, in rank order and with their search snippet."""
+    snippets = {result["course_id"]: result["snippet"] for result in search_results}
+    courses = queryset.in_bulk(list(snippets))
+
+    ranked_courses = []
+    for course_id, snippet in snippets.items():
+        course = courses.get(course_id)
+        if course is not None:
+            course.search_snippet = snippet
+            ranked_courses.append(course)
+
+    return ranked_courses
+
+
+def _find_video_moments(courses_qs, transcript_hits, limit=DASHBOARD_VIDEO_MOMENT_LIMIT):
+    """
+    Returns the transcript search hits that belong to videos of the given courses, as links to the moment
+    they are spoken at. Hits left behind by videos that were removed or moved are skipped.
+    """
+    videos = Content.objects.filter(
+        pk__in=[hit["content_id"] for hit in transcript_hits],
+        content_type=Content.VIDEO,
+        section__course__in=courses_qs.values('pk'),
+    ).select_related('section__course').in_bulk()
+
+    moments = []
+    for hit in transcript_hits:
+        video = videos.get(hit["content_id"])
+        if video is None or video.section_id != hit["section_id"]:
+            continue
+
+        moments.append({
+            "course_title": video.section.course.title,
+            "course_slug": video.section.course.slug,
+            "section_title": video.section.title,
+            "content_id": video.id,
+            "start": hit["start"],
+            "timestamp": _format_timestamp(hit["start"]),
+            "snippet": hit["snippet"],
+        })
+
+        if len(moments) == limit:
+            break
+
+    return moments
+
+
+def _format_timestamp(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def _parse_cursor(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -76,11 +76,12 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
-    'apps.users.middleware.RestrictAdminMiddleware',
-    'apps.users.middleware.AdminLogoutOnExitMiddleware',
-    'apps.users.middleware.AdminRestrictionMiddleware',
+    'apps.users.middleware.AdminGuardMiddleware',
 ]
 
+# The admin site is only served to clients in these networks
+ADMIN_INTERNAL_NETWORKS = ["127.0.0.1/32", "192.168.0.0/16"]
+
 ROOT_URLCONF = 'customizable_learning_platform.urls'
 
 TEMPLATES = [
@@ -157,11 +158,46 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Compiled course render trees are keyed by course version, so they can be kept for a long time
+COURSE_TREE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# When a reminder is due, the user's reminders falling due within this many minutes are sent with it in one digest
+REMINDER_DIGEST_WINDOW_MINUTES = 60
+
+# Whisper transcription
+# Loaded models stay in memory per process; the least recently used one is unloaded past the limit
+
+WHISPER_MODEL_NAME = 'base'
+WHISPER_MAX_LOADED_MODELS = 1
+WHISPER_WARMUP_MODELS = [WHISPER_MODEL_NAME]
+
+# Audio longer than one chunk is split at silences and transcribed by this many processes. Each of them keeps its
+# own copy of the model on top of WHISPER_MAX_LOADED_MODELS, so the transcription worker holds up to
+# WHISPER_MAX_LOADED_MODELS + TRANSCRIPTION_WORKERS models at once (the 'base' model needs about 1 GB per copy).
+TRANSCRIPTION_WORKERS = min(4, os.cpu_count() or 1)
+TRANSCRIPTION_CHUNK_SECONDS = 5 * 60
+TRANSCRIPTION_CHUNK_OVERLAP_SECONDS = 2
+
 AUTHENTICATION_BACKENDS = (
-    'django.contrib.auth.backends.ModelBackend',
-    'allauth.account.auth_backends.AuthenticationBackend',
+    'apps.users.backends.CachedModelBackend',
+    'apps.users.backends.CachedAuthenticationBackend',
 )
 
+# Signed in users are cached between requests and dropped from the cache once a save is committed. Dropping only
+# reaches every process through a shared cache such as Redis or Memcached, so with the per-process LocMemCache
+# users are loaded from the database on each request instead.
+USER_CACHE_ENABLED = CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache'
+USER_CACHE_TIMEOUT = 5 * 60
+
 LOGIN_URL = '/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
@@ -199,6 +235,24 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 
+# Outbox delivery: a failed email waits EMAIL_OUTBOX_RETRY_DELAY seconds, doubled after every further failure
+EMAIL_OUTBOX_MAX_ATTEMPTS = 6
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 60 * 60
+
+# Seconds after queueing past which an email of these purposes is not retried: their links expire after 5 minutes
+EMAIL_OUTBOX_MAX_AGE = {
+    "verification": 5 * 60,
+    "password_reset": 5 * 60,
+}
+
+# Unverified users get at most one verification email per cooldown; the emailed token stays valid for 5 minutes
+VERIFICATION_EMAIL_COOLDOWN = 2 * 60
+
+# Seconds a verification status request is held open until the link is opened. Held requests need the ASGI
+# entry point; under WSGI each one blocks a worker thread, so set this to 0 and the pages poll instead.
+VERIFICATION_WAIT_TIMEOUT = 25
+
 PASSWORD_RESET_TIMEOUT = 14400
 
 AUTH_USER_MODEL = 'users.CustomUser'
@@ -228,5 +282,10 @@ LOGGING = {
             "level": "ERROR",
             "propagate": True,
         },
+        "apps": {
+            "handlers": ["file"],
+            "level": "ERROR",
+            "propagate": True,
+        },
     },
 }
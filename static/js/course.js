@@ -40,11 +40,59 @@ document.addEventListener("DOMContentLoaded", function () {
         });
     });
 
+    // Open the section of a video linked from a transcript search result
+    const searchParams = new URLSearchParams(window.location.search);
+    const targetVideoId = searchParams.get("video");
+    const targetStartTime = parseFloat(searchParams.get("t"));
+    const targetVideo = targetVideoId ? document.getElementById(`youtube-${targetVideoId}`) : null;
+    const targetSection = targetVideo ? targetVideo.closest(".section") : null;
+
+    if (targetSection && targetSection !== currentActiveSection) {
+        if (currentActiveSection) {
+            const prevBody = currentActiveSection.querySelector(".section-body");
+            if (prevBody) prevBody.style.display = "none";
+        }
+
+        targetSection.querySelector(".section-body").style.display = "block";
+        currentActiveSection = targetSection;
+    }
+
+    if (targetVideo) {
+        targetVideo.scrollIntoView({ behavior: "smooth", block: "center" });
+    }
+
     function getCSRFToken() {
         const cookieValue = document.cookie.match('(^|;)\\s*csrftoken\\s*=\\s*([^;]+)');
         return cookieValue ? cookieValue.pop() : '';
     }
 
+    function renderQuizResult(quizId, data) {
+        const quizArea = document.getElementById(`quiz-input-area-${quizId}`);
+
+        if (data.success && data.is_correct) {
+            // Replace the input area with the correct answer
+            quizArea.innerHTML = `<p class="quiz-answer">Answer: ${data.correct_answer}</p>`;
+        } else if (data.success) {
+            // Show incorrect answer feedback without replacing the input
+            const feedbackContainer = document.getElementById(`quiz-feedback-${quizId}`);
+            feedbackContainer.innerHTML = `<p class="text-danger">${data.message || "Incorrect answer."}</p>`;
+        } else {
+            // General error message
+            const feedbackContainer = document.getElementById(`quiz-feedback-${quizId}`);
+            if (feedbackContainer) {
+                feedbackContainer.innerHTML = `<p class="text-danger">${data.message || "Something went wrong."}</p>`;
+            }
+        }
+    }
+
+    function reloadIfRequired(data) {
+        if (data.reload) {
+            setTimeout(() => {
+                location.reload();
+            }, 1000);
+        }
+    }
+
     function submitQuizAnswer(quizId) {
         const answerInput = document.getElementById(`answer-input-${quizId}`);
         const userAnswer = answerInput.value.trim();
@@ -62,26 +110,8 @@ document.addEventListener("DOMContentLoaded", function () {
         })
         .then(response => response.json())
         .then(data => {
-            const quizArea = document.getElementById(`quiz-input-area-${quizId}`);
-
-            if (data.success && data.is_correct) {
-                // Replace the input area with the correct answer
-                quizArea.innerHTML = `<p class="quiz-answer">Answer: ${data.correct_answer}</p>`;
-            } else if (data.success) {
-                // Show incorrect answer feedback without replacing the input
-                const feedbackContainer = document.getElementById(`quiz-feedback-${quizId}`);
-                feedbackContainer.innerHTML = `<p class="text-danger">${data.message || "Incorrect answer."}</p>`;
-            } else {
-                // General error message
-                const feedbackContainer = document.getElementById(`quiz-feedback-${quizId}`);
-                feedbackContainer.innerHTML = `<p class="text-danger">${data.message || "Something went wrong."}</p>`;
-            }
-
-            if (data.reload) {
-                setTimeout(() => {
-                    location.reload();
-                }, 1000);
-            }
+            renderQuizResult(quizId, data);
+            reloadIfRequired(data);
         })
         .catch(error => {
             console.error("Error submitting answer:", error);
@@ -90,6 +120,52 @@ document.addEventListener("DOMContentLoaded", function () {
         });
     }
 
+    function submitSectionQuizAnswers(quizSection) {
+        // Send every filled-in answer of the section in a single request
+        const answers = [];
+
+        quizSection.querySelectorAll('.quiz-block').forEach(quizBlock => {
+            const quizIdInput = quizBlock.querySelector('input[name="quiz_id"]');
+            if (!quizIdInput) return;
+
+            const answerInput = document.getElementById(`answer-input-${quizIdInput.value}`);
+            if (answerInput && answerInput.value.trim()) {
+                answers.push({
+                    quiz_id: quizIdInput.value,
+                    answer: answerInput.value.trim()
+                });
+            }
+        });
+
+        if (!answers.length) return;
+
+        fetch("/courses/submit-quiz-answers/", {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+                "X-CSRFToken": getCSRFToken()
+            },
+            body: JSON.stringify({ answers: answers })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                console.error("Error submitting answers:", data.message);
+                return;
+            }
+
+            data.results.forEach(result => {
+                if (result.quiz_id) {
+                    renderQuizResult(result.quiz_id, result);
+                }
+            });
+            reloadIfRequired(data);
+        })
+        .catch(error => {
+            console.error("Error submitting answers:", error);
+        });
+    }
+
     document.body.addEventListener('click', function (event) {
         if (event.target && event.target.classList.contains('quiz-submit-btn')) {
             event.preventDefault();
@@ -105,6 +181,11 @@ document.addEventListener("DOMContentLoaded", function () {
             const quizId = quizIdInput.value;
             submitQuizAnswer(quizId);
         }
+
+        if (event.target && event.target.classList.contains('quiz-submit-all-btn')) {
+            event.preventDefault();
+            submitSectionQuizAnswers(event.target.closest('.quiz-section'));
+        }
     });
 
     // Course Scheduling
@@ -217,7 +298,12 @@ document.addEventListener("DOMContentLoaded", function () {
 
             players[videoId] = new YT.Player(iframe.id, {
                 events: {
-                    onReady: (event) => setupHighlighting(videoId, event.target)
+                    onReady: (event) => {
+                        if (videoId === targetVideoId && !isNaN(targetStartTime)) {
+                            event.target.seekTo(targetStartTime, true);
+                        }
+                        setupHighlighting(videoId, event.target);
+                    }
                 }
             });
         });
@@ -6,6 +6,8 @@ document.addEventListener("DOMContentLoaded", function (e) {
     const addVideoBtn = document.getElementById("add-video-btn");
     const addQuizBtn = document.getElementById("add-quiz-btn");
 
+    const TRANSCRIPTION_POLL_INTERVAL = 2000;
+
     let currentSection = null;
     let currentModal = null;
     let isTranscribing = false;
@@ -436,52 +438,182 @@ document.addEventListener("DOMContentLoaded", function (e) {
             }),
         })
         .then((response) => response.json())
+        .then((job) => {
+            if (job.events_url && window.EventSource) {
+                updateTranscriptionModal("Transcription queued...", true, "info");
+                streamTranscriptionJob(videoForm, job.events_url);
+                return null;
+            }
+
+            if (!job.status_url) return job;
+
+            updateTranscriptionModal("Transcription queued...", true, "info");
+            return pollTranscriptionJob(job.status_url);
+        })
         .then((data) => {
-            isTranscribing = false;
+            if (!data) return;  // Streamed, or cancelled while waiting for the job
 
-            if (data.status === "success" && Array.isArray(data.transcription)) {
-                const transcriptionEditor = videoForm.querySelector(".transcription-editor");
-                if (!transcriptionEditor) {
-                    updateTranscriptionModal("❌ Transcription editor not found.", false, "error");
+            if (data.status === "done" && Array.isArray(data.transcription)) {
+                if (!videoForm.querySelector(".transcription-editor")) {
+                    finishTranscription("❌ Transcription editor not found.", "error");
                     return;
                 }
 
-                // Clear all existing transcription rows
-                transcriptionEditor.innerHTML = "";
+                clearTranscriptionRows(videoForm);
+                appendTranscriptionSegments(videoForm, data.transcription);
+                finishTranscription("✅ Transcription complete!", "success");
+            } else {
+                finishTranscription("❌ Transcription failed: " + data.message, "error");
+            }
+        })
+        .catch((error) => {
+            console.error("Transcription error:", error);
+            finishTranscription("❌ An error occurred while transcribing the video.", "error");
+        });
+    }
 
-                // Add new rows for each transcription entry
-                data.transcription.forEach(segment => {
-                    addTranscriptionRow(videoForm);
-                    const newRow = transcriptionEditor.lastElementChild;
+    function clearTranscriptionRows(videoForm) {
+        const transcriptionEditor = videoForm.querySelector(".transcription-editor");
+        if (transcriptionEditor) transcriptionEditor.innerHTML = "";
+    }
 
-                    const inputs = newRow.querySelectorAll("input");
-                    const textarea = newRow.querySelector("textarea");
+    function appendTranscriptionSegments(videoForm, segments) {
+        const transcriptionEditor = videoForm.querySelector(".transcription-editor");
+        if (!transcriptionEditor) return;
 
-                    if (inputs.length >= 2 && textarea) {
-                        inputs[0].value = formatTime(segment.start);  // Format start time
-                        inputs[1].value = formatTime(segment.end);    // Format end time
-                        textarea.value = segment.text;
-                    }
-                });
+        segments.forEach(segment => {
+            addTranscriptionRow(videoForm);
+            const newRow = transcriptionEditor.lastElementChild;
 
-                updateTranscriptionModal("✅ Transcription complete!", false, "success");
-                isDirty = true;
-            } else {
-                updateTranscriptionModal("❌ Transcription failed: " + data.message, false, "error");
+            const inputs = newRow.querySelectorAll("input");
+            const textarea = newRow.querySelector("textarea");
+
+            if (inputs.length >= 2 && textarea) {
+                inputs[0].value = formatTime(segment.start);  // Format start time
+                inputs[1].value = formatTime(segment.end);    // Format end time
+                textarea.value = segment.text;
             }
+        });
 
-            setTimeout(() => {
-                if (currentModal) currentModal.hide();
-            }, 2500);
-        })
-        .catch((error) => {
-            isTranscribing = false;
-            console.error("Transcription error:", error);
-            updateTranscriptionModal("❌ An error occurred while transcribing the video.", false, "error");
+        if (segments.length) isDirty = true;
+    }
+
+    function finishTranscription(message, type) {
+        isTranscribing = false;
+        updateTranscriptionModal(message, false, type);
+
+        setTimeout(() => {
+            if (currentModal) currentModal.hide();
+        }, 2500);
+    }
+
+    // Streams the progress and segments of a transcription job. The modal is closed once the first
+    // segments arrive, so they can be edited while the rest of the video is transcribed.
+    function streamTranscriptionJob(videoForm, eventsUrl) {
+        const source = new EventSource(eventsUrl);
+        let receivedSegments = 0;
+
+        const progressText = document.createElement("div");
+        progressText.className = "transcription-progress small text-muted mt-2";
+        videoForm.querySelector(".transcription-editor")?.before(progressText);
+
+        function showProgress(message) {
+            progressText.textContent = message;
+            if (isTranscribing) updateTranscriptionModal(message, true, "info");
+        }
+
+        function stop() {
+            source.close();
+            progressText.remove();
+        }
+
+        function readEvent(event) {
+            if (!isTranscribing) {
+                // Cancelled by the user
+                stop();
+                return null;
+            }
+            return JSON.parse(event.data);
+        }
+
+        source.addEventListener("progress", (event) => {
+            const data = readEvent(event);
+            if (data) showProgress(describeTranscriptionProgress(data));
+        });
 
-            setTimeout(() => {
+        source.addEventListener("segments", (event) => {
+            const data = readEvent(event);
+            if (!data) return;
+
+            // A reconnected stream starts over, so skip the segments that were already added
+            const newSegments = data.segments.slice(Math.max(0, receivedSegments - data.offset));
+            if (receivedSegments === 0 && newSegments.length) {
+                clearTranscriptionRows(videoForm);
                 if (currentModal) currentModal.hide();
-            }, 2500);
+            }
+
+            appendTranscriptionSegments(videoForm, newSegments);
+            receivedSegments += newSegments.length;
+        });
+
+        source.addEventListener("done", (event) => {
+            if (!readEvent(event)) return;
+            stop();
+            finishTranscription("✅ Transcription complete!", "success");
+        });
+
+        source.addEventListener("failed", (event) => {
+            const data = readEvent(event);
+            if (!data) return;
+            stop();
+            if (currentModal) currentModal.show();
+            finishTranscription("❌ Transcription failed: " + data.message, "error");
+        });
+    }
+
+    function describeTranscriptionProgress(data) {
+        const percent = data.progress ? ` ${data.progress}%` : "";
+
+        switch (data.stage) {
+            case "downloading":
+                return `Downloading video...${percent}`;
+            case "extracting_audio":
+                return "Extracting audio...";
+            case "loading_model":
+                return "Loading transcription model...";
+            case "transcribing":
+                return `Transcribing video...${percent}`;
+            default:
+                return data.status === "queued" ? "Transcription queued..." : "Transcribing video...";
+        }
+    }
+
+    // Polls a transcription job until it is done or failed. Resolves to null when the user cancels.
+    function pollTranscriptionJob(statusUrl) {
+        return new Promise((resolve, reject) => {
+            function poll() {
+                if (!isTranscribing) {
+                    resolve(null);
+                    return;
+                }
+
+                fetch(statusUrl, {headers: {"Accept": "application/json"}})
+                    .then((response) => response.json())
+                    .then((data) => {
+                        if (data.status === "done" || data.status === "failed") {
+                            resolve(data);
+                            return;
+                        }
+
+                        if (data.status === "running") {
+                            updateTranscriptionModal("Transcribing video...", true, "info");
+                        }
+                        setTimeout(poll, TRANSCRIPTION_POLL_INTERVAL);
+                    })
+                    .catch(reject);
+            }
+
+            setTimeout(poll, TRANSCRIPTION_POLL_INTERVAL);
         });
     }
 
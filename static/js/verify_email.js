@@ -1,3 +1,27 @@
+// The server holds the request until the email is verified; polling is the fallback when that fails
+// Requests answered early, for example when the server does not hold them, are repeated after this many ms
+const MIN_WAIT_INTERVAL = 5000;
+
+function waitForVerification() {
+    const startedAt = Date.now();
+
+    fetch("/check-verification-status/wait/")
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Unexpected status ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data.status === "verified") {
+                window.location.href = data.redirect_url;
+            } else {
+                setTimeout(waitForVerification, Math.max(0, MIN_WAIT_INTERVAL - (Date.now() - startedAt)));
+            }
+        })
+        .catch(() => checkVerificationStatus());
+}
+
 function checkVerificationStatus() {
     fetch("/check-verification-status/", { method: "GET", redirect: "follow" })
         .then(response => {
@@ -10,7 +34,7 @@ function checkVerificationStatus() {
         .catch(() => setTimeout(checkVerificationStatus, 5000));
 }
 
-checkVerificationStatus();
+waitForVerification();
 
 let canResend = true;
 
@@ -1,3 +1,27 @@
+// The server holds the request until the reset link is opened; polling is the fallback when that fails
+// Requests answered early, for example when the server does not hold them, are repeated after this many ms
+const MIN_WAIT_INTERVAL = 3000;
+
+function waitForVerification() {
+    const startedAt = Date.now();
+
+    fetch("/check-password-reset-verification/wait/")
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Unexpected status ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data.status === "verified" || data.status === "expired") {
+                window.location.href = data.redirect_url;
+            } else {
+                setTimeout(waitForVerification, Math.max(0, MIN_WAIT_INTERVAL - (Date.now() - startedAt)));
+            }
+        })
+        .catch(() => checkVerificationStatus());
+}
+
 function checkVerificationStatus() {
     fetch("/check-password-reset-verification/")
         .then(response => response.json())
@@ -11,7 +35,7 @@ function checkVerificationStatus() {
         .catch(error => console.error("❌ Error checking verification status:", error));
 }
 
-document.addEventListener("DOMContentLoaded", checkVerificationStatus);
+document.addEventListener("DOMContentLoaded", waitForVerification);
 
 let canResend = true;
 